@@ -1,6 +1,13 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import subprocess
 from PyInstaller.compat import is_win, is_darwin
 
+#compile resources into a binary bundle that is memory mapped at startup
+resource_qrc = os.path.join(SPECPATH, '../src/resources.qrc')
+resource_rcc = os.path.join(SPECPATH, '../src/resources.rcc')
+subprocess.run(['pyside6-rcc', '--binary', resource_qrc, '-o', resource_rcc], check=True)
+
 if is_win:
     icons = ['../src/icons/logo.ico', '../src/icons/alogo.ico']
     datas = []
@@ -17,12 +24,12 @@ a = Analysis(
     ['../src/main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[(resource_rcc, '.')],
     hiddenimports=[],
     hookspath=['hooks'],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['resources'],
     noarchive=False,
     optimize=0,
 )
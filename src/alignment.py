@@ -1,267 +1,160 @@
-import pyfastx
-
 from PySide6.QtGui import *
 from PySide6.QtCore import *
 from PySide6.QtWidgets import *
 
+from common import *
 from backend import *
 
 __all__ = ['KraitAlignmentViewer']
 
-def create_matrix(n, m):
-	d = []
-	for i in range(n+1):
-		d.append([])
-
-		for j in range(m+1):
-			d[i].append(0)
-
-	for i in range(n+1):
-		d[i][0] = i
-
-	for j in range(m+1):
-		d[0][j] = j
-
-	return d
-
-def print_matrix(mx):
-	for row in mx:
-		print('\t'.join(map(str, row)))
-
-def wrap_around_distance(b, s, i, d):
-	m = len(s)
-
-	c = int(not b == s[0])
-	d[i][1] = min(d[i-1][0]+c, d[i-1][m]+c, d[i-1][1]+1)
-
-	for j in range(2, m+1):
-		c = int( not b == s[j-1])
-		d[i][j] = min(d[i-1][j-1]+c, d[i][j-1]+1, d[i-1][j]+1)
-
-	d[i][1] = min(d[i][1], d[i][m]+1)
-
-	for j in range(2, m):
-		d[i][j] = min(d[i][j], d[i][j-1]+1)
-
-def wrap_around_extend(s, ms, dr):
-	mx = create_matrix(len(s), len(ms))
-	n = len(s)
-
-	if dr == -1:
-		ms = ms[::-1]
-		st = n
-	else:
-		st = -1
-
-	for i in range(1, n+1):
-		wrap_around_distance(s[st+i*dr], ms, i, mx)
-
-	return mx
-
-def wrap_around_backtrace(mx, s, ms, dr):
-	m = len(ms)
-	i = len(s)
-	j = 0
-
-	#find minimum value
-	for idx, val in enumerate(mx[i]):
-		if val <= mx[i][j]:
-			j = idx
-
-	if dr == -1:
-		ms = ms[::-1]
-		s = s[::-1]
-
-	origin = []
-	perfect = []
-
-	while i > 0 or j > 0:
-		if j == 0:
-			origin.append(s[i-1])
-			perfect.append('-')
-			i -= 1
-
-		elif i == 0:
-			origin.append('-')
-			perfect.append(ms[j-1])
-			j -= 1
-
-		elif j == 1:
-			v = min(mx[i-1][0], mx[i-1][m], mx[i][0], mx[i-1][1])
-
-			if v == mx[i-1][m]:
-				origin.append(s[i-1])
-				perfect.append(ms[j-1])
-				i -= 1
-				j = m
-			elif v == mx[i-1][0]:
-				origin.append(s[i-1])
-				perfect.append(ms[j-1])
-				i -= 1
-				j = 0
-			elif v == mx[i-1][1]:
-				origin.append(s[i-1])
-				perfect.append('-')
-				i -= 1
-			elif v == mx[i][0]:
-				origin.append('-')
-				perfect.append(ms[j-1])
-				j -= 1
-		else:
-			v = min(mx[i-1][j-1], mx[i-1][j], mx[i][j-1])
-
-			if v == mx[i-1][j-1] and v == mx[i][j]:
-				origin.append(s[i-1])
-				perfect.append(ms[j-1])
-				i -= 1
-				j -= 1
-
-			elif v == mx[i][j-1]:
-				origin.append('-')
-				perfect.append(ms[j-1])
-				j -= 1
-
-			elif v == mx[i-1][j-1]:
-				origin.append(s[i-1])
-				perfect.append(ms[j-1])
-				i -= 1
-				j -= 1
-
-			elif v == mx[i-1][j]:
-				origin.append(s[i-1])
-				perfect.append('-')
-				i -= 1
-
-	if dr == 1:
-		origin.reverse()
-		perfect.reverse()
-
-	#return eds
-	return (''.join(origin), ''.join(perfect))
-
-def generate_alignment_pattern(seqs):
-	origin, perfect = seqs
-	patterns = []
-	template = (
-		'<td class="B">'
-		'<span>{}</span><br>'
-		'<span class="{}">{}</span><br>'
-		'<span>{}</span><br>'
-		'<span class="{}">{}</span>'
-		'</td>'
-	)
-
-	for i in range(len(origin)):
-		ob = origin[i]
-		pb = perfect[i]
-
-		align = ''
-
-		if origin[i] == perfect[i]:
-			mtype = ''
-			align = '|'
-		elif origin[i] == '-':
-			mtype = 'd'
-		elif perfect[i] == '-':
-			mtype = 'i'
-		else:
-			mtype = 's'
-
-		patterns.append(template.format(mtype, ob, ob, align, pb, pb))
-
-	return patterns
-
-def generate_alignment_sequence(left, seq, right, motif, num):
-	patterns = []
-
-	if left:
-		mx = wrap_around_extend(left, motif, -1)
-		seqs = wrap_around_backtrace(mx, left, motif, -1)
-		patterns += generate_alignment_pattern(seqs)
-
-	patterns += generate_alignment_pattern((seq, seq))
-
-	if right:
-		mx = wrap_around_extend(right, motif, 1)
-		seqs = wrap_around_backtrace(mx, right, motif, 1)
-		patterns += generate_alignment_pattern(seqs)
-
-	rows = ['<tr>']
-
-	for i, p in enumerate(patterns, 1):
-		rows.append(p)
-
-		if i % num == 0:
-			rows.append('</tr><tr>')
-
-	rows.append('</tr>')
-
-	return ''.join(rows)
-
-class KraitAlignmentViewer(QTextBrowser):
+def print_matrix(mx, width):
+	for i in range(0, len(mx), width):
+		print('\t'.join(map(str, mx[i:i+width])))
+
+class KraitAlignmentViewer(QAbstractScrollArea):
+	#colors of bases
+	base_colors = {
+		'A': QColor(80, 80, 255),
+		'T': QColor(255, 215, 0),
+		'G': QColor(0, 192, 0),
+		'C': QColor(244, 0, 0)
+	}
+
+	#rendered glyphs of each font
+	glyph_cache = {}
+
 	def __init__(self, parent=None):
 		super().__init__(parent)
+		self.setFrameStyle(QFrame.NoFrame)
+		self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+		self.target = None
+		self.aligner = KraitWrapAroundAligner()
+
+		#aligned original and perfect sequence
+		self.origin = ''
+		self.perfect = ''
 
 		font = QFont("Roboto Mono")
 		font.setPointSize(10)
 		self.setFont(font)
+		self.update_metrics()
 
-		self.target = None
+	def update_metrics(self):
+		fm = self.fontMetrics()
+		self.cell_width = fm.averageCharWidth() * 2
+		self.line_height = fm.height()
+
+		#mutation, original, match and perfect line plus a spacing line
+		self.row_height = self.line_height * 5
+		self.glyphs = self.glyph_cache.setdefault(self.font().key(), {})
+
+	def get_glyph(self, char, color):
+		ratio = self.devicePixelRatioF()
+		key = (char, color, ratio)
+
+		if key not in self.glyphs:
+			pixmap = QPixmap(int(self.cell_width*ratio), int(self.line_height*ratio))
+			pixmap.setDevicePixelRatio(ratio)
+			pixmap.fill(Qt.transparent)
+
+			painter = QPainter(pixmap)
+			painter.setFont(self.font())
+			painter.setPen(QColor(color))
+			painter.drawText(QRect(0, 0, self.cell_width, self.line_height), Qt.AlignCenter, char)
+			painter.end()
+
+			self.glyphs[key] = pixmap
+
+		return self.glyphs[key]
+
+	def get_row_columns(self):
+		return max(self.viewport().width() // self.cell_width, 1)
+
+	def update_scrollbar(self):
+		rows = -(-len(self.origin) // self.get_row_columns())
+		height = self.viewport().height()
+
+		bar = self.verticalScrollBar()
+		bar.setRange(0, max(rows * self.row_height - height, 0))
+		bar.setPageStep(height)
+		bar.setSingleStep(self.line_height)
 
 	def update_alignment(self):
-		ww = self.width()
-		fw = self.fontMetrics().averageCharWidth() * 2
-		mw = self.contentsMargins()
-		num = int((ww - mw.left() - mw.right()) / fw)
-
-		patterns = generate_alignment_sequence(*self.target, num)
-		#content = "<table>{}</table>".format(patterns)
-		content = """
-		<html>
-			<head>
-				<style>
-					*{{
-						margin: 0;
-						padding: 0;
-					}}
-					.B{{
-						white-space: pre-line;
-						text-align: center;
-						display: inline-block;
-					}}
-					.A{{color:#5050ff;}}
-					.T{{color:#ffd700;}}
-					.G{{color:#00c000;}}
-					.C{{color:#f40000;}}
-				</style>
-			</head>
-			<body>
-				<table boder="0" cellpadding="0" cellspacing="0">{}</table>
-			</body>
-		</html>
-
-		""".format(patterns)
-		self.setHtml(content)
-
-	#def resizeEvent(self, event):
-	#	super().resizeEvent(event)
-
-	#	if not self.target:
-	#		return
-
-	#	if event.oldSize().width() == event.size().width():
-	#		return
-
-	#	self.update_alignment()
+		alns = self.aligner.align_repeat(*self.target)
+		self.origin, self.perfect = map(''.join, zip(*alns))
+		self.verticalScrollBar().setValue(0)
+		self.update_scrollbar()
+		self.viewport().update()
+
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		self.update_scrollbar()
+
+	def changeEvent(self, event):
+		super().changeEvent(event)
+
+		if event.type() == QEvent.FontChange:
+			self.update_metrics()
+			self.update_scrollbar()
+
+	def scrollContentsBy(self, dx, dy):
+		self.viewport().update()
+
+	def paintEvent(self, event):
+		if not self.origin:
+			return
+
+		painter = QPainter(self.viewport())
+		text_color = self.palette().color(QPalette.Text).name()
+		num = self.get_row_columns()
+		offset = self.verticalScrollBar().value()
+		rect = event.rect()
+
+		#only rows and columns in the exposed area are drawn
+		first_row = (offset + rect.top()) // self.row_height
+		last_row = (offset + rect.bottom()) // self.row_height
+		first_col = rect.left() // self.cell_width
+		last_col = min(rect.right() // self.cell_width, num - 1)
+
+		for r in range(first_row, last_row+1):
+			y = r * self.row_height - offset
+
+			for c in range(first_col, last_col+1):
+				i = r * num + c
+
+				if i >= len(self.origin):
+					break
+
+				ob = self.origin[i]
+				pb = self.perfect[i]
+
+				if ob == pb:
+					mtype, align = ' ', '|'
+				elif ob == '-':
+					mtype, align = 'd', ' '
+				elif pb == '-':
+					mtype, align = 'i', ' '
+				else:
+					mtype, align = 's', ' '
+
+				x = c * self.cell_width
+				h = self.line_height
+				painter.drawPixmap(x, y, self.get_glyph(mtype, text_color))
+				painter.drawPixmap(x, y+h, self.get_glyph(ob, self.get_color(ob, text_color)))
+				painter.drawPixmap(x, y+h*2, self.get_glyph(align, text_color))
+				painter.drawPixmap(x, y+h*3, self.get_glyph(pb, self.get_color(pb, text_color)))
+
+		painter.end()
+
+	def get_color(self, base, default):
+		color = self.base_colors.get(base)
+		return color.name() if color else default
 
 	def mark_alignment(self, findex, issr):
 		sql = "SELECT * FROM fastx WHERE id=? LIMIT 1"
 		fastx = DB.get_object(sql, (findex,))
-
-		if fastx.format == 'fasta':
-			fastx_file = pyfastx.Fasta(fastx.fpath, uppercase=True)
-		else:
-			fastx_file = pyfastx.Fastq(fastx.fpath)
+		fastx_file = get_fastx_handle(fastx.fpath, fastx.format)
 
 		left = fastx_file[issr.chrom][issr.start-1:issr.sstart-1].seq
 		seq = fastx_file[issr.chrom][issr.sstart-1:issr.send].seq
@@ -269,16 +162,11 @@ class KraitAlignmentViewer(QTextBrowser):
 		self.target = (left, seq, right, issr.motif)
 		self.update_alignment()
 
-
-
-
-
-
-
 if __name__ == '__main__':
 	seq = "CCACTGAGGATGATC"
 	motif = "ATG"
-	mx = wrap_around_extend(seq, motif, -1)
+	aligner = KraitWrapAroundAligner()
+	mx = aligner.extend(seq[::-1], motif[::-1])
 
-	print_matrix(mx)
+	print_matrix(mx[:(len(seq)+1)*(len(motif)+1)], len(motif)+1)
 		
\ No newline at end of file
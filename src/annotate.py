@@ -1,9 +1,8 @@
 import json
 import gzip
-import pygros
 import pyfastx
 
-from utils import *
+from common import *
 
 __all__ = ['get_annotation_mapper']
 
@@ -71,6 +70,8 @@ class GTFReader(GXFReader):
 
 class GXFMapper:
 	def __init__(self, annot_file):
+		import pygros
+
 		self.annot_file = annot_file
 		self.feature_records = []
 		self.feature_mapping = {}
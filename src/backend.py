@@ -1,4 +1,6 @@
+import csv
 import apsw
+import itertools
 import threading
 
 __all__ = ['DB']
@@ -140,8 +142,61 @@ CREATE TABLE IF NOT EXISTS stats_{} (
 )
 """
 
+FINGERPRINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS fingerprint (
+	fid INTEGER,
+	task TEXT,
+	digest TEXT,
+	complete INTEGER,
+	PRIMARY KEY (fid, task)
+)
+"""
+
+CHECKPOINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+	fid INTEGER,
+	task TEXT,
+	chrom TEXT
+)
+"""
+
+RUN_METRICS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS run_metrics (
+	id INTEGER PRIMARY KEY,
+	run INTEGER,
+	task TEXT,
+	fid INTEGER,
+	chrom TEXT,
+	pid INTEGER,
+	start REAL,
+	stage TEXT,
+	seconds REAL,
+	rows INTEGER,
+	rss REAL
+)
+"""
+
+DICT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS dict_{} (
+	id INTEGER PRIMARY KEY,
+	name TEXT UNIQUE
+)
+"""
+
+PACKED_VIEW_SQL = """
+CREATE VIEW IF NOT EXISTS {0} AS SELECT {1} FROM packed_{0} AS t {2}
+"""
+
+PACKED_TRIGGER_SQL = """
+CREATE TRIGGER IF NOT EXISTS delete_{0} INSTEAD OF DELETE ON {0}
+BEGIN DELETE FROM packed_{0} WHERE id=OLD.id; END
+"""
+
 TABLE_SQL_MAPPING = {
 	'fastx': FASTX_TABLE_SQL,
+	'fingerprint': FINGERPRINT_TABLE_SQL,
+	'checkpoint': CHECKPOINT_TABLE_SQL,
+	'run_metrics': RUN_METRICS_TABLE_SQL,
 	'ssr': SSR_TABLE_SQL,
 	'gtr': GTR_TABLE_SQL,
 	'cssr': CSSR_TABLE_SQL,
@@ -152,6 +207,21 @@ TABLE_SQL_MAPPING = {
 	'stats': STATS_TABLE_SQL,
 }
 
+#repeat tables store strings as ids of dictionary tables, a view with
+#the same name presents the original column layout
+PACKED_TABLES = {
+	'ssr': {'chrom': 'chrom', 'motif': 'motif', 'smotif': 'motif'},
+	'issr': {'chrom': 'chrom', 'motif': 'motif', 'smotif': 'motif'},
+	'gtr': {'chrom': 'chrom', 'motif': 'motif'},
+	'cssr': {'chrom': 'chrom'},
+}
+
+#storage tables that are hidden behind views
+HIDDEN_TABLE_PREFIXES = ('packed_', 'dict_')
+
+#columns stored as dictionary encoded strings in columnar export
+COLUMNAR_DICT_FIELDS = {'chrom', 'motif', 'smotif'}
+
 class DataRow(dict):
 	def __getattr__(self, attr):
 		return self[attr]
@@ -160,11 +230,21 @@ def row_factory(cursor, row):
 	fields = [name for name, _ in cursor.getdescription()]
 	return DataRow(zip(fields, row))
 
+def get_table_columns(table):
+	lines = TABLE_SQL_MAPPING[table].strip().split('\n')[1:-1]
+	return [line.strip().strip(',').split(None, 1) for line in lines]
+
 class DataBackend:
 	conn = None
 	lock = threading.RLock()
 
 	def __init__(self):
+		#string to id mappings of dictionary tables
+		self.dicts = {}
+
+		#column encoders of result tables
+		self.packers = {}
+
 		self._connect_to_db()
 
 	def __del__(self):
@@ -187,6 +267,15 @@ class DataBackend:
 	def _optimize(self):
 		self.query("PRAGMA synchronous=OFF")
 		self.query(TABLE_SQL_MAPPING['fastx'])
+		self.query(TABLE_SQL_MAPPING['fingerprint'])
+		self.query(TABLE_SQL_MAPPING['checkpoint'])
+		self.query(TABLE_SQL_MAPPING['run_metrics'])
+
+		for name in ['chrom', 'motif']:
+			self.query(DICT_TABLE_SQL.format(name))
+
+		self.dicts = {}
+		self.packers = {}
 		self.begin()
 
 	#def _create_tables(self):
@@ -210,24 +299,104 @@ class DataBackend:
 		self.db_file = db_file
 
 	def create_table(self, table, idx):
-		sql = TABLE_SQL_MAPPING[table].format(idx)
-		self.cursor.execute(sql)
+		if table in PACKED_TABLES:
+			self.create_packed_table(table, idx)
+		else:
+			sql = TABLE_SQL_MAPPING[table].format(idx)
+			self.cursor.execute(sql)
+
+	def create_packed_table(self, table, idx):
+		name = "{}_{}".format(table, idx)
+		packs = PACKED_TABLES[table]
+
+		#results of old projects were saved in plain tables
+		sql = "SELECT 1 FROM sqlite_master WHERE type='table' AND name=? LIMIT 1"
+		if self.get_one(sql, (name,)):
+			self.query("DROP TABLE {}".format(name))
+
+		columns = []
+		fields = []
+		joins = []
+
+		for i, (field, ftype) in enumerate(get_table_columns(table)):
+			if field in packs:
+				columns.append("{} INTEGER".format(field))
+				fields.append("d{}.name AS {}".format(i, field))
+				joins.append("LEFT JOIN dict_{0} AS d{1} ON d{1}.id=t.{2}".format(
+					packs[field], i, field))
+			else:
+				columns.append("{} {}".format(field, ftype))
+				fields.append("t.{}".format(field))
+
+		self.query("CREATE TABLE IF NOT EXISTS packed_{} ({})".format(name, ','.join(columns)))
+		self.query(PACKED_VIEW_SQL.format(name, ','.join(fields), ' '.join(joins)))
+		self.query(PACKED_TRIGGER_SQL.format(name))
+		self.packers.pop(name, None)
+
+	def get_storage(self, table):
+		if self.table_exists("packed_{}".format(table)):
+			return "packed_{}".format(table)
+
+		return table
 
 	def drop_table(self, table, idx):
 		table = "{}_{}".format(table, idx)
 
 		if self.table_exists(table):
-			self.query("DELETE FROM {}".format(table))
+			self.query("DELETE FROM {}".format(self.get_storage(table)))
 
 	def drop_index(self, table, idx):
 		self.query("DROP INDEX IF EXISTS index_{}".format(idx))
 
 	def clear_table(self, table, idx):
-		self.query("DELETE FROM {}_{}".format(table, idx))
+		table = "{}_{}".format(table, idx)
+		self.query("DELETE FROM {}".format(self.get_storage(table)))
 
 	def insert_rows(self, sql, rows):
 		self.cursor.executemany(sql, rows)
 
+	def get_dict_id(self, name, value):
+		if name not in self.dicts:
+			sql = "SELECT name,id FROM dict_{}".format(name)
+			self.dicts[name] = {row[0]: row[1] for row in self.query(sql)}
+
+		mapping = self.dicts[name]
+
+		if value not in mapping:
+			self.query("INSERT INTO dict_{} VALUES (NULL,?)".format(name), (value,))
+			mapping[value] = self.conn.last_insert_rowid()
+
+		return mapping[value]
+
+	def get_packer(self, table):
+		if table not in self.packers:
+			storage = self.get_storage(table)
+			packs = PACKED_TABLES.get(table.split('_')[0], {})
+
+			if storage == table:
+				packs = {}
+
+			self.packers[table] = (
+				self.get_sql(storage),
+				[(i, packs[field]) for i, field in enumerate(self.get_field(storage)) if field in packs]
+			)
+
+		return self.packers[table]
+
+	def insert_records(self, table, rows):
+		#strings of repeat tables are replaced with dictionary ids
+		sql, packs = self.get_packer(table)
+
+		if packs:
+			rows = [list(row) for row in rows]
+
+			for row in rows:
+				for i, name in packs:
+					if row[i] is not None:
+						row[i] = self.get_dict_id(name, row[i])
+
+		self.insert_rows(sql, rows)
+
 	def update_rows(self, sql, rows):
 		self.cursor.executemany(sql, rows)
 
@@ -239,6 +408,34 @@ class DataBackend:
 		sql = "UPDATE fastx SET format=?,size=?,count=?,gc=?,ns=?,avglen=?,minlen=?,maxlen=? WHERE id=?"
 		self.query(sql, row)
 
+	def get_fingerprint(self, fid, task):
+		sql = "SELECT digest,complete FROM fingerprint WHERE fid=? AND task=?"
+		return self.get_row(sql, (fid, task))
+
+	def set_fingerprint(self, fid, task, digest, complete=0):
+		sql = "INSERT OR REPLACE INTO fingerprint VALUES (?,?,?,?)"
+		self.query(sql, (fid, task, digest, complete))
+
+	def add_checkpoint(self, fid, task, chrom):
+		sql = "INSERT INTO checkpoint VALUES (?,?,?)"
+		self.query(sql, (fid, task, chrom))
+
+	def get_checkpoints(self, fid, task):
+		sql = "SELECT chrom FROM checkpoint WHERE fid=? AND task=?"
+		return self.get_set(sql, (fid, task))
+
+	def clear_checkpoints(self, fid, task):
+		sql = "DELETE FROM checkpoint WHERE fid=? AND task=?"
+		self.query(sql, (fid, task))
+
+	def new_metrics_run(self):
+		run = self.get_one("SELECT MAX(run) FROM run_metrics")
+		return (run or 0) + 1
+
+	def add_run_metrics(self, rows):
+		sql = "INSERT INTO run_metrics VALUES (?,?,?,?,?,?,?,?,?,?,?)"
+		self.insert_rows(sql, rows)
+
 	def has_fastx(self):
 		sql = "SELECT 1 FROM fastx LIMIT 1"
 		res = self.get_one(sql)
@@ -256,8 +453,8 @@ class DataBackend:
 			return self.cursor.execute(sql, paras)
 
 	def table_exists(self, table):
-		sql = "SELECT 1 FROM sqlite_master WHERE type=? AND name=? LIMIT 1"
-		res = self.get_one(sql, ('table', table))
+		sql = "SELECT 1 FROM sqlite_master WHERE type IN ('table','view') AND name=? LIMIT 1"
+		res = self.get_one(sql, (table,))
 		return True if res else False
 
 	def get_one(self, sql, paras=None):
@@ -323,8 +520,8 @@ class DataBackend:
 		return sql
 
 	def get_tables(self):
-		sql = "SELECT name FROM sqlite_master WHERE type=?"
-		return self.get_column(sql, ('table',))
+		sql = "SELECT name FROM sqlite_master WHERE type IN ('table','view')"
+		return [name for name in self.get_column(sql) if not name.startswith(HIDDEN_TABLE_PREFIXES)]
 
 	def save_to_file(self, dbfile):
 		target = apsw.Connection(dbfile)
@@ -345,14 +542,130 @@ class DataBackend:
 	def changed(self):
 		return self.conn.changes() > 0
 
-	def export_to_file(self, table, out_file, out_format='csv'):
-		if out_format == 'tsv':
-			out_format = 'tabs'
+	def reader(self, db_file=None):
+		#open a read-only connection that can be used in other threads,
+		#in-memory database or uncommitted changes are only visible to
+		#the main connection, return None in this case
+		if db_file is None:
+			if self.db_file == ':memory:':
+				return None
+
+			if self.conn.txn_state() == apsw.SQLITE_TXN_WRITE:
+				return None
+
+			db_file = self.db_file
+
+		return apsw.Connection(db_file, flags=apsw.SQLITE_OPEN_READONLY)
+
+	def snapshot(self, db_file):
+		#copy of an in-memory database for read-only connections
+		with self.save_to_file(db_file) as backup:
+			backup.step(-1)
+
+	def export_to_file(self, table, out_file, out_format='csv', conn=None):
+		if conn is None:
+			conn = self.conn
+
+		if out_format == 'csv':
+			separator = ','
+		else:
+			separator = '\t'
+
+		if isinstance(out_file, str):
+			out_file = open(out_file, 'w', newline='')
+
+		with self.lock:
+			cur = conn.cursor()
+
+		fields = [row[1] for row in cur.execute("PRAGMA table_info({})".format(table))]
+
+		with out_file as fw:
+			writer = csv.writer(fw, delimiter=separator)
+			writer.writerow(fields)
+			writer.writerows(cur.execute("SELECT * FROM {}".format(table)))
+
+	def export_to_columnar(self, table, out_file, out_format='parquet', conn=None,
+							compress=None, batch_size=100000, callback=None):
+		#pyarrow is optional and only imported when columnar export is used
+		import pyarrow
+		import pyarrow.ipc
+		import pyarrow.parquet
+
+		if conn is None:
+			conn = self.conn
+
+		with self.lock:
+			cur = conn.cursor()
+
+		types = {'INTEGER': pyarrow.int64(), 'REAL': pyarrow.float64()}
+		dict_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+		fields = []
+		dicts = {}
+
+		for row in cur.execute("PRAGMA table_info({})".format(table)):
+			if row[1] in COLUMNAR_DICT_FIELDS:
+				fields.append(pyarrow.field(row[1], dict_type))
+				dicts[row[1]] = [{}, pyarrow.array([], pyarrow.string())]
+			else:
+				fields.append(pyarrow.field(row[1], types.get(row[2], pyarrow.string())))
+
+		schema = pyarrow.schema(fields)
+
+		if out_format == 'parquet':
+			writer = pyarrow.parquet.ParquetWriter(out_file, schema,
+				compression = compress or 'snappy'
+			)
+		else:
+			if compress not in (None, 'zstd'):
+				raise ValueError("{} compression is not supported by Arrow files".format(compress))
+
+			options = pyarrow.ipc.IpcWriteOptions(
+				compression = compress,
+				emit_dictionary_deltas = True
+			)
+			writer = pyarrow.ipc.new_file(out_file, schema, options=options)
+
+		cur.execute("SELECT * FROM {}".format(table))
+
+		with writer:
+			while True:
+				rows = list(itertools.islice(cur, batch_size))
+
+				if not rows:
+					break
+
+				arrays = []
+				for field, values in zip(fields, zip(*rows)):
+					if field.name in dicts:
+						#keep one growing dictionary per column across batches,
+						#only values first seen in this batch are converted
+						mapping, dictionary = dicts[field.name]
+						indices = []
+						added = []
+
+						for v in values:
+							i = mapping.get(v)
+
+							if i is None:
+								i = mapping[v] = len(mapping)
+								added.append(v)
+
+							indices.append(i)
+
+						if added:
+							dictionary = pyarrow.concat_arrays([dictionary,
+								pyarrow.array(added, pyarrow.string())])
+							dicts[field.name][1] = dictionary
+
+						arrays.append(pyarrow.DictionaryArray.from_arrays(
+							pyarrow.array(indices, pyarrow.int32()), dictionary
+						))
+					else:
+						arrays.append(pyarrow.array(values, field.type))
+
+				writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
 
-		with open(out_file, 'w') as fw:
-			shell = apsw.Shell(stdout=fw, db=self.conn)
-			shell.process_command(".mode {}".format(out_format))
-			shell.process_command(".headers on")
-			shell.process_complete_line("SELECT * FROM {}".format(table))
+				if callback:
+					callback(len(rows))
 
 DB = DataBackend()
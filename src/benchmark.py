@@ -0,0 +1,424 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import multiprocessing
+
+#throughput benchmark of every pipeline stage on synthetic inputs,
+#e.g. python benchmark.py -s small medium -w 4 -o benchmark.json
+#the pool is shut down after each stage, so every stage pays for
+#spawning cold workers, use --warm to keep workers between stages
+
+#number of contigs and contig size for each scale
+KRAIT_BENCHMARK_SCALES = {
+	'tiny': (4, 250000),
+	'small': (10, 1000000),
+	'medium': (20, 5000000),
+	'large': (40, 25000000),
+}
+
+KRAIT_BENCHMARK_STAGES = ['ssr', 'cssr', 'issr', 'gtr', 'mapping',
+	'primer', 'statistics', 'export', 'save']
+
+BASES = bytes.maketrans(bytes(range(256)), b'ACGT'*64)
+
+class KraitSyntheticGenome:
+	def __init__(self, contigs, chrom_size, density=200, seed=1):
+		self.contigs = contigs
+		self.chrom_size = chrom_size
+		self.density = density
+		self.rng = random.Random(seed)
+
+	def random_bases(self, size):
+		return self.rng.randbytes(size).translate(BASES).decode()
+
+	def random_motif(self, smin, smax):
+		return self.random_bases(self.rng.randint(smin, smax))
+
+	def ssr(self):
+		motif = self.random_motif(1, 6)
+		return motif * self.rng.randint([0, 12, 7, 5, 4, 4, 4][len(motif)], 20)
+
+	def issr(self):
+		seq = list(self.random_motif(2, 6) * self.rng.randint(6, 12))
+
+		#a point mutation in the middle of a long repeat
+		i = len(seq)//2
+		seq[i] = 'ACGT'[('ACGT'.index(seq[i])+1)%4]
+		return ''.join(seq)
+
+	def cssr(self):
+		return self.ssr() + self.random_bases(self.rng.randint(1, 10)) + self.ssr()
+
+	def gtr(self):
+		return self.random_motif(7, 30) * self.rng.randint(3, 5)
+
+	def repeat(self):
+		return self.rng.choice([self.ssr, self.ssr, self.issr, self.cssr, self.gtr])()
+
+	def sequence(self):
+		count = max(int(self.chrom_size/1000000*self.density), 1)
+		step = self.chrom_size // count
+		parts = []
+
+		for i in range(count):
+			rep = self.repeat()
+			parts.append(self.random_bases(max(step - len(rep), 0)))
+			parts.append(rep)
+
+		return ''.join(parts)[:self.chrom_size]
+
+	def write_fasta(self, fasta_file, line_len=60):
+		self.sequences = []
+
+		with open(fasta_file, 'w') as fw:
+			for i in range(self.contigs):
+				name = "chr{}".format(i+1)
+				seq = self.sequence()
+				self.sequences.append((name, len(seq)))
+				fw.write(">{} synthetic\n".format(name))
+
+				for j in range(0, len(seq), line_len):
+					fw.write(seq[j:j+line_len])
+					fw.write('\n')
+
+	def write_fastq(self, fasta_file, fastq_file, reads, read_len=150):
+		import pyfastx
+		fa = pyfastx.Fasta(fasta_file, build_index=False)
+		seqs = [seq for _, seq in fa]
+		qual = 'I' * read_len
+
+		with open(fastq_file, 'w') as fw:
+			for i in range(reads):
+				seq = self.rng.choice(seqs)
+				start = self.rng.randint(0, max(len(seq) - read_len, 0))
+				fw.write("@read{}\n{}\n+\n{}\n".format(i+1, seq[start:start+read_len], qual))
+
+	def write_gff(self, gff_file, gene_step=20000):
+		with open(gff_file, 'w') as fw:
+			fw.write("##gff-version 3\n")
+			n = 0
+
+			for name, size in self.sequences:
+				for start in range(1, size - gene_step, gene_step):
+					n += 1
+					strand = self.rng.choice('+-')
+					end = start + self.rng.randint(gene_step//4, gene_step//2)
+					gene = "gene{}".format(n)
+					mrna = "rna{}".format(n)
+					fw.write("{}\tKrait\tgene\t{}\t{}\t.\t{}\t.\tID={};Name={}\n".format(name, start, end, strand, gene, gene))
+					fw.write("{}\tKrait\tmRNA\t{}\t{}\t.\t{}\t.\tID={};Parent={}\n".format(name, start, end, strand, mrna, gene))
+
+					#three exons with coding regions inside
+					exon_len = (end - start + 1)//5
+					for k in range(3):
+						es = start + k * exon_len * 2
+						ee = es + exon_len - 1
+						fw.write("{}\tKrait\texon\t{}\t{}\t.\t{}\t.\tID=exon{}-{};Parent={}\n".format(name, es, ee, strand, n, k+1, mrna))
+
+						if k == 0:
+							fw.write("{}\tKrait\tfive_prime_UTR\t{}\t{}\t.\t{}\t.\tID=utr{}-5;Parent={}\n".format(name, es, es+99, strand, n, mrna))
+							es += 100
+
+						fw.write("{}\tKrait\tCDS\t{}\t{}\t.\t{}\t0\tID=cds{}-{};Parent={}\n".format(name, es, ee, strand, n, k+1, mrna))
+
+class KraitMemorySampler(threading.Thread):
+	#ru_maxrss is a lifetime peak, so the memory of this process and
+	#pool workers is sampled while a stage is running
+	interval = 0.05
+
+	def __init__(self):
+		super().__init__(daemon=True)
+		self.peak = None
+		self.stopped = threading.Event()
+
+	def sample(self):
+		rss = [get_process_rss(pid) for pid in [os.getpid()] + POOL.get_pids()]
+		rss = [r for r in rss if r is not None]
+
+		if rss:
+			self.peak = max(self.peak or 0, sum(rss))
+
+	def run(self):
+		while True:
+			self.sample()
+
+			if self.stopped.wait(self.interval):
+				break
+
+	def finish(self):
+		self.stopped.set()
+		self.join()
+		self.sample()
+
+		if self.peak is None:
+			return None
+
+		return round(self.peak/1048576, 2)
+
+class KraitBenchmarkTable:
+	#stand-in for the main window when exporting a table
+	def __init__(self, table, index):
+		self.table = table
+		self.current_file = index
+
+	def get_current_table(self):
+		return self.table
+
+class KraitBenchmark:
+	def __init__(self, args, work_dir):
+		self.args = args
+		self.work_dir = work_dir
+		self.out_dir = os.path.join(work_dir, 'output')
+		os.makedirs(self.out_dir, exist_ok=True)
+
+	def count_rows(self, prefix):
+		count = 0
+
+		for fid in DB.get_column("SELECT id FROM fastx"):
+			table = "{}_{}".format(prefix, fid)
+
+			if DB.table_exists(table):
+				count += DB.get_count(table)
+
+		return count
+
+	def run_worker(self, worker):
+		errors = []
+		worker.signals.failure.connect(errors.append)
+		worker.run()
+
+		if hasattr(worker, 'fastx_failed'):
+			for fid in worker.fastx_failed:
+				errors.append(DB.get_one("SELECT message FROM fastx WHERE id=?", (fid,)))
+
+		return errors
+
+	def stage_search(self, worker_class):
+		return self.run_worker(worker_class())
+
+	def stage_primer(self):
+		fid = DB.get_one("SELECT id FROM fastx WHERE format='fasta' LIMIT 1")
+		sql = "SELECT * FROM ssr_{} LIMIT ?".format(fid)
+		rows = DB.get_rows(sql, (self.args.primer_loci,))
+		batches = iter([rows[i:i+100] for i in range(0, len(rows), 100)])
+		return self.run_worker(KraitPrimerDesignWorker(fid, len(rows), batches, 'ssr'))
+
+	def stage_export(self):
+		errors = []
+
+		for fid in DB.get_column("SELECT id FROM fastx"):
+			for rtype in ['ssr', 'cssr', 'issr', 'gtr']:
+				table = "{}_{}".format(rtype, fid)
+
+				if not DB.table_exists(table):
+					continue
+
+				for ext in ['tsv', 'gff']:
+					out_file = os.path.join(self.out_dir, "{}.{}".format(table, ext))
+					parent = KraitBenchmarkTable(table, fid)
+					errors.extend(self.run_worker(KraitExportCurrentTableWorker(parent, out_file)))
+
+		return errors
+
+	def stage_save(self):
+		save_file = os.path.join(self.out_dir, 'benchmark.kpf')
+
+		errors = self.run_worker(KraitSaveWorker(None, save_file))
+		DB.begin()
+		return errors
+
+	def run_stage(self, stage):
+		stages = {
+			'ssr': lambda: self.stage_search(KraitSSRSearchWorker),
+			'cssr': lambda: self.stage_search(KraitCSSRSearchWorker),
+			'issr': lambda: self.stage_search(KraitISSRSearchWorker),
+			'gtr': lambda: self.stage_search(KraitGTRSearchWorker),
+			'mapping': lambda: self.stage_search(KraitMappingWorker),
+			'primer': self.stage_primer,
+			'statistics': lambda: self.stage_search(KraitStatisticsWorker),
+			'export': self.stage_export,
+			'save': self.stage_save
+		}
+
+		tables = {
+			'mapping': 'map',
+			'statistics': 'stats'
+		}
+
+		sampler = KraitMemorySampler()
+		sampler.start()
+
+		start = time.perf_counter()
+		errors = stages[stage]()
+		elapsed = time.perf_counter() - start
+
+		peak_rss = sampler.finish()
+
+		if not self.args.warm:
+			POOL.shutdown()
+
+		result = {
+			'stage': stage,
+			'seconds': round(elapsed, 4),
+			'peak_rss_mb': peak_rss,
+			'errors': [e for e in errors if e]
+		}
+
+		if stage in ('ssr', 'cssr', 'issr', 'gtr', 'mapping'):
+			bases = DB.get_one("SELECT SUM(size) FROM fastx") or 0
+			result['bases'] = bases
+			result['bases_per_second'] = round(bases/elapsed, 2) if elapsed else None
+
+		if stage in ('export', 'save'):
+			files = [os.path.join(self.out_dir, f) for f in os.listdir(self.out_dir)]
+			files = [f for f in files if f.endswith('.kpf') == (stage == 'save')]
+			result['bytes'] = sum(os.path.getsize(f) for f in files)
+
+		else:
+			rows = self.count_rows(tables.get(stage, stage))
+			result['rows'] = rows
+			result['rows_per_second'] = round(rows/elapsed, 2) if elapsed else None
+
+		return result
+
+	def prepare(self, scale):
+		contigs, chrom_size = KRAIT_BENCHMARK_SCALES[scale]
+		contigs = self.args.contigs or contigs
+		chrom_size = self.args.chrom_size or chrom_size
+
+		genome = KraitSyntheticGenome(contigs, chrom_size, self.args.density, self.args.seed)
+		fasta_file = os.path.join(self.work_dir, "{}.fa".format(scale))
+		fastq_file = os.path.join(self.work_dir, "{}.fq".format(scale))
+		gff_file = os.path.join(self.work_dir, "{}.gff".format(scale))
+
+		start = time.perf_counter()
+		genome.write_fasta(fasta_file)
+		genome.write_gff(gff_file)
+
+		reads = self.args.reads
+		if reads is None:
+			reads = contigs * chrom_size // 1500
+
+		if reads:
+			genome.write_fastq(fasta_file, fastq_file, reads, self.args.read_length)
+
+		#a fresh in memory project and output for each scale
+		DB.change_db(':memory:')
+		shutil.rmtree(self.out_dir, ignore_errors=True)
+		os.makedirs(self.out_dir)
+		sql = "INSERT INTO fastx (name, fpath, status, bytes, apath) VALUES (?,?,?,?,?)"
+		DB.query(sql, (scale, fasta_file, 4, get_file_size(fasta_file), gff_file))
+
+		if reads:
+			DB.query(sql, (scale+'_reads', fastq_file, 4, get_file_size(fastq_file), None))
+
+		return {
+			'scale': scale,
+			'contigs': contigs,
+			'chrom_size': chrom_size,
+			'density': self.args.density,
+			'reads': reads,
+			'generate_seconds': round(time.perf_counter() - start, 4),
+		}
+
+	def run(self):
+		results = []
+
+		#spawn all workers before the first stage is timed
+		if self.args.warm:
+			POOL.resize(self.args.workers)
+			POOL.warm()
+
+		for scale in self.args.scales:
+			result = self.prepare(scale)
+			result['stages'] = []
+
+			for stage in self.args.stages:
+				result['stages'].append(self.run_stage(stage))
+				print("{}\t{}\t{}s".format(scale, stage, result['stages'][-1]['seconds']))
+
+			results.append(result)
+
+		return results
+
+def parse_args():
+	parser = argparse.ArgumentParser(description="Benchmark Krait pipeline stages on synthetic genomes")
+	parser.add_argument('-s', '--scales', nargs='+', default=['tiny'], choices=list(KRAIT_BENCHMARK_SCALES))
+	parser.add_argument('-t', '--stages', nargs='+', default=KRAIT_BENCHMARK_STAGES, choices=KRAIT_BENCHMARK_STAGES)
+	parser.add_argument('-c', '--contigs', type=int, help="override contig count of scales")
+	parser.add_argument('-l', '--chrom-size', type=int, help="override contig size of scales")
+	parser.add_argument('-d', '--density', type=float, default=200, help="inserted repeats per Mb")
+	parser.add_argument('-r', '--reads', type=int, help="number of fastq reads, 0 for none")
+	parser.add_argument('--read-length', type=int, default=150)
+	parser.add_argument('--primer-loci', type=int, default=200)
+	parser.add_argument('--seed', type=int, default=1)
+	parser.add_argument('-w', '--workers', type=int, default=1, help="number of worker processes")
+	parser.add_argument('--warm', action='store_true', help="keep warm workers between stages instead of spawning them for each stage")
+	parser.add_argument('--keep', help="directory to keep generated inputs and outputs")
+	parser.add_argument('-o', '--output', default='benchmark.json')
+	return parser.parse_args()
+
+if __name__ == '__main__':
+	multiprocessing.freeze_support()
+	args = parse_args()
+
+	from PySide6.QtCore import QCoreApplication, QSettings
+
+	from main import load_resources
+
+	app = QCoreApplication(sys.argv)
+	load_resources()
+	QCoreApplication.setOrganizationName("DuLab")
+	QCoreApplication.setApplicationName("KraitBenchmark")
+
+	#keep user settings untouched, defaults are used except workers
+	settings_dir = tempfile.mkdtemp()
+	QSettings.setDefaultFormat(QSettings.IniFormat)
+	QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, settings_dir)
+	QSettings().setValue('RUN/workers', args.workers)
+
+	from utils import *
+	from common import *
+	from config import *
+	from backend import *
+	from process import *
+	from workers import *
+
+	if args.keep:
+		os.makedirs(args.keep, exist_ok=True)
+		work_dir = args.keep
+	else:
+		work_dir = tempfile.mkdtemp()
+
+	try:
+		results = KraitBenchmark(args, work_dir).run()
+
+	finally:
+		POOL.shutdown()
+		shutil.rmtree(settings_dir, ignore_errors=True)
+
+		if not args.keep:
+			shutil.rmtree(work_dir, ignore_errors=True)
+
+	report = {
+		'version': KRAIT_VERSION,
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'cpus': os.cpu_count(),
+		'workers': args.workers,
+		'warm': args.warm,
+		'seed': args.seed,
+		'results': results
+	}
+
+	with open(args.output, 'w') as fw:
+		json.dump(report, fw, indent=4)
+
+	print("Benchmark results were written to {}".format(args.output))
@@ -0,0 +1,495 @@
+import os
+import sys
+import glob
+import gzip
+import zlib
+import struct
+import hashlib
+import pyfastx
+import itertools
+import threading
+import collections
+import concurrent.futures
+
+try:
+	import psutil
+except ImportError:
+	psutil = None
+
+#helpers shared with the worker processes, keep this module free of
+#qt and database imports so that spawned children start quickly
+
+__all__ = ['AttrDict', 'check_fastx_format', 'get_annotation_format',
+			'get_cache_dir', 'get_index_file', 'get_fastx_handle', 'FASTX_CACHE',
+			'is_bgzf', 'KraitBGZFReader', 'get_process_rss', 'get_memory_usage',
+			'KraitWrapAroundAligner', 'alignment_cigar']
+
+class AttrDict(dict):
+	def __getattr__(self, attr):
+		return self[attr]
+
+def check_fastx_format(fastx):
+	if pyfastx.gzip_check(fastx):
+		fp = gzip.open(fastx, 'rt')
+	else:
+		fp = open(fastx)
+
+	with fp:
+		for line in fp:
+			line = line.strip()
+
+			if not line:
+				continue
+
+			if line[0] == '>':
+				return 'fasta'
+			elif line[0] == '@':
+				return 'fastq'
+			else:
+				return None
+
+#gff or gtf file validation
+def get_annotation_format(annot_file):
+	if pyfastx.gzip_check(annot_file):
+		handler = gzip.open(annot_file, 'rt')
+
+	else:
+		handler = open(annot_file)
+
+	with handler as fh:
+		for line in fh:
+			if line[0] == '#':
+				continue
+
+			cols = line.strip().split('\t')
+
+			if len(cols) != 9:
+				raise Exception("the annotation file is not GFF or GTF formatted file")
+
+			#attr = cols[8].split(';')[0]
+
+			if 'gene_id "' in cols[8] or 'transcript_id "' in cols[8]:
+				return 'gtf'
+
+			elif '=' in cols[8].split(';')[0]:
+				return 'gff'
+
+			else:
+				raise Exception("the annotation file is not GFF or GTF formatted file")
+
+def get_cache_dir(name='index'):
+	if sys.platform == 'win32':
+		base_dir = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+	elif sys.platform == 'darwin':
+		base_dir = os.path.expanduser('~/Library/Caches')
+	else:
+		base_dir = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+
+	cache_dir = os.path.join(base_dir, 'Krait', name)
+	os.makedirs(cache_dir, exist_ok=True)
+	return cache_dir
+
+#index files are kept in cache directory instead of beside the input,
+#named by input path and stamped with size and mtime of the input
+def get_index_file(fpath):
+	fpath = os.path.abspath(fpath)
+	stat = os.stat(fpath)
+	name = hashlib.sha1(fpath.encode()).hexdigest()[:16]
+	stamp = hashlib.sha1("{}:{}".format(stat.st_size, stat.st_mtime_ns).encode()).hexdigest()[:8]
+
+	cache_dir = get_cache_dir()
+	index_file = os.path.join(cache_dir, "{}-{}.fxi".format(name, stamp))
+
+	#remove stale indexes of the modified input
+	if not os.path.exists(index_file):
+		for stale in glob.glob(os.path.join(cache_dir, "{}-*.fxi".format(name))):
+			try:
+				os.remove(stale)
+			except OSError:
+				pass
+
+	return index_file
+
+#opened fasta/q handles shared in a process, least recently used
+#handles are closed when more than maxsize files are opened
+class KraitFastxCache:
+	def __init__(self, maxsize=16):
+		self.maxsize = maxsize
+		self.handles = collections.OrderedDict()
+		self.lock = threading.RLock()
+
+	def get(self, fpath, fastx_format=None, full_index=False):
+		with self.lock:
+			#modified input gets a new index file and thus a new handle
+			index_file = get_index_file(fpath)
+
+			if index_file in self.handles:
+				self.handles.move_to_end(index_file)
+				return self.handles[index_file]
+
+			if fastx_format is None:
+				fastx_format = check_fastx_format(fpath)
+
+			if fastx_format == 'fasta':
+				fx = pyfastx.Fasta(fpath, uppercase=True, full_index=full_index, index_file=index_file)
+			elif fastx_format == 'fastq':
+				fx = pyfastx.Fastq(fpath, full_index=full_index, index_file=index_file)
+			else:
+				raise Exception("the file format is not fasta or fastq")
+
+			self.handles[index_file] = fx
+
+			while len(self.handles) > self.maxsize:
+				self.handles.popitem(last=False)
+
+			return fx
+
+	def clear(self):
+		with self.lock:
+			self.handles.clear()
+
+FASTX_CACHE = KraitFastxCache()
+
+def get_fastx_handle(fpath, fastx_format=None, full_index=False):
+	return FASTX_CACHE.get(fpath, fastx_format, full_index)
+
+def is_bgzf(fpath):
+	with open(fpath, 'rb') as fh:
+		header = fh.read(18)
+
+	return len(header) == 18 and header[:4] == b'\x1f\x8b\x08\x04' \
+		and header[10:16] == b'\x06\x00BC\x02\x00'
+
+def inflate_blocks(blocks):
+	return b''.join(zlib.decompress(block, -15) for block in blocks)
+
+#read fasta/q records from a bgzip compressed file, blocks are inflated
+#by a thread pool in batches and then parsed in the original order
+class KraitBGZFReader:
+	def __init__(self, fpath, fastx_format='fasta', threads=1, batch=64):
+		self.fpath = fpath
+		self.format = fastx_format
+		self.threads = max(threads, 1)
+		self.batch = batch
+
+	def __iter__(self):
+		if self.format == 'fastq':
+			return self.fastq_records()
+		else:
+			return self.fasta_records()
+
+	def blocks(self):
+		with open(self.fpath, 'rb') as fh:
+			batch = []
+
+			while True:
+				header = fh.read(18)
+
+				if len(header) < 18:
+					break
+
+				bsize = struct.unpack('<H', header[16:18])[0]
+
+				#skip crc32 and isize at the end of block
+				batch.append(fh.read(bsize - 25))
+				fh.seek(8, 1)
+
+				if len(batch) == self.batch:
+					yield batch
+					batch = []
+
+			if batch:
+				yield batch
+
+	def chunks(self):
+		executor = concurrent.futures.ThreadPoolExecutor(self.threads)
+		futures = collections.deque()
+
+		try:
+			for batch in self.blocks():
+				futures.append(executor.submit(inflate_blocks, batch))
+
+				if len(futures) > self.threads * 2:
+					yield futures.popleft().result()
+
+			while futures:
+				yield futures.popleft().result()
+
+		finally:
+			executor.shutdown(wait=True, cancel_futures=True)
+
+	def fasta_record(self, record):
+		i = record.find(b'\n')
+
+		if i < 0:
+			i = len(record)
+
+		header = record[1:i].split(None, 1)
+		name = header[0].decode() if header else ''
+		seq = bytes(record[i+1:]).translate(None, b'\r\n').upper().decode()
+		return name, seq
+
+	def fasta_records(self):
+		record = bytearray()
+
+		for data in self.chunks():
+			start = 0
+
+			if data[:1] == b'>' and record.endswith(b'\n'):
+				yield self.fasta_record(record)
+				record = bytearray()
+
+			while True:
+				i = data.find(b'\n>', start)
+
+				if i < 0:
+					record += data[start:]
+					break
+
+				record += data[start:i+1]
+
+				if record[:1] == b'>':
+					yield self.fasta_record(record)
+
+				record = bytearray()
+				start = i + 1
+
+		if record[:1] == b'>':
+			yield self.fasta_record(record)
+
+	def fastq_records(self):
+		rest = b''
+		lines = []
+
+		for data in self.chunks():
+			data = rest + data
+			end = data.rfind(b'\n') + 1
+			rest = data[end:]
+			lines.extend(data[:end].splitlines())
+
+			n = len(lines) - len(lines) % 4
+			for i in range(0, n, 4):
+				name = lines[i][1:].split(None, 1)[0].decode()
+				yield name, lines[i+1].decode(), lines[i+3].decode()
+
+			lines = lines[n:]
+
+		if rest:
+			lines.append(rest)
+
+		if len(lines) >= 4:
+			yield lines[0][1:].split(None, 1)[0].decode(), lines[1].decode(), lines[3].decode()
+
+#peak resident memory of current process in MB
+def get_process_rss(pid):
+	#current resident memory in bytes, None if it is not available
+	try:
+		with open("/proc/{}/status".format(pid)) as fh:
+			for line in fh:
+				if line.startswith('VmRSS:'):
+					return int(line.split()[1]) * 1024
+	except OSError:
+		pass
+
+	if psutil is not None:
+		try:
+			return psutil.Process(pid).memory_info().rss
+		except psutil.Error:
+			pass
+
+	return None
+
+def get_memory_usage():
+	#current memory in MB, pool workers are long-lived so the lifetime
+	#peak of ru_maxrss would not tell the memory of a stage
+	rss = get_process_rss(os.getpid())
+
+	if rss is None:
+		return None
+
+	return round(rss/1048576, 2)
+
+def alignment_cigar(origin, perfect):
+	#= match, X substitution, I insertion and D deletion
+	ops = []
+
+	for ob, pb in zip(origin, perfect):
+		if ob == pb:
+			ops.append('=')
+		elif ob == '-':
+			ops.append('D')
+		elif pb == '-':
+			ops.append('I')
+		else:
+			ops.append('X')
+
+	return ''.join('{}{}'.format(len(list(g)), k) for k, g in itertools.groupby(ops))
+
+class KraitWrapAroundAligner:
+	def __init__(self):
+		#flat dp matrix reused by all alignments, row width is motif size + 1
+		self.matrix = []
+
+	def extend(self, s, ms):
+		n = len(s)
+		m = len(ms)
+		w = m + 1
+		size = (n + 1) * w
+		mx = self.matrix
+
+		if len(mx) < size:
+			mx.extend([0] * (size - len(mx)))
+
+		prev = list(range(w))
+		mx[0:w] = prev
+		js = range(2, w)
+		ks = range(2, m)
+		m0 = ms[0]
+
+		for i in range(1, n+1):
+			b = s[i-1]
+			row = [i] * w
+
+			c = b != m0
+			v = prev[0] + c
+			x = prev[m] + c
+			if x < v:
+				v = x
+			x = prev[1] + 1
+			row[1] = v if v < x else x
+
+			for j in js:
+				v = prev[j-1] + (b != ms[j-1])
+				x = row[j-1] + 1
+				if x < v:
+					v = x
+				x = prev[j] + 1
+				row[j] = v if v < x else x
+
+			x = row[m] + 1
+			if x < row[1]:
+				row[1] = x
+
+			for j in ks:
+				x = row[j-1] + 1
+				if x < row[j]:
+					row[j] = x
+
+			mx[i*w:i*w+w] = row
+			prev = row
+
+		return mx
+
+	def backtrace(self, s, ms):
+		mx = self.matrix
+		m = len(ms)
+		w = m + 1
+		i = len(s)
+		j = 0
+
+		#find minimum value
+		r = i * w
+		for idx in range(w):
+			if mx[r+idx] <= mx[r+j]:
+				j = idx
+
+		origin = []
+		perfect = []
+
+		while i > 0 or j > 0:
+			if j == 0:
+				origin.append(s[i-1])
+				perfect.append('-')
+				i -= 1
+
+			elif i == 0:
+				origin.append('-')
+				perfect.append(ms[j-1])
+				j -= 1
+
+			elif j == 1:
+				p = (i - 1) * w
+				v = min(mx[p], mx[p+m], mx[p+w], mx[p+1])
+
+				if v == mx[p+m]:
+					origin.append(s[i-1])
+					perfect.append(ms[j-1])
+					i -= 1
+					j = m
+				elif v == mx[p]:
+					origin.append(s[i-1])
+					perfect.append(ms[j-1])
+					i -= 1
+					j = 0
+				elif v == mx[p+1]:
+					origin.append(s[i-1])
+					perfect.append('-')
+					i -= 1
+				elif v == mx[p+w]:
+					origin.append('-')
+					perfect.append(ms[j-1])
+					j -= 1
+			else:
+				c = i * w + j
+				p = c - w
+				v = min(mx[p-1], mx[p], mx[c-1])
+
+				if v == mx[p-1] and v == mx[c]:
+					origin.append(s[i-1])
+					perfect.append(ms[j-1])
+					i -= 1
+					j -= 1
+
+				elif v == mx[c-1]:
+					origin.append('-')
+					perfect.append(ms[j-1])
+					j -= 1
+
+				elif v == mx[p-1]:
+					origin.append(s[i-1])
+					perfect.append(ms[j-1])
+					i -= 1
+					j -= 1
+
+				elif v == mx[p]:
+					origin.append(s[i-1])
+					perfect.append('-')
+					i -= 1
+
+		return origin, perfect
+
+	def align(self, s, ms, dr):
+		#left flank is aligned backward from the seed
+		if dr == -1:
+			s = s[::-1]
+			ms = ms[::-1]
+
+		self.extend(s, ms)
+		origin, perfect = self.backtrace(s, ms)
+
+		if dr == 1:
+			origin.reverse()
+			perfect.reverse()
+
+		return (''.join(origin), ''.join(perfect))
+
+	def align_repeat(self, left, seq, right, motif):
+		alns = []
+
+		if left:
+			alns.append(self.align(left, motif, -1))
+
+		alns.append((seq, seq))
+
+		if right:
+			alns.append(self.align(right, motif, 1))
+
+		return alns
+
+	def cigar(self, left, seq, right, motif):
+		origin, perfect = map(''.join, zip(*self.align_repeat(left, seq, right, motif)))
+		return alignment_cigar(origin, perfect)
+
+	def cigars(self, repeats):
+		for left, seq, right, motif in repeats:
+			yield self.cigar(left, seq, right, motif)
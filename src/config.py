@@ -1,12 +1,7 @@
+import os
 import sys
-import apsw
-import pytrf
-import pygros
-import primer3
-import pyfastx
-import PySide6
 
-__all__ = ['KRAIT_VERSION', 'KRAIT_BUILD', 'KRAIT_ABOUT',
+__all__ = ['KRAIT_VERSION', 'KRAIT_BUILD', 'get_krait_about',
 			'KRAIT_SEARCH_PARAMETERS', 'KRAIT_PRIMER_TAGS',
 			'KRAIT_PRIMER_COMMONS']
 
@@ -118,17 +113,29 @@ formatted DNA sequences. Krait2 can design primers and perform statistical analy
 		<td>
 	</tr>
 </table>
-""".format(
-	version = KRAIT_VERSION,
-	build = KRAIT_BUILD,
-	python = sys.version.split()[0],
-	pyside = PySide6.__version__,
-	pytrf = pytrf.__version__,
-	pyfastx = pyfastx.__version__,
-	pygros = pygros.__version__,
-	apsw = apsw.apswversion(),
-	primerpy = primer3.__version__
-)
+"""
+
+#library versions are only needed by the about dialog,
+#import them on demand rather than at startup
+def get_krait_about():
+	import apsw
+	import pytrf
+	import pygros
+	import primer3
+	import pyfastx
+	import PySide6
+
+	return KRAIT_ABOUT.format(
+		version = KRAIT_VERSION,
+		build = KRAIT_BUILD,
+		python = sys.version.split()[0],
+		pyside = PySide6.__version__,
+		pytrf = pytrf.__version__,
+		pyfastx = pyfastx.__version__,
+		pygros = pygros.__version__,
+		apsw = apsw.apswversion(),
+		primerpy = primer3.__version__
+	)
 
 #default parameter and type for krait
 KRAIT_SEARCH_PARAMETERS = {
@@ -153,7 +160,10 @@ KRAIT_SEARCH_PARAMETERS = {
 	'STR/level': (3, int),
 	'STR/flank': (50, int),
 	'STAT/unit': (0, int),
-	'STAT/unkown': (0, int)
+	'STAT/unkown': (0, int),
+	'RUN/workers': (os.cpu_count() or 1, int),
+	'RUN/metrics': (0, int),
+	'RUN/profile': (0, int)
 }
 
 #default parameter and type for primer3
@@ -2,6 +2,7 @@ from PySide6.QtGui import *
 from PySide6.QtCore import *
 from PySide6.QtWidgets import *
 
+from utils import *
 from config import *
 from motif import *
 
@@ -420,6 +421,27 @@ class KraitSearchParameterPanel(QWidget):
 		stats_layout.addWidget(QLabel("Ns"))
 		stats_layout.addWidget(self.ns_box, 1)
 
+		run_group = KraitGroupBox("Processes")
+		other_layout.addWidget(run_group)
+		run_layout = QHBoxLayout()
+		run_group.setLayout(run_layout)
+
+		self.worker_box = QSpinBox()
+		self.worker_box.setRange(1, 1024)
+
+		self.metrics_box = QComboBox()
+		self.metrics_box.addItems(["off", "on"])
+
+		self.profile_box = QComboBox()
+		self.profile_box.addItems(["off", "on"])
+
+		run_layout.addWidget(QLabel("Workers"))
+		run_layout.addWidget(self.worker_box, 1)
+		run_layout.addWidget(QLabel("Timing"))
+		run_layout.addWidget(self.metrics_box, 1)
+		run_layout.addWidget(QLabel("Profile"))
+		run_layout.addWidget(self.profile_box, 1)
+
 		main_layout = QVBoxLayout()
 		main_layout.setContentsMargins(1, 0, 1, 5)
 		main_layout.addWidget(ssr_group)
@@ -451,7 +473,10 @@ class KraitSearchParameterPanel(QWidget):
 			'STR/level': self.level_box,
 			'STR/flank': self.flank_box,
 			'STAT/unit': self.unit_box,
-			'STAT/unkown': self.ns_box
+			'STAT/unkown': self.ns_box,
+			'RUN/workers': self.worker_box,
+			'RUN/metrics': self.metrics_box,
+			'RUN/profile': self.profile_box
 		}
 
 		self.read_settings()
@@ -493,7 +518,10 @@ class KraitExportTablesDialog(QDialog):
 		self.table_select = QComboBox(self)
 		self.table_select.addItems(["Current sequence file", "All sequence files"])
 		self.format_select = QComboBox(self)
-		self.format_select.addItems(["CSV", "TSV"])
+		self.format_select.addItems(get_export_formats())
+		self.format_select.currentTextChanged.connect(self.on_format_changed)
+		self.compress_select = QComboBox(self)
+		self.compress_select.addItems(get_export_compressions())
 		self.button_box = QDialogButtonBox(QDialogButtonBox.Cancel | QDialogButtonBox.Ok)
 		self.button_box.accepted.connect(self.accept)
 		self.button_box.rejected.connect(self.reject)
@@ -502,24 +530,35 @@ class KraitExportTablesDialog(QDialog):
 		main_layout.addWidget(self.table_select)
 		main_layout.addWidget(QLabel("Export format:", self))
 		main_layout.addWidget(self.format_select)
+		main_layout.addWidget(QLabel("Compression:", self))
+		main_layout.addWidget(self.compress_select)
 		main_layout.addWidget(self.button_box)
 		self.setLayout(main_layout)
 
 	def sizeHint(self):
 		return QSize(300, 100)
 
+	@Slot(str)
+	def on_format_changed(self, fmt):
+		self.compress_select.clear()
+		self.compress_select.addItems(get_export_compressions(fmt))
+
 	@classmethod
 	def get_select(cls, parent):
 		dlg = cls(parent)
 
 		tab = None
 		fmt = None
+		cmp = None
 
 		if dlg.exec() == QDialog.Accepted:
 			tab = dlg.table_select.currentIndex()
 			fmt = dlg.format_select.currentText()
 
-		return (tab, fmt)
+			if dlg.compress_select.currentIndex() > 0:
+				cmp = dlg.compress_select.currentText()
+
+		return (tab, fmt, cmp)
 
 class KraitMotifStandardDialog(QDialog):
 	def __init__(self, parent=None):
@@ -1,31 +1,41 @@
 import os
 import sys
+import time
 import multiprocessing
 
-from PySide6.QtGui import *
-from PySide6.QtCore import *
-from PySide6.QtWidgets import *
+#measure cold start from the first statement
+KRAIT_START_TIME = time.perf_counter()
 
-import resources
-from window import *
-from config import *
+def load_resources():
+	from PySide6.QtCore import QResource
 
-class KraitApplication(QApplication):
-	osx_open_with = Signal(str)
+	#qt memory maps the compiled binary bundle instead of unpacking
+	#the generated python module, fall back to it for source runs
+	if getattr(sys, 'frozen', False):
+		base_dir = getattr(sys, '_MEIPASS', os.path.dirname(sys.executable))
+	else:
+		base_dir = os.path.dirname(os.path.abspath(__file__))
 
-	def __init__(self, argv):
-		super().__init__(argv)
+	rcc_file = os.path.join(base_dir, 'resources.rcc')
 
-	def event(self, event):
-		if sys.platform == 'darwin':
-			if isinstance(event, QFileOpenEvent):
-				self.osx_open_with.emit(event.file())
+	if os.path.isfile(rcc_file):
+		if QResource.registerResource(rcc_file):
+			return
 
-		return super().event(event)
+	import resources
 
 if __name__ == '__main__':
 	multiprocessing.freeze_support()
 
+	#spawned worker processes re-run this script without entering
+	#here, so the gui stack is only imported by the main process
+	from PySide6.QtGui import *
+	from PySide6.QtCore import *
+	from PySide6.QtWidgets import *
+
+	from window import *
+	from config import *
+
 	#fix taskbar icon display
 	if os.name == 'nt':
 		import ctypes
@@ -39,10 +49,16 @@ if __name__ == '__main__':
 	QSettings.setDefaultFormat(QSettings.IniFormat)
 
 	app = KraitApplication(sys.argv)
+	load_resources()
 	QFontDatabase.addApplicationFont(":/fonts/robotomono.ttf")
 	win = KraitMainWindow()
 	app.osx_open_with.connect(win.open_project)
 
+	#startup is complete when the event loop runs for the first time
+	QTimer.singleShot(0, lambda: win.record_startup_time(
+		time.perf_counter() - KRAIT_START_TIME
+	))
+
 	args = app.arguments()
 	if len(args) > 1:
 		if os.path.isfile(args[1]):
@@ -1,6 +1,14 @@
+import types
 import itertools
 
-__all__ = ['StandardMotif']
+__all__ = ['StandardMotif', 'get_standard_table']
+
+#complement of iupac codes, other letters are kept as they are
+IUPAC_COMPLEMENTS = str.maketrans('ATGCRYKMBVDHN', 'TACGYRMKVBHDN')
+
+#read-only lookup of standard motifs for each level, built lazily
+#in each process unless it is inherited from a forking parent
+STANDARD_MOTIF_TABLES = {}
 
 def is_motif(motif):
 	'''
@@ -61,8 +69,7 @@ def complete_motif(motif):
 	@para motif str
 	@return list
 	'''
-	codes = {'A': 'T', 'T': 'A', 'G': 'C', 'C': 'G'}
-	new_motif = "".join([ codes.get(base, base) for base in motif])
+	new_motif = motif.translate(IUPAC_COMPLEMENTS)
 	return similar_motif(new_motif)
 
 def reverse_complete_motif(motif):
@@ -81,50 +88,69 @@ def motif_to_number(motif):
 	return int("".join(sort_rule.get(a, '5') for a in motif.upper()))
 
 def motif_sorted(motifs):
-	return sorted(motifs, key=motif_to_number)
+	#iupac letters share the same number, ties are broken by letters
+	return sorted(motifs, key=lambda m: (motif_to_number(m), m))
 
-class StandardMotif:
-	_motifs = {}
+def standard_motif(motif, level):
+	motifs = []
 
-	def __init__(self, level=0):
-		self.level = level
+	if level >= 1:
+		motifs.extend(similar_motif(motif))
 
-	def setLevel(self, level=0):
-		self._motifs = {}
-		self.level = level
+	if level >= 2:
+		motifs.extend(reverse_complete_motif(motif))
 
-	def standard(self, motif):
-		if self.level == 0:
-			return motif
+	if level >= 3:
+		motifs.extend(complete_motif(motif))
+
+	if level >= 4:
+		motifs.extend(reverse_motif(motif))
 
-		if motif in self._motifs:
-			return self._motifs[motif]
+	#remove the same motifs and sort motifs as A>T>C>G
+	return motif_sorted(set(motifs))[0]
 
-		motifs = []
-		
-		if self.level >= 1:
-			motifs.extend(similar_motif(motif))
+def get_standard_table(level):
+	#all 1-6 bp motifs are standardized once per process
+	if level not in STANDARD_MOTIF_TABLES:
+		table = {}
 
-		if self.level >= 2:
-			motifs.extend(reverse_complete_motif(motif))
+		for i in range(1, 7):
+			for motif in itertools.product('ATCG', repeat=i):
+				motif = ''.join(motif)
+				table[motif] = standard_motif(motif, level)
 
-		if self.level >= 3:
-			motifs.extend(complete_motif(motif))
+		STANDARD_MOTIF_TABLES[level] = types.MappingProxyType(table)
 
-		if self.level >= 4:
-			motifs.extend(reverse_motif(motif))
+	return STANDARD_MOTIF_TABLES[level]
 
+class StandardMotif:
+	def __init__(self, level=0):
+		self.setLevel(level)
+
+	def setLevel(self, level=0):
+		self.level = level
+
+		if level:
+			self._motifs = get_standard_table(level)
+		else:
+			self._motifs = None
+
+		#motifs with iupac codes or longer than 6 bp
+		self._others = {}
+
+	def standard(self, motif):
+		if self.level == 0:
+			return motif
 
-		#remove the same motifs
-		motifs = list(set(motifs))
+		smotif = self._motifs.get(motif)
 
-		#sort motifs as A>T>C>G
-		motifs = motif_sorted(motifs)
+		if smotif is None:
+			smotif = self._others.get(motif)
 
-		for motif in motifs:
-			self._motifs[motif] = motifs[0]
+			if smotif is None:
+				smotif = self._others[motif] = standard_motif(motif, self.level)
 
-		return motifs[0]
+		return smotif
 
 	def mapping(self):
 		bases = ['A', 'T', 'C', 'G']
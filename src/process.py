@@ -1,14 +1,17 @@
 import os
 import sys
+import time
+import heapq
+import threading
 import traceback
+import itertools
 import multiprocessing
+import multiprocessing.connection
 
 import pytrf
-import primer3
 import pyfastx
-from PySide6.QtCore import *
 
-from utils import *
+from common import *
 from motif import *
 from stats import *
 from annotate import *
@@ -16,20 +19,285 @@ from annotate import *
 __all__ = ['KraitSSRSearchProcess', 'KraitCSSRSearchProcess',
 			'KraitISSRSearchProcess', 'KraitGTRSearchProcess',
 			'KraitPrimerDesignProcess', 'KraitMappingProcess',
-			'KraitStatisticsProcess']
+			'KraitStatisticsProcess', 'KraitAlignmentProcess', 'POOL']
 
-class KraitBaseProcess(multiprocessing.Process):
-	def __init__(self, params, queue, fastx={}):
-		super().__init__()
-		self.daemon = True
+def pool_worker_loop(conn, cancel_event):
+	while True:
+		try:
+			task = conn.recv()
+		except EOFError:
+			break
+
+		if task is None:
+			break
+
+		task.queue = conn
+		task.cancel_event = cancel_event
+		task.run()
+
+#a warm process that runs pool tasks one by one
+class KraitPoolWorker:
+	def __init__(self):
+		self.task = None
+		self.conn, child_conn = multiprocessing.Pipe()
+		self.cancel_event = multiprocessing.Event()
+		self.process = multiprocessing.Process(target=pool_worker_loop,
+			args=(child_conn, self.cancel_event), daemon=True)
+		self.process.start()
+		child_conn.close()
+
+	def submit(self, task):
+		self.task = task
+		self.cancel_event.clear()
+		self.conn.send(task)
+
+	def stop(self):
+		try:
+			self.conn.send(None)
+		except OSError:
+			pass
+
+	def kill(self):
+		self.process.terminate()
+		self.process.join()
+		self.conn.close()
+
+#long-lived worker processes reused across files and tasks, messages
+#sent by tasks are routed to the receiver given on submit by task id,
+#pending tasks are handed to idle workers in order of priority
+class KraitProcessPool:
+	#seconds a cancelled task has to stop before it is terminated
+	grace = 5
+
+	def __init__(self, size=None):
+		self.size = size or os.cpu_count() or 1
+		self.lock = threading.RLock()
+		self.counter = itertools.count(1)
+		self.pending = []
+		self.receivers = {}
+		self.workers = []
+		self.dispatcher = None
+
+	def start(self):
+		if self.dispatcher is None:
+			self.dispatcher = threading.Thread(target=self.receive, daemon=True)
+			self.dispatcher.start()
+
+	def resize(self, size):
+		with self.lock:
+			self.size = max(1, size)
+
+			for worker in self.workers[:]:
+				if len(self.workers) <= self.size:
+					break
+
+				if worker.task is None:
+					worker.stop()
+					self.workers.remove(worker)
+
+			self.dispatch()
+
+	def warm(self):
+		#spawn idle workers up to the pool size ahead of tasks
+		with self.lock:
+			self.start()
+
+			while len(self.workers) < self.size:
+				self.workers.append(KraitPoolWorker())
+
+	def submit(self, task, receiver, priority=0):
+		with self.lock:
+			self.start()
+			task.task_id = next(self.counter)
+			self.receivers[task.task_id] = receiver
+			heapq.heappush(self.pending, (-priority, task.task_id, task))
+			self.dispatch()
+
+		return task.task_id
+
+	def dispatch(self):
+		while self.pending:
+			for worker in self.workers:
+				if worker.task is None:
+					break
+			else:
+				if len(self.workers) >= self.size:
+					break
+
+				worker = KraitPoolWorker()
+				self.workers.append(worker)
+
+			worker.submit(heapq.heappop(self.pending)[2])
+
+	def release(self, task, message=None, cancelled=False):
+		receiver = self.receivers.pop(task.task_id, None)
+
+		if receiver is None:
+			return
+
+		if cancelled:
+			receiver.put({'type': 'cancelled', 'id': task.fastx.get('id', -1),
+				'task': task.task_id})
+
+		if message:
+			receiver.put({'type': 'error', 'id': task.fastx.get('id', -1),
+				'task': task.task_id, 'message': message})
+
+		receiver.put({'type': 'finish', 'id': task.fastx.get('id', -1),
+			'task': task.task_id})
+
+	def cancel(self, task_id):
+		with self.lock:
+			for item in self.pending:
+				if item[1] == task_id:
+					self.pending.remove(item)
+					heapq.heapify(self.pending)
+					self.release(item[2], cancelled=True)
+					return
+
+			#ask the running task to stop at its next checkpoint
+			for worker in self.workers:
+				if worker.task and worker.task.task_id == task_id:
+					worker.cancel_event.set()
+					timer = threading.Timer(self.grace, self.terminate, (task_id,))
+					timer.daemon = True
+					timer.start()
+					return
+
+	def terminate(self, task_id):
+		with self.lock:
+			for worker in self.workers:
+				if worker.task and worker.task.task_id == task_id:
+					self.workers.remove(worker)
+					worker.kill()
+					self.release(worker.task, cancelled=True)
+					self.dispatch()
+					return
+
+	def receive(self):
+		while True:
+			with self.lock:
+				conns = {worker.conn: worker for worker in self.workers}
+
+			if not conns:
+				time.sleep(0.05)
+				continue
+
+			#a worker killed by another thread may close its pipe meanwhile,
+			#take a new snapshot of workers in this case
+			try:
+				ready = multiprocessing.connection.wait(list(conns), 0.05)
+			except (OSError, ValueError):
+				continue
+
+			for conn in ready:
+				worker = conns[conn]
+
+				try:
+					data = conn.recv()
+				except (EOFError, OSError):
+					with self.lock:
+						if worker in self.workers:
+							self.workers.remove(worker)
+
+							if worker.task:
+								self.release(worker.task, "worker process exited unexpectedly")
+
+							self.dispatch()
+
+					continue
+
+				with self.lock:
+					receiver = self.receivers.get(data.get('task'))
+
+					if data['type'] == 'finish':
+						self.receivers.pop(data.get('task'), None)
+						worker.task = None
+						self.dispatch()
+
+				if receiver is not None:
+					receiver.put(data)
+
+	def get_pids(self):
+		with self.lock:
+			return [worker.process.pid for worker in self.workers]
+
+	def shutdown(self):
+		with self.lock:
+			self.pending.clear()
+
+			for worker in self.workers:
+				worker.stop()
+
+			for worker in self.workers:
+				worker.process.join(1)
+
+				if worker.process.is_alive():
+					worker.kill()
+
+			self.workers = []
+
+class KraitCancelled(Exception):
+	pass
+
+class KraitBaseProcess:
+	def __init__(self, params, fastx={}):
+		self.task_id = None
 		self.fastx = fastx
 		self.params = params
-		self.queue = queue
+		self.queue = None
+		self.cancel_event = None
 		self.progress = 0
 
+		#profile file path when the worker enables profiling
+		self.profile = None
+
+		#stage timings are collected when the worker enables it
+		self.metrics = None
+		self.metric_start = 0
+		self.lap_time = 0
+
+	def check_cancel(self):
+		if self.cancel_event is not None and self.cancel_event.is_set():
+			raise KraitCancelled()
+
+	def lap(self, stage):
+		#time since the last lap is accounted to the stage
+		if self.metrics is None:
+			return
+
+		now = time.perf_counter()
+		self.metrics[stage] = self.metrics.get(stage, 0) + now - self.lap_time
+		self.lap_time = now
+
+	def reset_metrics(self):
+		self.metrics = {}
+		self.metric_start = time.time()
+		self.lap_time = time.perf_counter()
+
 	def send(self, **kwargs):
 		kwargs['id'] = self.fastx.get('id', -1)
-		self.queue.put(kwargs)
+		kwargs['task'] = self.task_id
+		self.queue.send(kwargs)
+
+		if self.metrics is not None and 'records' in kwargs:
+			self.lap('ipc')
+			self.send_metrics(kwargs)
+
+	def send_metrics(self, data):
+		self.queue.send({
+			'type': 'metric',
+			'id': data['id'],
+			'task': data['task'],
+			'stage': data['type'],
+			'chrom': data.get('chrom'),
+			'pid': os.getpid(),
+			'start': self.metric_start,
+			'times': self.metrics,
+			'rows': len(data['records']),
+			'rss': get_memory_usage()
+		})
+		self.reset_metrics()
 
 	def finish(self):
 		self.send(type='finish')
@@ -50,43 +318,215 @@ class KraitBaseProcess(multiprocessing.Process):
 	def do(self):
 		pass
 
-	def run(self):
+	def complete(self):
+		pass
+
+	def execute(self):
 		try:
+			if self.metrics is not None:
+				self.reset_metrics()
+
 			self.prepare()
+			self.lap('prepare')
 			self.do()
+			self.complete()
 			self.success()
 
+		except KraitCancelled:
+			self.send(type='cancelled')
+
 		except:
 			errmsg = traceback.format_exc()
 			self.error(errmsg)
 
+	def run(self):
+		try:
+			if self.profile:
+				import cProfile
+				profiler = cProfile.Profile()
+				profiler.runcall(self.execute)
+
+				try:
+					profiler.dump_stats(self.profile)
+				except OSError:
+					traceback.print_exc()
+			else:
+				self.execute()
+
 		finally:
+			#profile must be written before the worker merges it
 			self.finish()
 
+#collect fastx metadata from the sequences read by search
+class KraitFastxStats:
+	def __init__(self, fastx_format):
+		self.format = fastx_format
+		self.count = 0
+		self.size = 0
+		self.minlen = 0
+		self.maxlen = 0
+		self.gc = 0
+		self.acgt = 0
+
+	def add(self, seq):
+		l = len(seq)
+		gc = seq.count('G') + seq.count('C')
+
+		if not self.count or l < self.minlen:
+			self.minlen = l
+
+		if l > self.maxlen:
+			self.maxlen = l
+
+		self.count += 1
+		self.size += l
+		self.gc += gc
+		self.acgt += gc + seq.count('A') + seq.count('T')
+
+	def records(self, fid):
+		gc_content = self.gc/self.acgt*100 if self.acgt else 0
+		avglen = round(self.size/self.count) if self.count else 0
+
+		return [self.format, self.size, self.count, round(gc_content, 2),
+			self.size - self.acgt, avglen, self.minlen, self.maxlen, fid]
 
 class KraitSearchProcess(KraitBaseProcess):
+	#search on record ranges of a large fasta in parallel
+	chunked = False
+
+	#sequences are read in order by do() so that the metadata
+	#can be collected in the same pass without building index
+	sequential = True
+
 	def prepare(self):
-		if self.fastx['size']:
+		if not self.fastx.get('format'):
+			self.fastx['format'] = check_fastx_format(self.fastx['fpath'])
+
+		if self.fastx['format'] not in ('fasta', 'fastq'):
+			raise Exception("the file format is not fasta or fastq")
+
+		if 'bgzf' not in self.fastx:
+			self.fastx['bgzf'] = is_bgzf(self.fastx['fpath'])
+
+		self.stats = None
+
+		if not self.fastx['size']:
+			if self.sequential and not self.splittable():
+				self.stats = KraitFastxStats(self.fastx['format'])
+			else:
+				self.build_index()
+
+		if self.chunked:
+			self.split()
+
+	def splittable(self):
+		if not self.chunked or 'chunk' in self.fastx:
+			return False
+
+		#bgzf files are inflated in parallel instead of random access
+		if self.fastx['format'] != 'fasta' or self.fastx['bgzf']:
+			return False
+
+		chunk_size = self.fastx.get('chunk_size')
+		return bool(chunk_size) and self.fastx['bytes'] > chunk_size
+
+	def get_progress(self, seq):
+		self.progress += len(seq)
+
+		#estimate progress by file bytes until the real size is known
+		if self.stats is None:
+			return self.progress/self.fastx['size']*self.fastx['weight']
+
+		if self.fastx['format'] == 'fastq':
+			p = self.progress*2/self.fastx['bytes']
+		else:
+			p = self.progress/self.fastx['bytes']
+
+		return min(p, 1)*self.fastx['weight']
+
+	def complete(self):
+		if self.stats is not None:
+			self.fastx['size'] = self.stats.size
+			self.send(type='fastx', records=self.stats.records(self.fastx['id']))
+
+	def split(self):
+		if not self.splittable():
+			return
+
+		chunk_size = self.fastx['chunk_size']
+
+		if self.fastx['size'] <= chunk_size:
 			return
 
-		fastx_format = check_fastx_format(self.fastx['fpath'])
+		fa = get_fastx_handle(self.fastx['fpath'], 'fasta')
+
+		chunks = []
+		start = 0
+		bases = 0
+		for i in range(len(fa)):
+			bases += len(fa[i])
+
+			if bases >= chunk_size:
+				chunks.append((start, i+1, bases))
+				start = i + 1
+				bases = 0
+
+		if bases:
+			chunks.append((start, len(fa), bases))
+
+		if len(chunks) < 2:
+			return
+
+		#this task keeps the first range, the others are queued
+		self.fastx['chunk'] = chunks[0][0:2]
+		self.send(type='chunks', chunks=chunks[1:])
+
+	def iter_sequences(self):
+		chunk = self.fastx.get('chunk')
+		skip = self.fastx.get('skip') or set()
+
+		if chunk is None:
+			if self.fastx['bgzf']:
+				reader = KraitBGZFReader(self.fastx['fpath'], self.fastx['format'],
+					self.fastx.get('threads', 1))
+			else:
+				reader = pyfastx.Fastx(self.fastx['fpath'], uppercase=True)
+
+			for item in reader:
+				self.check_cancel()
+
+				if self.stats is not None:
+					self.stats.add(item[1])
+
+				if item[0] not in skip:
+					yield item[0], item[1]
+
+		else:
+			fa = get_fastx_handle(self.fastx['fpath'], 'fasta')
+
+			for i in range(*chunk):
+				self.check_cancel()
+				seq = fa[i]
+
+				if seq.name not in skip:
+					yield seq.name, seq.seq
+
+	def build_index(self):
+		fastx_format = self.fastx['format']
 
 		self.info("Building index for {} ...".format(self.fastx['fpath']))
+		fx = get_fastx_handle(self.fastx['fpath'], fastx_format, True)
+
 		if fastx_format == 'fasta':
-			fx = pyfastx.Fasta(self.fastx['fpath'], full_index=True)
 			avg_len = round(fx.mean)
 			min_len = len(fx.shortest)
 			max_len = len(fx.longest)
 
-		elif fastx_format == 'fastq':
-			fx = pyfastx.Fastq(self.fastx['fpath'], full_index=True)
+		else:
 			avg_len = round(fx.avglen)
 			min_len = fx.minlen
 			max_len = fx.maxlen
 
-		else:
-			raise Exception("the file format is not fasta or fastq")
-
 		self.fastx['size'] = fx.size
 
 		unknown_base = 0
@@ -95,6 +535,7 @@ class KraitSearchProcess(KraitBaseProcess):
 			if b.upper() not in ['A', 'T', 'G', 'C']:
 				unknown_base += base_comp[b]
 
+		self.lap('index')
 		self.send(type = 'fastx',
 			records = [fastx_format, fx.size, len(fx), round(fx.gc_content, 2),
 				unknown_base, avg_len, min_len, max_len, self.fastx['id']
@@ -102,16 +543,18 @@ class KraitSearchProcess(KraitBaseProcess):
 		)
 
 class KraitSSRSearchProcess(KraitSearchProcess):
+	chunked = True
+
 	def do(self):
 		self.info("Finding SSRs from {} ...".format(self.fastx['fpath']))
-		fx = pyfastx.Fastx(self.fastx['fpath'], uppercase=True)
 		SM = StandardMotif(self.params['standard_level'])
 
-		for item in fx:
-			name, seq = item[0:2]
+		for name, seq in self.iter_sequences():
+			self.lap('read')
 
 			finder = pytrf.STRFinder(name, seq, *self.params['min_repeats'])
 			ssrs = finder.as_list()
+			self.lap('find')
 
 			rows = []
 			for ssr in ssrs:
@@ -119,12 +562,15 @@ class KraitSSRSearchProcess(KraitSearchProcess):
 				rows.append((None, name, ssr[1], ssr[2], ssr[3],
 					smotif, ssr[4], ssr[5], ssr[6]))
 
-			self.progress += len(seq)
-			p = self.progress/self.fastx['size']*self.fastx['weight']
+			self.lap('standard')
+
+			p = self.get_progress(seq)
 
-			self.send(type='ssr', records=rows, progress=p)
+			self.send(type='ssr', records=rows, progress=p, chrom=name)
 
 class KraitCSSRSearchProcess(KraitSearchProcess):
+	sequential = False
+
 	def do(self):
 		self.info("Finding cSSRs from {} ...".format(self.fastx['fpath']))
 		ssrs = self.params['ssrs']
@@ -153,6 +599,7 @@ class KraitCSSRSearchProcess(KraitSearchProcess):
 			else:
 				if records:
 					progress = self.progress/self.total_ssrs
+					self.lap('join')
 					self.send(type='cssr', records=records, progress=progress)
 					records = []
 				
@@ -160,11 +607,15 @@ class KraitCSSRSearchProcess(KraitSearchProcess):
 
 			self.progress += 1
 
+			if self.progress % 10000 == 0:
+				self.check_cancel()
+
 		if len(cssrs) > 1:
 			records.append(self.join_ssrs(cssrs))
 
 		if records:
 			p = self.progress/self.total_ssrs*self.fastx['weight']
+			self.lap('join')
 			self.send(type='cssr', records=records, progress=p)
 
 	def join_ssrs(self, cssrs):
@@ -178,13 +629,14 @@ class KraitCSSRSearchProcess(KraitSearchProcess):
 		return (None, chrom, start, end, complexity, length, structure, component)
 
 class KraitISSRSearchProcess(KraitSearchProcess):
+	chunked = True
+
 	def do(self):
 		self.info("Finding iSSRs from {} ...".format(self.fastx['fpath']))
-		fx = pyfastx.Fastx(self.fastx['fpath'], uppercase=True)
 		SM = StandardMotif(self.params['standard_level'])
 
-		for item in fx:
-			name, seq = item[0:2]
+		for name, seq in self.iter_sequences():
+			self.lap('read')
 
 			finder = pytrf.ATRFinder(name, seq,
 				min_motif = 1,
@@ -197,6 +649,7 @@ class KraitISSRSearchProcess(KraitSearchProcess):
 			)
 
 			issrs = finder.as_list()
+			self.lap('find')
 
 			records = []
 			for issr in issrs:
@@ -205,18 +658,20 @@ class KraitISSRSearchProcess(KraitSearchProcess):
 					issr[4], issr[6], issr[7], issr[8], issr[9], issr[11],
 					issr[12], issr[13], issr[14], round(issr[15], 2)))
 
-			self.progress += len(seq)
-			p = self.progress/self.fastx['size']*self.fastx['weight']
+			self.lap('standard')
 
-			self.send(type='issr', records=records, progress=p)
+			p = self.get_progress(seq)
+
+			self.send(type='issr', records=records, progress=p, chrom=name)
 
 class KraitGTRSearchProcess(KraitSearchProcess):
+	chunked = True
+
 	def do(self):
 		self.info("Finding GTRs from {}".format(self.fastx['fpath']))
-		fx = pyfastx.Fastx(self.fastx['fpath'], uppercase=True)
 
-		for item in fx:
-			name, seq = item[0:2]
+		for name, seq in self.iter_sequences():
+			self.lap('read')
 
 			finder = pytrf.GTRFinder(name, seq,
 				min_motif = self.params['minmotif'],
@@ -225,40 +680,42 @@ class KraitGTRSearchProcess(KraitSearchProcess):
 				min_length = self.params['minlen']
 			)
 			gtrs = finder.as_list()
+			self.lap('find')
 
 			records = []
 			for gtr in gtrs:
 				records.append((None, name, gtr[1], gtr[2], gtr[4],
 					gtr[5], gtr[6], gtr[3]))
 
-			self.progress += len(seq)
-			p = self.progress/self.fastx['size']*self.fastx['weight']
+			p = self.get_progress(seq)
 
-			self.send(type='gtr', records=records, progress=p)
+			self.send(type='gtr', records=records, progress=p, chrom=name)
 
 class KraitPrimerDesignProcess(KraitBaseProcess):
-	def __init__(self, repeats, index, category, params, queue, fastx):
-		super().__init__(params, queue, fastx)
+	def __init__(self, repeats, index, category, params, fastx):
+		super().__init__(params, fastx)
 		self.repeats = repeats
 		self.index = index
 		self.category = category
 
 	def do(self):
+		import primer3
+
 		self.info("Designing primers ...")
 		seq_name = None
 		seq_cache = None
 		flank_len = self.params.pop('PRIMER_FLANK_LENGTH')
 
-		if self.fastx['format'] == 'fasta':
-			fx = pyfastx.Fasta(self.fastx['fpath'], uppercase=True)
-		else:
-			fx = pyfastx.Fastq(self.fastx['fpath'])
+		fx = get_fastx_handle(self.fastx['fpath'], self.fastx['format'])
 
 		records = []
 		for trs in self.repeats:
+			self.check_cancel()
+
 			if trs[1] != seq_name:
 				seq_name = trs[1]
 				seq_cache = fx[seq_name].seq
+				self.lap('read')
 
 			start = trs[2] - flank_len
 
@@ -300,11 +757,43 @@ class KraitPrimerDesignProcess(KraitBaseProcess):
 
 				records.append(primer)
 
+			self.lap('design')
+
 		self.send(type='primer', records=records, progress=len(self.repeats))
 
+class KraitAlignmentProcess(KraitBaseProcess):
+	def __init__(self, repeats, fastx):
+		super().__init__(None, fastx)
+		self.repeats = repeats
+
+	def do(self):
+		aligner = KraitWrapAroundAligner()
+		fx = get_fastx_handle(self.fastx['fpath'], self.fastx['format'])
+
+		records = []
+		for rid, chrom, start, end, motif, sstart, send in self.repeats:
+			self.check_cancel()
+
+			#only the locus region is read from fasta index
+			if self.fastx['format'] == 'fasta':
+				seq = fx.fetch(chrom, (start, end))
+			else:
+				seq = fx[chrom].seq[start-1:end]
+
+			left = seq[:sstart-start]
+			right = seq[send-start+1:]
+			seed = seq[sstart-start:send-start+1]
+			self.lap('read')
+
+			cigar = aligner.cigar(left, seed, right, motif)
+			records.append((rid, chrom, start, end, motif, cigar))
+			self.lap('align')
+
+		self.send(type='alignment', records=records, progress=len(self.repeats))
+
 class KraitMappingProcess(KraitBaseProcess):
-	def __init__(self, repeats, queue, fastx):
-		super().__init__(None, queue, fastx)
+	def __init__(self, repeats, fastx):
+		super().__init__(None, fastx)
 		self.repeats = repeats
 		self.total = len(repeats)
 
@@ -315,6 +804,8 @@ class KraitMappingProcess(KraitBaseProcess):
 		self.info("Parsing annotation file {} ...".format(self.fastx['apath']))
 		mapper = get_annotation_mapper(self.fastx['apath'])
 		features = mapper.feature_records
+		self.lap('parse')
+		self.check_cancel()
 
 		self.info("Saving annotaion for {} ...".format(self.fastx['apath']))
 		for i in range(0, len(features), 200):
@@ -327,6 +818,9 @@ class KraitMappingProcess(KraitBaseProcess):
 			fs = mapper.contain(r[1], r[2], r[3])
 			self.progress += 1
 
+			if self.progress % 10000 == 0:
+				self.check_cancel()
+
 			if fs:
 				ft = min(f[1] for f in fs)
 				ps = ','.join(str(f[0]) for f in set(fs))
@@ -334,16 +828,18 @@ class KraitMappingProcess(KraitBaseProcess):
 
 				if len(rows) == 200:
 					p = self.progress/self.total*self.fastx['weight']
+					self.lap('map')
 					self.send(type='map', records=rows, progress=p)
 					rows = []
 
 		if rows:
 			p = self.progress/self.total*self.fastx['weight']
+			self.lap('map')
 			self.send(type='map', records=rows, progress=p)
 
 class KraitStatisticsProcess(KraitBaseProcess):
-	def __init__(self, repeats, annots, params, queue, fastx):
-		super().__init__(params, queue, fastx)
+	def __init__(self, repeats, annots, params, fastx):
+		super().__init__(params, fastx)
 		self.repeats = repeats
 		self.annots = annots
 
@@ -362,13 +858,14 @@ class KraitStatisticsProcess(KraitBaseProcess):
 		total = sum(len(v) for k, v in self.repeats)
 		progress = 0
 		for rtype, repeats in self.repeats:
+			self.check_cancel()
 			progress += len(repeats)
 			_class = self.get_class(rtype)
 			stats = _class(repeats, self.annots, self.fastx, self.params['unit'])
 			json = stats.json()
-			html = stats.html()
-			meta = stats.meta()
-			plot = stats.plot()
+			html, meta, plot = stats.reports()
+			self.lap(rtype)
 			p = progress/total*self.fastx['weight']
 			self.send(type='stats', records=[(None, '{}_stats'.format(rtype), json, html, meta, plot)], progress=p)
 
+POOL = KraitProcessPool()
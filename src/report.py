@@ -0,0 +1,954 @@
+import json
+
+from PySide6.QtCore import *
+
+from backend import *
+from stats import *
+
+__all__ = ['KraitExportStatistics']
+
+class KraitExportStatistics:
+	def __init__(self):
+		self.uname = 'Mb'
+		self.fastx_files = [f for f in DB.get_objects("SELECT * FROM fastx")]
+		self.fastx_datas = []
+		sql = "SELECT type,json FROM stats_{}"
+
+		for fastx_file in self.fastx_files:
+			res = DB.get_objects(sql.format(fastx_file.id))
+			self.fastx_datas.append({r.type: json.loads(r.json) for r in res})
+
+	def get_style_css(self):
+		css_files = [
+			":/scripts/tabler.min.css",
+			":/scripts/datatables.min.css"
+		]
+
+		styles = []
+		for css_file in css_files:
+			f = QFile(css_file)
+			text = None
+
+			if f.open(QIODevice.ReadOnly | QFile.Text):
+				text = QTextStream(f).readAll()
+
+			f.close()
+
+			if text:
+				styles.append(text)
+
+		return '\n'.join(styles)
+
+	def get_script_js(self):
+		js_files = [
+			":/scripts/tabler.min.js",
+			":/scripts/datatables.min.js",
+			":/scripts/echarts.min.js"
+		]
+
+		js = []
+		for js_file in js_files:
+			f = QFile(js_file)
+			text = None
+
+			if f.open(QIODevice.ReadOnly | QFile.Text):
+				text = QTextStream(f).readAll()
+
+			f.close()
+
+			if text:
+				js.append(text)
+
+		return '\n'.join(js)
+
+	def get_file_summary_table(self):
+		rows = []
+
+		for f in self.fastx_files:
+			rows.append([
+				f.id,
+				f.name,
+				f.format,
+				f.size,
+				f.count,
+				round(f.gc, 2),
+				f.ns,
+				f.avglen,
+				f.minlen,
+				f.maxlen
+			])
+
+		return {'input-file-table': rows}
+
+	def get_repeat_summary_table(self, rtype, fastx, data):
+		rtype = rtype.split('_')[0]
+		tid = '{}-summary-table-{}'.format(rtype, fastx)
+		self.uname = data['unit']
+		return {tid: [[
+			data['total_counts'],
+			data['total_length'],
+			data['average_length'],
+			data['coverage'],
+			data['frequency'],
+			data['density']
+		]]}
+
+	def get_cssr_summary_table(self, fastx, data):
+		tid = 'cssr-total-table-{}'.format(fastx)
+		return {tid: [["Total number of individual microsatellites forming compound microsatellites", data['total_cssrs']]]}
+
+	def get_repeat_detail_table(self, rtype, stype, fastx, data):
+		rtype = rtype.split('_')[0]
+		stype = stype.split('_')[0]
+		tid = '{}-{}-table-{}'.format(rtype, stype, fastx)
+		return {tid: data}
+
+	def get_stats_tables(self):
+		stats = ['type_stats', 'annot_stats', 'motif_stats',
+			'repeat_stats', 'length_stats', 'complex_stats'
+		]
+
+		tables = {}
+		tables.update(self.get_file_summary_table())
+
+		for i, f in enumerate(self.fastx_files):
+			datas = self.fastx_datas[i]
+
+			for k, data in datas.items():
+				if k == 'cssr_stats':
+					tables.update(self.get_cssr_summary_table(f.id, data))
+				
+				tables.update(self.get_repeat_summary_table(k, f.id, data))
+				
+				for s in stats:
+					if s in data and data[s]:
+						tables.update(self.get_repeat_detail_table(k, s, f.id, data[s]))
+
+		return tables
+
+	def draw_pie_plot(self, pid, title, name, data):
+		pvar = pid.replace('-', '_')
+		return """
+			var {pvar} = echarts.init(document.getElementById('{pid}'));
+			{pvar}.setOption({{
+				title: {{
+					text: "{title}"
+				}},
+				tooltip: {{
+					trigger: 'item',
+					formatter: '{{b}}<br>{{c}}, {{d}}%'
+				}},
+				toolbox: {{
+					show: true,
+					feature: {{
+						dataView: {{readOnly: true}},
+						saveAsImage: {{}}
+					}}
+				}},
+				series: [{{
+					name: "{name}",
+					type: 'pie',
+					radius: ['40%', '70%'],
+					label: {{
+						show: true,
+					}},
+					emphasis: {{
+						label: {{
+							show: true,
+							fontSize: 32,
+							fontWeight: 'bold'
+						}}
+					}},
+					data: {data}
+				}}]
+			}});
+			window.addEventListener('resize', function(){{
+				{pvar}.resize();
+			}});
+		""".format(pvar=pvar, pid=pid, title=title, name=name, data=data)
+
+	def draw_bar_plot(self, pid, title, datasets):
+		pvar = pid.replace('-', '_')
+		return """
+			var {pvar}_source = {datasets};
+
+			var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
+			{pvar}_height.attr('value', 400).attr('type', 'number');
+			$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
+
+			var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
+			for (key in {pvar}_source) {{
+				{pvar}_select.append($("<option>").attr('value', key).text(key));
+			}}
+			$('<span>').text('Data type:').prependTo($('#{pid}').parent());
+
+			var {pvar} = echarts.init(document.getElementById('{pid}'));
+			var {pvar}_option = {{
+				title: {{
+					text: "{title}"
+				}},
+				tooltip: {{
+					trigger: 'item'
+				}},
+				legend: {{}},
+				toolbox: {{
+					show: true,
+					feature: {{
+						dataView: {{readOnly: true}},
+						saveAsImage: {{}}
+					}}
+				}},
+				xAxis: {{
+					type: 'category',
+					axisLabel: {{
+						rotate: 30
+					}}
+				}},
+				yAxis: {{
+					type: 'value',
+					name: "SSR count",
+					nameGap: 50,
+					nameLocation: 'center',
+					nameTextStyle: {{
+						fontSize: 16,
+					}}
+				}},
+				series: {pvar}_source[Object.keys({pvar}_source)[0]]
+			}};
+
+			{pvar}.setOption({pvar}_option);
+			{pvar}_select.on('change', function() {{
+				{pvar}_option.series = {pvar}_source[this.value];
+				{pvar}_option.yAxis.name = this.value;
+				{pvar}.setOption({pvar}_option);
+			}});
+			{pvar}_height.on('change', function(){{
+				$('#{pid}').height(this.value);
+				window.dispatchEvent(new Event('resize'));
+			}});
+
+			window.addEventListener('resize', function(){{
+				{pvar}.resize();
+			}});
+		""".format(pvar=pvar, pid=pid, title=title, datasets=datasets)
+
+	def draw_line_plot(self, pid, title, xlab, datasets):
+		pvar = pid.replace('-', '_')
+		return """
+			var {pvar}_source = {datasets};
+
+			var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
+			{pvar}_height.attr('value', 400).attr('type', 'number');
+			$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
+
+			var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
+			for (key in {pvar}_source) {{
+				{pvar}_select.append($("<option>").attr('value', key).text(key));
+			}}
+			$('<span>').text('Data type:').prependTo($('#{pid}').parent());
+
+			var {pvar} = echarts.init(document.getElementById('{pid}'));
+
+			var {pvar}_option = {{
+				title: {{
+					text: "{title}"
+				}},
+				tooltip: {{
+					trigger: 'item'
+				}},
+				toolbox: {{
+					show: true,
+					feature: {{
+						dataView: {{readOnly: true}},
+						saveAsImage: {{}}
+					}}
+				}},
+				legend: {{}},
+				xAxis: {{
+					name: "{xlab}",
+					nameLocation: 'center'
+				}},
+				yAxis: {{
+					name: "SSR count",
+					nameLocation: 'center',
+					nameGap: 50,
+					nameLocation: 'center',
+					nameTextStyle: {{
+						fontSize: 16,
+					}}
+				}},
+				series: {pvar}_source[Object.keys({pvar}_source)[0]]
+			}};
+
+			{pvar}.setOption({pvar}_option);
+			{pvar}_select.on('change', function() {{
+				{pvar}_option.series = {pvar}_source[this.value];
+				{pvar}_option.yAxis.name = this.value;
+				{pvar}.setOption({pvar}_option);
+			}});
+			{pvar}_height.on('change', function(){{
+				$('#{pid}').height(this.value);
+				window.dispatchEvent(new Event('resize'));
+			}});
+
+			window.addEventListener('resize', function(){{
+				{pvar}.resize();
+			}});
+		""".format(pvar=pvar, pid=pid, title=title, datasets=datasets, xlab=xlab)
+
+	def get_stats_plots(self):
+		plots = {}
+
+		for i, f in enumerate(self.fastx_files):
+			datas = self.fastx_datas[i]
+
+			for k, datai in datas.items():
+				rtype = k.split('_')[0]
+
+				for s in datai:
+					if s == 'type_stats':
+						counts = []
+						lengths = []
+
+						for row in datai[s]:
+							counts.append({'value': row[1], 'name': row[0]})
+							lengths.append({'value': row[2], 'name': row[0]})
+
+						pid = "{}-count-pie-{}".format(rtype, f.id)
+						title = "{} count distribution".format(rtype)
+						name = "{} count".format(rtype)
+						plots[pid] = self.draw_pie_plot(pid, title, name, counts)
+
+						pid = "{}-length-pie-{}".format(rtype, f.id)
+						title = "{} length distribution".format(rtype)
+						name = "{} length".format(rtype)
+						plots[pid] = self.draw_pie_plot(pid, title, name, counts)
+
+					if s == 'annot_stats':
+						counts = []
+
+						for row in datai[s]:
+							counts.append({'value': row[1], 'name': row[0]})
+
+						if counts:
+							pid = "{}-annot-pie-{}".format(rtype, f.id)
+							title = "{} count in different gene regions".format(rtype)
+							name = "{} annotation".format(rtype)
+							plots[pid] = self.draw_pie_plot(pid, title, name, counts)
+
+					if s == 'motif_stats':
+						data_types = {
+							'SSR count': 2,
+							'SSR length': 3,
+							'SSR frequency': 6,
+							'SSR density': 7
+						}
+						
+						motif_pdata = {}
+
+						for dtype, dindex in data_types.items():
+							datasets = {}
+							for row in datai[s]:
+								if row[0] not in datasets:
+									datasets[row[0]] = []
+
+								datasets[row[0]].append((row[1], row[dindex]))
+
+							series = []
+							for t in datasets:
+								data = []
+								for x, y in sorted(datasets[t]):
+									data.append([x, y])
+
+								series.append({
+									'name': t,
+									'type': 'bar',
+									'stack': 'stack',
+									'data': data,
+								})
+
+							motif_pdata[dtype] = series
+
+						pid = "{}-motif-bar-{}".format(rtype, f.id)
+						title = "{} motif distribution".format(rtype)
+						plots[pid] = self.draw_bar_plot(pid, title, motif_pdata)
+
+					if s == 'repeat_stats':
+						data_types = {
+							'SSR count': 2,
+							'SSR length': 3,
+							'SSR frequency': 6,
+							'SSR density': 7
+						}
+						
+						repeat_pdata = {}
+						for dtype, dindex in data_types.items():
+							datasets = {}
+							for row in datai[s]:
+								if row[0] not in datasets:
+									datasets[row[0]] = []
+								datasets[row[0]].append((row[1], row[dindex]))
+
+							series = []
+							for t in datasets:
+								data = []
+								for x, y in sorted(datasets[t]):
+									data.append([x, y])
+
+								series.append({
+									'name': t,
+									'type': 'line',
+									'smooth': 1,
+									'data': data,
+								})
+
+							repeat_pdata[dtype] = series
+
+						pid = "{}-repeat-line-{}".format(rtype, f.id)
+						title = "{} repeat distribution".format(rtype)
+						xlab = "Repeat number"
+						plots[pid] = self.draw_line_plot(pid, title, xlab, repeat_pdata)
+
+					if s == 'length_stats':
+						data_types = {
+							'SSR count': 2,
+							'SSR length': 3,
+							'SSR frequency': 6,
+							'SSR density': 7
+						}
+						
+						repeat_pdata = {}
+						for dtype, dindex in data_types.items():
+							datasets = {}
+							for row in datai[s]:
+								if row[0] not in datasets:
+									datasets[row[0]] = []
+								datasets[row[0]].append((row[1], row[dindex]))
+
+							series = []
+							for t in datasets:
+								data = []
+
+								for x, y in sorted(datasets[t]):
+									data.append([x, y])
+
+								series.append({
+									'name': t,
+									'type': 'line',
+									'smooth': 1,
+									'data': data
+								})
+
+							repeat_pdata[dtype] = series
+
+						pid = "{}-length-line-{}".format(rtype, f.id)
+						title = "{} length distribution".format(rtype)
+						xlab = "Length"
+						plots[pid] = self.draw_line_plot(pid, title, xlab, repeat_pdata)
+
+		return plots
+
+	def draw_line_bar_mix_plot(self, pid, names, datasets):
+		pvar = pid.replace('-', '_')
+		return """
+		var {pvar}_source = {datasets};
+
+		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
+		{pvar}_height.attr('value', 400).attr('type', 'number');
+		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
+
+		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
+		for (key in {pvar}_source) {{
+			{pvar}_select.append($("<option>").attr('value', key).text(key));
+		}}
+		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
+
+		var {pvar} = echarts.init(document.getElementById('{pid}'));
+		var {pvar}_option = {{
+			tooltip: {{
+				trigger: 'item'
+			}},
+			toolbox: {{
+				show: true,
+				feature: {{
+					dataView: {{readOnly: true}},
+					saveAsImage: {{}},
+					magicType: {{
+						type: ['bar', 'line']
+					}},
+				}}
+			}},
+			xAxis: {{
+				type: 'category',
+				data: {names},
+				axisLabel: {{
+					rotate: 30
+				}}
+			}},
+			yAxis: {{
+				type: 'value',
+				name: Object.keys({pvar}_source)[0],
+				nameGap: 50,
+				nameLocation: 'center',
+				nameTextStyle: {{
+					color: '#000',
+					fontSize: 16,
+				}}
+			}},
+			series: [{{
+				data: {pvar}_source[Object.keys({pvar}_source)[0]],
+				type: 'bar'
+			}}]
+		}};
+		{pvar}.setOption({pvar}_option);
+		{pvar}_select.on('change', function() {{
+			{pvar}_option.yAxis.name = this.value;
+			{pvar}_option.series[0].data = {pvar}_source[this.value];
+			{pvar}.setOption({pvar}_option);
+		}});{pvar}_height.on('change', function(){{
+			$('#{pid}').height(this.value);
+			window.dispatchEvent(new Event('resize'));
+		}});
+
+		{pvar}_height.on('change', function(){{
+			$('#{pid}').height(this.value);
+			window.dispatchEvent(new Event('resize'));
+		}});
+
+		window.addEventListener('resize', function(){{
+			{pvar}.resize();
+		}});
+		""".format(pid=pid, pvar=pvar, names=names, datasets=datasets)
+
+	def draw_stack_bar_mix_plot(self, pid, names, datasets):
+		pvar = pid.replace('-', '_')
+		return """
+		var {pvar}_source = {datasets};
+
+		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
+		{pvar}_height.attr('value', 400).attr('type', 'number');
+		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
+
+		var {pvar}_circos = $('<select>', {{id: '{pvar}-circos'}}).prependTo($('#{pid}').parent());
+		{pvar}_circos.append($("<option>").attr('value', 'bar').text('bar'));
+		{pvar}_circos.append($("<option>").attr('value', 'circle').text('circle'));
+		$('<span>').addClass('ms-3').text('Plot type:').prependTo($('#{pid}').parent());
+
+		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
+		for (key in {pvar}_source) {{
+			{pvar}_select.append($("<option>").attr('value', key).text(key));
+		}}
+		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
+
+		var {pvar} = echarts.init(document.getElementById('{pid}'));
+		var {pvar}_option_circos = {{
+			angleAxis: {{
+				type: 'category',
+				data: {names}
+			}},
+			tooltip: {{
+				trigger: 'item'
+			}},
+			toolbox: {{
+				show: true,
+				feature: {{
+					dataView: {{readOnly: true}},
+					saveAsImage: {{}}
+				}}
+			}},
+			radiusAxis: {{}},
+			polar: {{}},
+			legend: {{}},
+			series: []
+		}};
+
+		var {pvar}_option_bar = {{
+			legend: {{}},
+			tooltip: {{
+				trigger: 'item'
+			}},
+			toolbox: {{
+				show: true,
+				feature: {{
+					dataView: {{readOnly: true}},
+					saveAsImage: {{}}
+				}}
+			}},
+			yAxis: {{
+				type: 'category',
+				data: {names}
+			}},
+			xAxis: {{
+				type: 'value',
+				name: Object.keys({pvar}_source)[0],
+				nameGap: 50,
+				nameLocation: 'center',
+				nameTextStyle: {{
+					color: '#000',
+					fontSize: 16,
+				}}
+			}},
+			series: {pvar}_source[Object.keys({pvar}_source)[0]]
+		}};
+
+		var {pvar}_option = {pvar}_option_bar;
+		{pvar}.setOption({pvar}_option);
+
+		{pvar}_circos.on('change', function(){{
+			var {pvar}_series = {pvar}_source[{pvar}_select.val()];
+			if (this.value === 'circle') {{
+				{pvar}_option = {pvar}_option_circos;
+
+				for (var i = 0; i < {pvar}_series.length; i++) {{
+					{pvar}_series[i].coordinateSystem = 'polar';
+					{pvar}_series[i].barCategoryGap = 0;
+				}}
+
+			}} else {{
+				{pvar}_option = {pvar}_option_bar;
+
+				for (var i = 0; i < {pvar}_series.length; i++) {{
+					{pvar}_series[i].coordinateSystem = 'cartesian2d';
+					delete {pvar}_series[i].barCategoryGap;
+				}}
+			}}
+			{pvar}_option.series = {pvar}_series;
+			{pvar}.clear();
+			{pvar}.setOption({pvar}_option);
+		}});
+
+		{pvar}_select.on('change', function() {{
+			var {pvar}_series = {pvar}_source[this.value];
+			if ({pvar}_circos.val() === 'circle') {{
+				{pvar}_option = {pvar}_option_circos;
+
+				for (var i = 0; i < {pvar}_series.length; i++) {{
+					{pvar}_series[i].coordinateSystem = 'polar';
+					{pvar}_series[i].barCategoryGap = 0;
+				}}
+
+			}} else {{
+				{pvar}_option = {pvar}_option_bar;
+
+				for (var i = 0; i < {pvar}_series.length; i++) {{
+					{pvar}_series[i].coordinateSystem = 'cartesian2d';
+					delete {pvar}_series[i].barCategoryGap;
+				}}
+			}}
+
+			//{pvar}_option.xAxis.name = this.value;
+			//{pvar}_option.series = {pvar}_source[this.value];
+			{pvar}_option.series = {pvar}_series;
+			{pvar}.clear();
+			{pvar}.setOption({pvar}_option);
+		}});
+
+		{pvar}_height.on('change', function(){{
+			$('#{pid}').height(this.value);
+			window.dispatchEvent(new Event('resize'));
+		}});
+
+		window.addEventListener('resize', function(){{
+			{pvar}.resize();
+		}});
+		""".format(pid=pid, pvar=pvar, names=names, datasets=datasets)
+
+	def draw_heatmap_plot(self, pid, xlabels, ylabels, datasets):
+		pvar = pid.replace('-', '_')
+		return """
+		var {pvar}_source = {datasets};
+
+		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
+		{pvar}_height.attr('value', 400).attr('type', 'number');
+		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
+
+		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
+		for (key in {pvar}_source) {{
+			{pvar}_select.append($("<option>").attr('value', key).text(key));
+		}}
+		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
+
+		var {pvar} = echarts.init(document.getElementById('{pid}'));
+		var {pvar}_option = {{
+			tooltip: {{
+				position: 'top'
+			}},
+			toolbox: {{
+				show: true,
+				feature: {{
+					dataView: {{readOnly: true}},
+					saveAsImage: {{}}
+				}}
+			}},
+			legend: {{}},
+			xAxis: {{
+				type: 'category',
+				data: {xlabels},
+				splitArea: {{
+					show: true
+				}},
+				axisLabel: {{
+					rotate: 30
+				}}
+			}},
+			yAxis: {{
+				type: 'category',
+				data: {ylabels},
+				splitArea: {{
+					show: true
+				}}
+			}},
+			visualMap: {{
+				calculable: true,
+				orient: 'horizontal',
+				left: 'center'
+			}},
+			series: {pvar}_source[Object.keys({pvar}_source)[0]]
+		}}
+		{pvar}.setOption({pvar}_option);
+		{pvar}_select.on('change', function() {{
+			{pvar}_option.series = {pvar}_source[this.value];
+			{pvar}.setOption({pvar}_option);
+		}});
+		{pvar}_height.on('change', function(){{
+			$('#{pid}').height(this.value);
+			window.dispatchEvent(new Event('resize'));
+		}});
+		window.addEventListener('resize', function(){{
+			{pvar}.resize();
+		}});
+		""".format(pid=pid, pvar=pvar, xlabels=xlabels, ylabels=ylabels, datasets=datasets)
+
+	def perform_comparative_analysis(self):
+		if len(self.fastx_files) < 2:
+			return {}, {}
+
+		ssr_summary = []
+		ssr_types = []
+		ssr_annot = []
+		ssr_motif = set()
+		annot_type = set()
+		motif_data = []
+		ssr_files = []
+
+		for i, f in enumerate(self.fastx_files):
+			datas = self.fastx_datas[i]
+			ssr_files.append(f.name)
+
+			for k, datai in datas.items():
+				if k != 'ssr_stats':
+					continue
+
+				ssr_summary.append([
+					f.id,
+					f.name,
+					datai['total_counts'],
+					datai['total_length'],
+					datai['average_length'],
+					datai['coverage'],
+					datai['frequency'],
+					datai['density']
+				])
+
+				for s in datai:
+					if s == 'type_stats':
+						rows = {row[0]: row for row in datai[s]}
+						item = [f.id, f.name]
+						for j in [1, 2, 5, 6]:
+							for m in ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']:
+								row = rows.get(m, None)
+
+								if row is None:
+									item.append(0)
+								else:
+									item.append(row[j])
+
+						ssr_types.append(item)
+
+					elif s == 'annot_stats':
+						annot_nums = {}
+						for row in datai[s]:
+							annot_type.add(row[0])
+							annot_nums[row[0]] = [row[1], row[2], row[5], row[6]]
+
+						ssr_annot.append(annot_nums)
+
+					elif s == 'motif_stats':
+						motif_nums = {}
+						for row in datai[s]:
+							ssr_motif.add(row[1])
+							motif_nums[row[1]] = [row[2], row[3], row[6], row[7]]
+
+						motif_data.append(motif_nums)
+
+		tables = {}
+		plots = {}
+
+		if ssr_summary:
+			tables['ssr-count-compare-table'] = ssr_summary
+			tables['ssr-type-compare-table'] = ssr_types
+		
+		summary_pdata = {
+			'SSR count': [],
+			'SSR length': [],
+			'SSR frequency': [],
+			'SSR density': []
+		}
+		for row in ssr_summary:
+			summary_pdata['SSR count'].append(row[2])
+			summary_pdata['SSR length'].append(row[3])
+			summary_pdata['SSR frequency'].append(row[6])
+			summary_pdata['SSR density'].append(row[7])
+
+		pid = 'ssr-summary-plot'
+
+		if summary_pdata:
+			plots[pid] = self.draw_line_bar_mix_plot(pid, ssr_files, summary_pdata)
+
+		type_pdata = {}
+		type_names = {
+			'SSR count': 2,
+			'SSR count percent': 2,
+			'SSR length': 8,
+			'SSR length percent': 8,
+			'SSR frequency': 14,
+			'SSR density': 20
+		}
+
+		for dtype, dindex in type_names.items():
+			type_pdata[dtype] = []
+			value_list = [[], [], [], [], [], []]
+
+			for row in ssr_types:
+				if 'percent' in dtype:
+					total = sum(row[dindex:dindex+6])
+
+					for j in range(6):
+						value_list[j].append(round(row[dindex+j]/total*100, 2))
+				else:
+					for j in range(6):
+						value_list[j].append(row[dindex+j])
+
+			ts = ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']
+			for l, t in enumerate(ts):
+				type_pdata[dtype].append({
+					'name': t,
+					'type': 'bar',
+					'stack': 'total',
+					'coordinateSystem': 'cartesian2d',
+					'data': value_list[l]
+				})
+
+		pid = 'ssr-type-compare-plot'
+
+		if ssr_types:
+			plots[pid] = self.draw_stack_bar_mix_plot(pid, ssr_files, type_pdata)
+
+		annot_pdata = {}
+		type_names = {
+			'SSR count': 0,
+			'SSR count percent': 0,
+			'SSR length': 1,
+			'SSR length percent': 1,
+			'SSR frequency': 2,
+			'SSR density': 3
+		}
+
+		annot_type = sorted(annot_type)
+		for dtype, dindex in type_names.items():
+			annot_pdata[dtype] = []
+			value_list = []
+			for at in range(len(annot_type)):
+				value_list.append([])
+
+			for nums in ssr_annot:
+				if 'percent' in dtype:
+					total = sum(num[dindex] for num in nums.values())
+
+				for i, at in enumerate(annot_type):
+					if at in nums:
+						sv = nums[at][dindex]
+					else:
+						sv = 0
+
+					if 'percent' in dtype:
+						value_list[i].append(round(sv/total*100, 2))
+					else:
+						value_list[i].append(sv)
+
+			for l, t in enumerate(annot_type):
+				annot_pdata[dtype].append({
+					'name': t,
+					'type': 'bar',
+					'stack': 'total',
+					'coordinateSystem': 'cartesian2d',
+					'data': value_list[l]
+				})
+
+		pid = 'ssr-annot-compare-plot'
+
+		if ssr_annot and ssr_annot[0]:
+			plots[pid] = self.draw_stack_bar_mix_plot(pid, ssr_files, annot_pdata)
+
+		type_names = {
+			'SSR count': 0,
+			'SSR length': 1,
+			'SSR frequency': 2,
+			'SSR density': 3
+		}
+		motif_pdata = {}
+
+		xlabels = sorted(ssr_motif, key=lambda x: (len(x), x))
+		ylabels = ssr_files
+		
+		for dtype, dindex in type_names.items():
+			motif_pdata[dtype] = []
+			value_list = [[], [], [], [], [], []]
+		
+			for y, nums in enumerate(motif_data):
+				for x, motif in enumerate(xlabels):
+					if motif in nums:
+						sv = nums[motif][dindex]
+					else:
+						sv = 0
+
+					value_list[len(motif)-1].append([x, y, sv])
+
+			ts = ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']
+			for l, t in enumerate(ts):
+				motif_pdata[dtype].append({
+					'name': t,
+					'type': 'heatmap',
+					'data': value_list[l]
+				})
+
+		pid = 'ssr-motif-compare-plot'
+
+		if motif_data:
+			plots[pid] = self.draw_heatmap_plot(pid, xlabels, ylabels, motif_pdata)
+
+		return tables, plots
+
+	def stream_summary_report(self):
+		template = get_stats_templates().get_template('stats.html')
+
+		styles = self.get_style_css()
+		scripts = self.get_script_js()
+		tables = self.get_stats_tables()
+		plots = self.get_stats_plots()
+
+		forms, charts = self.perform_comparative_analysis()
+		tables.update(forms)
+		plots.update(charts)
+
+		return template.stream(
+			styles = styles,
+			scripts = scripts,
+			fastxs = self.fastx_files,
+			tables = tables,
+			plots = plots,
+			uname = self.uname
+		)
+
+	def generate_summary_report(self):
+		return ''.join(self.stream_summary_report())
@@ -1,44 +1,14 @@
-import pyfastx
+import itertools
 
 from PySide6.QtGui import *
 from PySide6.QtCore import *
 from PySide6.QtWidgets import *
 
+from common import *
 from backend import *
 
 __all__ = ['KraitSequenceViewer']
 
-class SequenceHighlighter(QSyntaxHighlighter):
-	def __init__(self, parent=None):
-		super().__init__(parent)
-
-		self.rules = []
-
-		a_format = QTextCharFormat()
-		a_format.setForeground(QColor(80,80,255))
-		self.rules.append((QRegularExpression("[Aa]+"), a_format))
-
-		t_format = QTextCharFormat()
-		t_format.setForeground(QColor(255,215,0))
-		self.rules.append((QRegularExpression("[Tt]+"), t_format))
-
-		g_format = QTextCharFormat()
-		g_format.setForeground(QColor(0,192,0))
-		self.rules.append((QRegularExpression("[Gg]+"), g_format))
-
-		c_format = QTextCharFormat()
-		c_format.setForeground(QColor(224,0,0))
-		self.rules.append((QRegularExpression("[Cc]+"), c_format))
-
-	def highlightBlock(self, text):
-		for pattern, _format in self.rules:
-			matches = pattern.globalMatch(text)
-			while matches.hasNext():
-				match = matches.next()
-				self.setFormat(match.capturedStart(), match.capturedLength(), _format)
-
-		self.setCurrentBlockState(0)
-
 class LineNumberArea(QWidget):
 	def __init__(self, parent):
 		super().__init__(parent)
@@ -66,6 +36,8 @@ class KraitSequenceViewer(QPlainTextEdit):
 		super().__init__(parent)
 		self.parent = parent
 		self.setReadOnly(True)
+		self.setUndoRedoEnabled(False)
+		self.setLineWrapMode(QPlainTextEdit.NoWrap)
 		self.setFrameStyle(QFrame.NoFrame)
 		#self.viewport().setAutoFillBackground(False)
 
@@ -102,9 +74,17 @@ class KraitSequenceViewer(QPlainTextEdit):
 		self.blockCountChanged.connect(self.update_line_number_area_width)
 		self.updateRequest.connect(self.update_line_number_area)
 
-		#set dna sequence highlighter
-		self.highlighter = SequenceHighlighter()
-		self.highlighter.setDocument(self.document())
+		#bases are colored when inserted, so that only new flanks are formatted
+		self.base_format = fmt
+		self.base_formats = {}
+
+		for bases, color in [('Aa', QColor(80,80,255)), ('Tt', QColor(255,215,0)),
+			('Gg', QColor(0,192,0)), ('Cc', QColor(224,0,0))]:
+			base_fmt = QTextCharFormat(fmt)
+			base_fmt.setForeground(color)
+
+			for base in bases:
+				self.base_formats[base] = base_fmt
 
 		#event connect
 		self.selectionChanged.connect(self.change_select_count)
@@ -115,6 +95,35 @@ class KraitSequenceViewer(QPlainTextEdit):
 		self.flank_length = 100
 		self.flank_step = 50
 
+		#bases read around the target in advance for the following flank changes
+		self.cache_margin = 2000
+		self.cache_start = 0
+		self.cache_seq = ''
+		self.chrom_length = 0
+
+		#range of sequence shown in the viewer
+		self.shown_range = (0, 0)
+		self.seq_start = 1
+		self.seq_end = 0
+
+		#bases per line and sequence position of the first line
+		self.line_bases = 10
+		self.grid_start = 0
+
+		#figure space is as wide as bases with letter spacing, a space is not
+		self.pad_char = '\u2007'
+
+		self.target = None
+
+		#0-based start, end and motif size of tandem repeats
+		self.unit_marks = []
+
+		#rebuild lines after resizing is finished
+		self.resize_timer = QTimer(self)
+		self.resize_timer.setSingleShot(True)
+		self.resize_timer.setInterval(100)
+		self.resize_timer.timeout.connect(self.rebuild_lines)
+
 		#self.set_sequence()
 
 	def wheelEvent(self, event):
@@ -138,11 +147,50 @@ class KraitSequenceViewer(QPlainTextEdit):
 			if self.flank_length < 100:
 				self.flank_length = 100
 
-		self.update_mark_sequence()
+		self.update_flank_sequence()
 
 	def sizeHint(self):
 		return QSize(100, 150)
 
+	def paintEvent(self, event):
+		#motif unit boxes of visible lines are painted under the text
+		if self.unit_marks:
+			painter = QPainter(self.viewport())
+			painter.setPen(QPen(Qt.black))
+			painter.setBrush(QBrush(Qt.lightGray))
+
+			block = self.firstVisibleBlock()
+			offset = self.contentOffset()
+
+			while block.isValid():
+				rect = self.blockBoundingGeometry(block).translated(offset)
+
+				if rect.top() > event.rect().bottom():
+					break
+
+				line = block.layout().lineAt(0)
+				line_start = self.grid_start + block.blockNumber() * self.line_bases
+				line_end = line_start + block.length() - 1
+
+				for start, end, size in self.unit_marks:
+					if start >= line_end or end <= line_start:
+						continue
+
+					#first unit overlapping with the line
+					pos = start + max(line_start - start, 0) // size * size
+
+					while pos < end and pos < line_end:
+						x1 = line.cursorToX(max(pos, line_start) - line_start)[0]
+						x2 = line.cursorToX(min(pos + size, end, line_end) - line_start)[0]
+						painter.drawRect(QRectF(rect.left() + x1, rect.top() + line.y(), x2 - x1, line.height()))
+						pos += size
+
+				block = block.next()
+
+			painter.end()
+
+		super().paintEvent(event)
+
 	def set_locus_position(self, start, length):
 		self.locus_start = start
 		self.locus_length = length
@@ -180,6 +228,13 @@ class KraitSequenceViewer(QPlainTextEdit):
 		rect = QRect(cr.left(), cr.top(), cr.width(), scale_bar_height)
 		self.scale_bar_area.setGeometry(rect)
 
+		self.resize_timer.start()
+
+	def rebuild_lines(self):
+		#lines are rebuilt only when the number of bases per line changes
+		if self.target and self.get_line_bases() != self.line_bases:
+			self.update_mark_sequence()
+
 	def scale_bar_paint_event(self, event):
 		painter = QPainter(self.scale_bar_area)
 		painter.fillRect(event.rect(), Qt.white)
@@ -187,10 +242,10 @@ class KraitSequenceViewer(QPlainTextEdit):
 		block = self.firstVisibleBlock()
 		start = self.line_number_area_width()
 		line = block.layout().lineAt(0)
-		column_count = line.textLength()
-		if column_count == 0:
+		if line.textLength() == 0:
 			return
-		column_width = line.naturalTextWidth()/column_count
+		column_width = line.naturalTextWidth()/line.textLength()
+		column_count = self.line_bases
 		char_width = self.fontMetrics().averageCharWidth()
 		char_height = self.fontMetrics().height()
 		scale_height = self.scale_bar_area_height() - 1
@@ -235,25 +290,16 @@ class KraitSequenceViewer(QPlainTextEdit):
 		width = self.line_number_area_width()
 		height = self.fontMetrics().height()
 
-		line_char = block.layout().lineAt(0).textLength()
-		if line_char == 0:
-			return
-
-		line_number = 0
+		painter.setPen(Qt.gray)
 
-		while block.isValid():
-			for i in range(block.lineCount()):
-				line_number += 1
-				line_start = self.locus_start + (line_number - 1) * line_char
-
-				dx = self.blockBoundingGeometry(block).x()
-				dy = self.blockBoundingGeometry(block).y()
-				line = block.layout().lineAt(i)
-				top = line.rect().translated(offset).translated(dx, dy).y()
-				painter.setPen(Qt.gray)
-				painter.drawText(0, top, width-self.lineno_right_space, height, Qt.AlignRight, str(line_start))
+		#each block is a line starting at a multiple of bases per line
+		while block.isValid() and top <= event.rect().bottom():
+			line_start = max(self.grid_start + block.blockNumber() * self.line_bases, self.locus_start) + 1
+			painter.drawText(0, int(top), width-self.lineno_right_space, height, Qt.AlignRight, str(line_start))
 
 			block = block.next()
+			top = bottom
+			bottom = top + self.blockBoundingRect(block).height()
 
 	@Slot(int)
 	def update_line_number_area_width(self, newBlockCount):
@@ -342,7 +388,7 @@ class KraitSequenceViewer(QPlainTextEdit):
 		self.setExtraSelections(extra_selections)
 	"""
 
-	def update_sequence(self):
+	def get_sequence_range(self):
 		start = self.target.start - self.flank_length - 1
 
 		if start < 0:
@@ -350,32 +396,132 @@ class KraitSequenceViewer(QPlainTextEdit):
 
 		end = self.target.end + self.flank_length
 
-		seq = self.fastx_file[self.target.chrom][start:end].seq
+		if end > self.chrom_length:
+			end = self.chrom_length
+
+		return start, end
+
+	def get_bases(self, start, end):
+		cache_end = self.cache_start + len(self.cache_seq)
+
+		if start < self.cache_start or end > cache_end:
+			self.cache_start = max(start - self.cache_margin, 0)
+			cache_end = min(end + self.cache_margin, self.chrom_length)
+			self.cache_seq = self.fastx_file[self.target.chrom][self.cache_start:cache_end].seq
+
+		return self.cache_seq[start-self.cache_start:end-self.cache_start]
 
-		self.set_locus_position(start, len(seq))
-		self.setPlainText(seq)
+	def insert_bases(self, cursor, bases):
+		for base, group in itertools.groupby(bases):
+			cursor.insertText(''.join(group), self.base_formats.get(base, self.base_format))
 
+	def get_line_bases(self):
+		#each line is a text block, so that flank changes only lay out new lines
+		fm = QFontMetricsF(self.font())
+		width = self.viewport().width() - self.document().documentMargin() * 2
+		return max(int(width / (fm.horizontalAdvance('A') * 2)) - 1, 10)
+
+	def get_position(self, pos):
+		#position in document of 0-based sequence position
+		k = pos - self.grid_start
+		return k + k // self.line_bases
+
+	def get_text(self, start, end):
+		#bases with a line break before every line except the first line
+		pieces = []
+		pos = start
+
+		while pos < end:
+			line_end = min((pos // self.line_bases + 1) * self.line_bases, end)
+
+			if pos % self.line_bases == 0 and pos != self.seq_start - 1:
+				pieces.append('\n')
+
+			pieces.append(self.get_bases(pos, line_end))
+			pos = line_end
+
+		return ''.join(pieces)
+
+	def set_sequence_range(self, start, end):
+		self.shown_range = (start, end)
+		self.set_locus_position(start, end - start)
 		self.seq_start = start + 1
-		self.seq_end = start + len(seq)
+		self.seq_end = end
+
+		#lines are aligned to sequence positions, the first line is padded
+		self.grid_start = start - start % self.line_bases
+
+	def update_sequence(self):
+		self.chrom_length = len(self.fastx_file[self.target.chrom])
+		self.cache_start = 0
+		self.cache_seq = ''
+		self.line_bases = self.get_line_bases()
+
+		start, end = self.get_sequence_range()
+		self.set_sequence_range(start, end)
+		self.clear()
+
+		cursor = QTextCursor(self.document())
+		cursor.beginEditBlock()
+		cursor.insertText(self.pad_char * (start - self.grid_start), self.base_format)
+		self.insert_bases(cursor, self.get_text(start, end))
+		cursor.endEditBlock()
+
+	def update_flank_sequence(self):
+		#only add or remove the changed flanks, cursors of marks follow the edits
+		start, end = self.get_sequence_range()
+		old_start, old_end = self.shown_range
+
+		if (start, end) == self.shown_range:
+			return
+
+		cursor = QTextCursor(self.document())
+		cursor.beginEditBlock()
+
+		if end > old_end:
+			cursor.movePosition(QTextCursor.End)
+			self.insert_bases(cursor, self.get_text(old_end, end))
+
+		elif end < old_end:
+			pos = self.get_position(end)
+
+			if end % self.line_bases == 0:
+				pos -= 1
+
+			cursor.setPosition(pos)
+			cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+			cursor.removeSelectedText()
+
+		#remove padding or bases before the new start
+		cursor.setPosition(0)
+		cursor.setPosition(self.get_position(max(start, old_start)), QTextCursor.KeepAnchor)
+		cursor.removeSelectedText()
+		self.set_sequence_range(start, end)
+		cursor.insertText(self.pad_char * (start - self.grid_start), self.base_format)
+
+		if start < old_start:
+			self.insert_bases(cursor, self.get_text(start, old_start))
+
+			if old_start % self.line_bases == 0:
+				cursor.insertText('\n', self.base_format)
+
+		cursor.endEditBlock()
+
+		self.setExtraSelections(self.extraSelections())
+		self.update_line_number_area_width(0)
 
 	def update_marks(self):
 		sels = []
+		self.unit_marks = []
 
 		for mark in self.marks:
-			start = mark.start - self.seq_start
-			end = start + mark.end - mark.start + 1
+			#positions in document skip line breaks
+			start = self.get_position(mark.start - 1)
+			end = self.get_position(mark.end - 1) + 1
 
 			if mark.style == 'tandem':
-				mlen = mark.type
-				
-				for pos in range(start, end, mlen):
-					sel = QTextEdit.ExtraSelection()
-					sel.format.setProperty(QTextFormat.BackgroundBrush, QBrush(Qt.lightGray))
-					sel.format.setProperty(QTextFormat.OutlinePen, QPen(Qt.black))
-					sel.cursor = self.textCursor()
-					sel.cursor.setPosition(pos)
-					sel.cursor.setPosition(pos + mlen, QTextCursor.KeepAnchor)
-					sels.append(sel)
+				#motif units are painted by paintEvent
+				self.unit_marks.append((mark.start - 1, mark.end, mark.type))
 
 			elif mark.style == 'align':
 				sel = QTextEdit.ExtraSelection()
@@ -415,11 +561,7 @@ class KraitSequenceViewer(QPlainTextEdit):
 		if self.fastx_index != index:
 			self.fastx_index = index
 			fastx = DB.get_object("SELECT * FROM fastx WHERE id=? LIMIT 1", (index,))
-
-			if fastx.format == 'fasta':
-				self.fastx_file = pyfastx.Fasta(fastx.fpath, uppercase=True)
-			else:
-				self.fastx_file = pyfastx.Fastq(fastx.fpath)
+			self.fastx_file = get_fastx_handle(fastx.fpath, fastx.format)
 
 		self.target = target
 		self.marks = marks
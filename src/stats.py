@@ -1,18 +1,262 @@
 import json
-import jinja2
-import pyfastx
-
-from PySide6.QtCore import *
-
-from config import *
-from backend import *
 
 __all__ = [
 	'KraitSTRStatistics', 'KraitCSSRStatistics',
 	'KraitISSRStatistics', 'KraitGTRStatistics',
-	'KraitExportStatistics'
+	'get_stats_templates'
 ]
 
+STATS_HEADS = {
+	'type_stats': "Motif type statistics",
+	'annot_stats': "Annotation statistics",
+	'motif_stats': "Motif statistics",
+	'repeat_stats': "Repeat statistics",
+	'length_stats': "Length statistics",
+	'complex_stats': "Complexity statistics"
+}
+
+STATS_COLUMNS = {
+	'type_stats': ["Motif type"],
+	'annot_stats': ["Feature"],
+	'motif_stats': ["Motif"],
+	'repeat_stats': ["Motif type", "Repeat"],
+	'length_stats': ["Motif type", "Length"],
+	'complex_stats': ["Complexity"]
+}
+
+STATS_META_KEYS = ['type_stats', 'annot_stats']
+
+STATS_HTML_KEYS = ['type_stats', 'annot_stats', 'motif_stats',
+	'repeat_stats', 'length_stats', 'complex_stats']
+
+STATS_MACROS_TEMPLATE = """
+{% macro summary_table(title, uname, stats) %}
+<div class="row">
+	<div class="col">
+		<h3>{{ title }}</h3>
+		<h4 class="mt-3">Summary statistics</h4>
+		<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%">
+			<thead>
+				<tr>
+					<th>Total counts</th>
+					<th>Total length (bp)</th>
+					<th>Average length (bp)</th>
+					<th>Sequence coverage (%)</th>
+					<th>Relative abundance (loci/{{ uname }})</th>
+					<th>Relative density (bp/{{ uname }})</th>
+				</tr>
+			</thead>
+			<tbody class="table-group-divider">
+				<tr bgcolor="#f2f2f2">
+					<td align="center">{{ stats.total_counts }}</td>
+					<td align="center">{{ stats.total_length }}</td>
+					<td align="center">{{ stats.average_length }}</td>
+					<td align="center">{{ stats.coverage }}</td>
+					<td align="center">{{ stats.frequency }}</td>
+					<td align="center">{{ stats.density }}</td>
+				</tr>
+			</tbody>
+		</table>
+	</div>
+</div>
+{% if 'total_cssrs' in stats %}
+<div class="row mt-3">
+	<div class="col">
+		<h4 class="mt-3">Summary statistics</h4>
+		<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%" class="mt-3">
+			<thead>
+				<tr>
+					<th></th>
+					<th>Counts</th>
+				</tr>
+			</thead>
+			<tbody class="table-group-divider">
+				<tr bgcolor="#f2f2f2">
+					<th>Total number of individual microsatellites forming compound microsatellites</th>
+					<td align="center">{{ stats.total_cssrs }}</td>
+				</tr>
+			</tbody>
+		</table>
+	</div>
+</div>
+{% endif %}
+{% endmacro %}
+
+{% macro stats_table(section) %}
+<div class="row mt-3"><div class="col"><h4>{{ section.head }}</h4>
+<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%">
+<thead>
+<tr>{% for column in section.columns %}<th>{{ column }}</th>{% endfor %}</tr>
+</thead>
+<tbody class="table-group-divider">
+{% for row in section.rows %}
+<tr bgcolor="{{ loop.cycle('#f2f2f2', 'white') }}">{% for col in row %}<td align="center">{{ col }}</td>{% endfor %}</tr>
+{% endfor %}
+</tbody>
+</table>
+</div>
+</div>
+{% endmacro %}
+"""
+
+STATS_META_TEMPLATE = """
+{% import 'macros.html' as m %}
+{{ m.summary_table(title, uname, stats) }}
+{% for section in meta_sections %}
+{{ m.stats_table(section) }}
+{% endfor %}
+"""
+
+STATS_HTML_TEMPLATE = """
+{% import 'macros.html' as m %}
+{{ m.summary_table(title, uname, stats) }}
+{% for section in html_sections %}
+{{ m.stats_table(section) }}
+{% if section.key == 'type_stats' %}
+<div class="row mt-3">
+	<div class="col-4">
+		<div id="{{ cat }}-count-pie-{{ idx }}"></div>
+	</div>
+	<div class="col-4">
+		<div id="{{ cat }}-length-pie-{{ idx }}"></div>
+	</div>
+	<div class="col-4">
+		<div id="{{ cat }}-annot-pie-{{ idx }}"></div>
+	</div>
+</div>
+{% elif section.key == 'motif_stats' %}
+<div class="row mt-3">
+	<div class="col-12">
+		<div id="{{ cat }}-motif-bar-{{ idx }}"></div>
+	</div>
+</div>
+{% elif section.key == 'repeat_stats' %}
+<div class="row mt-3">
+	<div class="col-12">
+		<div id="{{ cat }}-repeat-line-{{ idx }}"></div>
+	</div>
+</div>
+{% elif section.key == 'length_stats' %}
+<div class="row mt-3">
+	<div class="col-12">
+		<div id="{{ cat }}-length-line-{{ idx }}"></div>
+	</div>
+</div>
+{% endif %}
+{% endfor %}
+"""
+
+STATS_PLOT_TEMPLATE = """
+{% if plots.type %}
+Plotly.newPlot('{{ cat }}-count-pie-{{ idx }}', [{
+	type: 'pie',
+	values: {{ plots.type.counts|tojson }},
+	labels: {{ plots.type.names|tojson }}
+}], {
+	title: "{{ cat }} count distribution",
+	font: {size: 14}
+}, {
+	responsive: true
+});
+
+Plotly.newPlot('{{ cat }}-length-pie-{{ idx }}', [{
+	type: 'pie',
+	values: {{ plots.type.lengths|tojson }},
+	labels: {{ plots.type.names|tojson }}
+}], {
+	title: "{{ cat }} length distribution",
+	font: {size: 14}
+}, {
+	responsive: true
+});
+{% endif %}
+{% if plots.annot %}
+Plotly.newPlot('{{ cat }}-annot-pie-{{ idx }}', [{
+	type: 'pie',
+	values: {{ plots.annot.counts|tojson }},
+	labels: {{ plots.annot.names|tojson }}
+}], {
+	title: "{{ cat }} distribution in different regions",
+	font: {size: 14}
+}, {
+	responsive: true
+});
+{% endif %}
+{% if plots.motif %}
+Plotly.newPlot('{{ cat }}-motif-bar-{{ idx }}', [{
+	type: 'bar',
+	y: {{ plots.motif.counts|tojson }},
+	x: {{ plots.motif.motifs|tojson }}
+}], {
+	title: "{{ cat }} motif distribution",
+	font: {size: 14},
+	yaxis: {
+		title: {
+			text: "{{ ylab }}"
+		}
+	}
+}, {
+	responsive: true
+});
+{% endif %}
+{% for key, xlab in [('repeat', 'Repeat number'), ('length', 'Length')] if plots[key] %}
+Plotly.newPlot('{{ cat }}-{{ key }}-line-{{ idx }}', {{ plots[key]|tojson }}, {
+	title: "{{ cat }} {{ key }} distribution",
+	font: {size: 14},
+	yaxis: {
+		title: {
+			text: "{{ ylab }}"
+		}
+	},
+	xaxis: {
+		title: {
+			text: "{{ xlab }}"
+		}
+	}
+}, {
+	responsive: true
+});
+{% endfor %}
+"""
+
+def load_resource_template(name):
+	from PySide6.QtCore import QFile, QIODevice, QTextStream
+
+	f = QFile(':/template/{}'.format(name))
+
+	if not f.open(QIODevice.ReadOnly | QFile.Text):
+		return None
+
+	content = QTextStream(f).readAll()
+	f.close()
+	return content
+
+STATS_TEMPLATES = None
+
+#jinja2 is imported and templates are compiled on first use, the
+#environment caches them, stats.html is loaded from qt resource
+def get_stats_templates():
+	global STATS_TEMPLATES
+
+	if STATS_TEMPLATES is None:
+		import jinja2
+
+		STATS_TEMPLATES = jinja2.Environment(
+			loader = jinja2.ChoiceLoader([
+				jinja2.DictLoader({
+					'macros.html': STATS_MACROS_TEMPLATE,
+					'meta.html': STATS_META_TEMPLATE,
+					'html.html': STATS_HTML_TEMPLATE,
+					'plot.js': STATS_PLOT_TEMPLATE
+				}),
+				jinja2.FunctionLoader(load_resource_template)
+			]),
+			trim_blocks = True,
+			lstrip_blocks = True
+		)
+
+	return STATS_TEMPLATES
+
 class KraitBaseStatistics:
 	_size = None
 	rep_cat = 1
@@ -101,419 +345,120 @@ class KraitBaseStatistics:
 	def json(self):
 		return json.dumps(self.result_stats)
 
-	def summary_table(self):
-		return """
-		<div class="row">
-			<div class="col">
-				<h3>{}</h3>
-				<h4 class="mt-3">Summary statistics</h4>
-				<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%">
-					<thead>
-						<tr>
-							<th>Total counts</th>
-							<th>Total length (bp)</th>
-							<th>Average length (bp)</th>
-							<th>Sequence coverage (%)</th>
-							<th>Relative abundance (loci/{})</th>
-							<th>Relative density (bp/{})</th>
-						</tr>
-					</thead>
-					<tbody class="table-group-divider">
-						<tr bgcolor="#f2f2f2">
-							<td align="center">{}</td>
-							<td align="center">{}</td>
-							<td align="center">{}</td>
-							<td align="center">{}</td>
-							<td align="center">{}</td>
-							<td align="center">{}</td>
-						</tr>
-					</tbody>
-				</table>
-			</div>
-		</div>
-		""".format(
-			self.title,
-			self.uname,
-			self.uname,
-			self.result_stats['total_counts'],
-			self.result_stats['total_length'],
-			self.result_stats['average_length'],
-			self.result_stats['coverage'],
-			self.result_stats['frequency'],
-			self.result_stats['density']
-		)
-
-	def cssr_table(self):
-		return """
-		<div class="row mt-3">
-			<div class="col">
-				<h4 class="mt-3">Summary statistics</h4>
-				<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%" class="mt-3">
-					<thead>
-						<tr>
-							<th></th>
-							<th>Counts</th>
-						</tr>
-					</thead>
-					<tbody class="table-group-divider">
-						<tr bgcolor="#f2f2f2">
-							<th>Total number of individual microsatellites forming compound microsatellites</th>
-							<td align="center">{}</td>
-						</tr>
-					</tbody>
-				</table>
-			</div>
-		</div>
-		""".format(self.result_stats['total_cssrs'])
-
-	def meta(self):
-		heads = {
-			'type_stats': "Motif type statistics",
-			'annot_stats': "Annotation statistics"
-		}
-
-		titles = [
-			('type_stats', ["Motif type"]),
-			('annot_stats', ["Feature"])
-		]
-
-		tables = []
-		tables.append(self.summary_table())
-
-		if 'total_cssrs' in self.result_stats:
-			tables.append(self.cssr_table())
+	def get_sections(self, keys):
+		sections = []
 
-		for k, title in titles:
-			if k not in self.result_stats:
+		for k in keys:
+			if not self.result_stats.get(k):
 				continue
 
-			if not self.result_stats[k]:
-				continue
-
-			table = ['''<div class="row mt-3"><div class="col"><h4>{}</h4>\n'''.format(heads[k])]
-			table.append('''<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%">\n''')
-			title.extend(["Total count", "Total length (bp)", "Percentage (%)", "Average length (bp)",
+			columns = list(STATS_COLUMNS[k])
+			columns.extend(["Total count", "Total length (bp)", "Percentage (%)", "Average length (bp)",
 				"Frequency (loci/{})".format(self.uname), "Density (bp/{})".format(self.uname)])
 
-			table.append('''<thead>\n<tr>{}</tr>\n</thead>\n<tbody class="table-group-divider">\n'''.format(
-				''.join("<th>{}</th>\n".format(t) for t in title)))
-
-			i = 0
-			for row in self.result_stats[k]:
-				i += 1
-				color = ['white', '#f2f2f2'][i%2]
-				datas = ''.join('''<td align="center">{}</td>\n'''.format(col) for col in row)
-				table.append('''<tr bgcolor="{}">{}</tr>\n'''.format(color, datas))
+			sections.append({
+				'key': k,
+				'head': STATS_HEADS[k],
+				'columns': columns,
+				'rows': self.result_stats[k]
+			})
+
+		return sections
+
+	def get_distributions(self, key):
+		datasets = {}
+		for row in self.result_stats[key]:
+			if row[0] not in datasets:
+				datasets[row[0]] = []
+			datasets[row[0]].append((row[1], row[6]))
+
+		data = []
+		for t in datasets:
+			xs = []
+			ys = []
+			for x, y in sorted(datasets[t]):
+				xs.append(x)
+				ys.append(y)
+
+			data.append({
+				'name': t,
+				'mode': 'lines+markers',
+				'x': xs,
+				'y': ys
+			})
+
+		return data
+
+	def get_plots(self):
+		plots = {}
 
-			table.append("</tbody>\n</table>\n</div>\n</div>\n")
-			tables.append('\n'.join(table))
+		if self.result_stats.get('type_stats'):
+			rows = self.result_stats['type_stats']
+			plots['type'] = {
+				'names': [row[0] for row in rows],
+				'counts': [row[1] for row in rows],
+				'lengths': [row[2] for row in rows]
+			}
+
+		if self.result_stats.get('annot_stats'):
+			rows = self.result_stats['annot_stats']
+			plots['annot'] = {
+				'names': [row[0] for row in rows],
+				'counts': [row[1] for row in rows]
+			}
+
+		if self.result_stats.get('motif_stats'):
+			rows = sorted(self.result_stats['motif_stats'], key=lambda x: (len(x[1]), -x[2]))
+			plots['motif'] = {
+				'motifs': [row[1] for row in rows],
+				'counts': [row[6] for row in rows]
+			}
+
+		if self.result_stats.get('repeat_stats'):
+			plots['repeat'] = self.get_distributions('repeat_stats')
+
+		if self.result_stats.get('length_stats'):
+			plots['length'] = self.get_distributions('length_stats')
 
-		return '\n'.join(tables)
+		return plots
 
-	def html(self):
-		heads = {
-			'type_stats': "Motif type statistics",
-			'annot_stats': "Annotation statistics",
-			'motif_stats': "Motif statistics",
-			'repeat_stats': "Repeat statistics",
-			'length_stats': "Length statistics",
-			'complex_stats': "Complexity statistics"
+	def get_context(self):
+		return {
+			'title': self.title,
+			'cat': self.stype,
+			'idx': self.fastx['id'],
+			'uname': self.uname,
+			'stats': self.result_stats,
+			'meta_sections': self.get_sections(STATS_META_KEYS),
+			'html_sections': self.get_sections(STATS_HTML_KEYS),
+			'plots': self.get_plots(),
+			'ylab': "Frequency (loci/{})".format(self.uname)
 		}
 
-		titles = [
-			('type_stats', ["Motif type"]),
-			('annot_stats', ["Feature"]),
-			('motif_stats', ["Motif"]),
-			('repeat_stats', ["Motif type", "Repeat"]),
-			('length_stats', ["Motif type", "Length"]),
-			('complex_stats', ["Complexity"])
-		]
-
-		tables = []
-		tables.append(self.summary_table())
-
-		if 'total_cssrs' in self.result_stats:
-			tables.append(self.cssr_table())
-
-		for k, title in titles:
-			if k not in self.result_stats:
-				continue
-
-			if not self.result_stats[k]:
-				continue
-
-			table = ['''<div class="row mt-3"><div class="col"><h4>{}</h4>\n'''.format(heads[k])]
-			table.append('''<table class="table" cellspacing="0" align="center" cellpadding="10" width="98%">\n''')
-			title.extend(["Total count", "Total length (bp)", "Percentage (%)", "Average length (bp)",
-				"Frequency (loci/{})".format(self.uname), "Density (bp/{})".format(self.uname)])
-
-			table.append('''<thead>\n<tr>{}</tr>\n</thead>\n<tbody class="table-group-divider">\n'''.format(
-				''.join("<th>{}</th>\n".format(t) for t in title)))
-
-			i = 0
-			for row in self.result_stats[k]:
-				i += 1
-				color = ['white', '#f2f2f2'][i%2]
-				datas = ''.join('''<td align="center">{}</td>\n'''.format(col) for col in row)
-				table.append('''<tr bgcolor="{}">{}</tr>\n'''.format(color, datas))
-
-			table.append("</tbody>\n</table>\n</div>\n</div>\n")
-			tables.append('\n'.join(table))
-
-			if k == 'type_stats':
-				tables.append('''
-				<div class="row mt-3">
-					<div class="col-4">
-						<div id="{cat}-count-pie-{idx}"></div>
-					</div>
-					<div class="col-4">
-						<div id="{cat}-length-pie-{idx}"></div>
-					</div>
-					<div class="col-4">
-						<div id="{cat}-annot-pie-{idx}"></div>
-					</div>
-				</div>
-				'''.format(
-					cat = self.stype,
-					idx = self.fastx['id']
-				))
-
-			elif k == 'motif_stats':
-				tables.append('''
-				<div class="row mt-3">
-					<div class="col-12">
-						<div id="{cat}-motif-bar-{idx}"></div>
-					</div>
-				</div>
-				'''.format(
-					cat = self.stype,
-					idx = self.fastx['id']
-				))
+	def render(self, name, context=None):
+		if context is None:
+			context = self.get_context()
 
-			elif k == 'repeat_stats':
-				tables.append('''
-				<div class="row mt-3">
-					<div class="col-12">
-						<div id="{cat}-repeat-line-{idx}"></div>
-					</div>
-				</div>
-				'''.format(
-					cat = self.stype,
-					idx = self.fastx['id']
-				))
+		template = get_stats_templates().get_template(name)
+		return ''.join(template.generate(context))
 
-			elif k == 'length_stats':
-				tables.append('''
-				<div class="row mt-3">
-					<div class="col-12">
-						<div id="{cat}-length-line-{idx}"></div>
-					</div>
-				</div>
-				'''.format(
-					cat = self.stype,
-					idx = self.fastx['id']
-				))
+	def meta(self):
+		return self.render('meta.html')
 
-		return '\n'.join(tables)
+	def html(self):
+		return self.render('html.html')
 
 	def plot(self):
-		plots = []
-
-		if 'type_stats' in self.result_stats and self.result_stats['type_stats']:
-			names = []
-			counts = []
-			lengths = []
-
-			for row in self.result_stats['type_stats']:
-				names.append(row[0])
-				counts.append(row[1])
-				lengths.append(row[2])
-
-			plots.append("""
-				Plotly.newPlot('{cat}-count-pie-{idx}', [{{
-					type: 'pie',
-					values: [{counts}],
-					labels: [{names}]
-				}}], {{
-					title: "{cat} count distribution",
-					font: {{size: 14}}
-				}}, {{
-					responsive: true
-				}});
-
-				Plotly.newPlot('{cat}-length-pie-{idx}', [{{
-					type: 'pie',
-					values: [{lengths}],
-					labels: [{names}]
-				}}], {{
-					title: "{cat} length distribution",
-					font: {{size: 14}}
-				}}, {{
-					responsive: true
-				}});
-			""".format(
-				cat = self.stype,
-				idx = self.fastx['id'],
-				names = ','.join("'{}'".format(n) for n in names),
-				counts = ','.join(map(str, counts)),
-				lengths = ','.join(map(str, lengths))
-			))
-
-		if 'annot_stats' in self.result_stats and self.result_stats['annot_stats']:
-			names = []
-			counts = []
-
-			for row in self.result_stats['annot_stats']:
-				names.append(row[0])
-				counts.append(row[1])
-
-			plots.append("""
-				Plotly.newPlot('{cat}-annot-pie-{idx}', [{{
-					type: 'pie',
-					values: [{counts}],
-					labels: [{names}]
-				}}], {{
-					title: "{cat} distribution in different regions",
-					font: {{size: 14}}
-				}}, {{
-					responsive: true
-				}});
-			""".format(
-				cat = self.stype,
-				idx = self.fastx['id'],
-				names = ','.join("'{}'".format(n) for n in names),
-				counts = ','.join(map(str, counts))
-			))
-
-		if 'motif_stats' in self.result_stats and self.result_stats['motif_stats']:
-			motifs = []
-			counts = []
-
-			for row in sorted(self.result_stats['motif_stats'], key=lambda x: (len(x[1]), -x[2])):
-				motifs.append(row[1])
-				counts.append(row[6])
-
-			plots.append("""
-				Plotly.newPlot('{cat}-motif-bar-{idx}', [{{
-					type: 'bar',
-					y: [{counts}],
-					x: [{motifs}]
-				}}], {{
-					title: "{cat} motif distribution",
-					font: {{size: 14}},
-					yaxis: {{
-						title: {{
-							text: "{ylab}"
-						}}
-					}}
-				}}, {{
-					responsive: true
-				}});
-			""".format(
-				cat = self.stype,
-				idx = self.fastx['id'],
-				motifs = ','.join("'{}'".format(n) for n in motifs),
-				counts = ','.join(map(str, counts)),
-				ylab = "Frequency (loci/{})".format(self.uname)
-			))
-
-		if 'repeat_stats' in self.result_stats and self.result_stats['repeat_stats']:
-			datasets = {}
-			for row in self.result_stats['repeat_stats']:
-				if row[0] not in datasets:
-					datasets[row[0]] = []
-				datasets[row[0]].append((row[1], row[6]))
-
-			data = []
-			for t in datasets:
-				xs = []
-				ys = []
-				for x, y in sorted(datasets[t]):
-					xs.append(x)
-					ys.append(y)
-
-				data.append({
-					'name': t,
-					'mode': 'lines+markers',
-					'x': xs,
-					'y': ys
-				})
-
-			plots.append("""
-				Plotly.newPlot('{cat}-repeat-line-{idx}', {data}, {{
-					title: "{cat} repeat distribution",
-					font: {{size: 14}},
-					yaxis: {{
-						title: {{
-							text: "{ylab}"
-						}}
-					}},
-					xaxis: {{
-						title: {{
-							text: "Repeat number"
-						}}
-					}}
-				}}, {{
-					responsive: true
-				}});
-			""".format(
-				cat = self.stype,
-				idx = self.fastx['id'],
-				data = json.dumps(data),
-				motifs = ','.join("'{}'".format(n) for n in motifs),
-				counts = ','.join(map(str, counts)),
-				ylab = "Frequency (loci/{})".format(self.uname)
-			))
-
-		if 'length_stats' in self.result_stats and self.result_stats['length_stats']:
-			datasets = {}
-			for row in self.result_stats['length_stats']:
-				if row[0] not in datasets:
-					datasets[row[0]] = []
-				datasets[row[0]].append((row[1], row[6]))
-
-			data = []
-			for t in datasets:
-				xs = []
-				ys = []
-				for x, y in sorted(datasets[t]):
-					xs.append(x)
-					ys.append(y)
-
-				data.append({
-					'name': t,
-					'mode': 'lines+markers',
-					'x': xs,
-					'y': ys
-				})
-
-			plots.append("""
-				Plotly.newPlot('{cat}-length-line-{idx}', {data}, {{
-					title: "{cat} length distribution",
-					font: {{size: 14}},
-					yaxis: {{
-						title: {{
-							text: "{ylab}"
-						}}
-					}},
-					xaxis: {{
-						title: {{
-							text: "Length"
-						}}
-					}}
-				}}, {{
-					responsive: true
-				}});
-			""".format(
-				cat = self.stype,
-				idx = self.fastx['id'],
-				data = json.dumps(data),
-				motifs = ','.join("'{}'".format(n) for n in motifs),
-				counts = ','.join(map(str, counts)),
-				ylab = "Frequency (loci/{})".format(self.uname)
-			))
-
-		return '\n'.join(plots)
+		return self.render('plot.js')
+
+	def reports(self):
+		#build the context once and share it by all reports
+		context = self.get_context()
+		return (
+			self.render('html.html', context),
+			self.render('meta.html', context),
+			self.render('plot.js', context)
+		)
 
 class KraitSTRStatistics(KraitBaseStatistics):
 	title = "Perfect microsatellite"
@@ -715,951 +660,3 @@ class KraitISSRStatistics(KraitSTRStatistics):
 	rep_cat = 4
 	title = "Imperfect microsatellite"
 	stype = 'issr'
-
-class KraitExportStatistics:
-	def __init__(self):
-		self.uname = 'Mb'
-		self.fastx_files = [f for f in DB.get_objects("SELECT * FROM fastx")]
-		self.fastx_datas = []
-		sql = "SELECT type,json FROM stats_{}"
-
-		for fastx_file in self.fastx_files:
-			res = DB.get_objects(sql.format(fastx_file.id))
-			self.fastx_datas.append({r.type: json.loads(r.json) for r in res})
-
-	def get_style_css(self):
-		css_files = [
-			":/scripts/tabler.min.css",
-			":/scripts/datatables.min.css"
-		]
-
-		styles = []
-		for css_file in css_files:
-			f = QFile(css_file)
-			text = None
-
-			if f.open(QIODevice.ReadOnly | QFile.Text):
-				text = QTextStream(f).readAll()
-
-			f.close()
-
-			if text:
-				styles.append(text)
-
-		return '\n'.join(styles)
-
-	def get_script_js(self):
-		js_files = [
-			":/scripts/tabler.min.js",
-			":/scripts/datatables.min.js",
-			":/scripts/echarts.min.js"
-		]
-
-		js = []
-		for js_file in js_files:
-			f = QFile(js_file)
-			text = None
-
-			if f.open(QIODevice.ReadOnly | QFile.Text):
-				text = QTextStream(f).readAll()
-
-			f.close()
-
-			if text:
-				js.append(text)
-
-		return '\n'.join(js)
-
-	def get_file_summary_table(self):
-		rows = []
-
-		for f in self.fastx_files:
-			rows.append([
-				f.id,
-				f.name,
-				f.format,
-				f.size,
-				f.count,
-				round(f.gc, 2),
-				f.ns,
-				f.avglen,
-				f.minlen,
-				f.maxlen
-			])
-
-		return {'input-file-table': rows}
-
-	def get_repeat_summary_table(self, rtype, fastx, data):
-		rtype = rtype.split('_')[0]
-		tid = '{}-summary-table-{}'.format(rtype, fastx)
-		self.uname = data['unit']
-		return {tid: [[
-			data['total_counts'],
-			data['total_length'],
-			data['average_length'],
-			data['coverage'],
-			data['frequency'],
-			data['density']
-		]]}
-
-	def get_cssr_summary_table(self, fastx, data):
-		tid = 'cssr-total-table-{}'.format(fastx)
-		return {tid: [["Total number of individual microsatellites forming compound microsatellites", data['total_cssrs']]]}
-
-	def get_repeat_detail_table(self, rtype, stype, fastx, data):
-		rtype = rtype.split('_')[0]
-		stype = stype.split('_')[0]
-		tid = '{}-{}-table-{}'.format(rtype, stype, fastx)
-		return {tid: data}
-
-	def get_stats_tables(self):
-		stats = ['type_stats', 'annot_stats', 'motif_stats',
-			'repeat_stats', 'length_stats', 'complex_stats'
-		]
-
-		tables = {}
-		tables.update(self.get_file_summary_table())
-
-		for i, f in enumerate(self.fastx_files):
-			datas = self.fastx_datas[i]
-
-			for k, data in datas.items():
-				if k == 'cssr_stats':
-					tables.update(self.get_cssr_summary_table(f.id, data))
-				
-				tables.update(self.get_repeat_summary_table(k, f.id, data))
-				
-				for s in stats:
-					if s in data and data[s]:
-						tables.update(self.get_repeat_detail_table(k, s, f.id, data[s]))
-
-		return tables
-
-	def draw_pie_plot(self, pid, title, name, data):
-		pvar = pid.replace('-', '_')
-		return """
-			var {pvar} = echarts.init(document.getElementById('{pid}'));
-			{pvar}.setOption({{
-				title: {{
-					text: "{title}"
-				}},
-				tooltip: {{
-					trigger: 'item',
-					formatter: '{{b}}<br>{{c}}, {{d}}%'
-				}},
-				toolbox: {{
-					show: true,
-					feature: {{
-						dataView: {{readOnly: true}},
-						saveAsImage: {{}}
-					}}
-				}},
-				series: [{{
-					name: "{name}",
-					type: 'pie',
-					radius: ['40%', '70%'],
-					label: {{
-						show: true,
-					}},
-					emphasis: {{
-						label: {{
-							show: true,
-							fontSize: 32,
-							fontWeight: 'bold'
-						}}
-					}},
-					data: {data}
-				}}]
-			}});
-			window.addEventListener('resize', function(){{
-				{pvar}.resize();
-			}});
-		""".format(pvar=pvar, pid=pid, title=title, name=name, data=data)
-
-	def draw_bar_plot(self, pid, title, datasets):
-		pvar = pid.replace('-', '_')
-		return """
-			var {pvar}_source = {datasets};
-
-			var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
-			{pvar}_height.attr('value', 400).attr('type', 'number');
-			$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
-
-			var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
-			for (key in {pvar}_source) {{
-				{pvar}_select.append($("<option>").attr('value', key).text(key));
-			}}
-			$('<span>').text('Data type:').prependTo($('#{pid}').parent());
-
-			var {pvar} = echarts.init(document.getElementById('{pid}'));
-			var {pvar}_option = {{
-				title: {{
-					text: "{title}"
-				}},
-				tooltip: {{
-					trigger: 'item'
-				}},
-				legend: {{}},
-				toolbox: {{
-					show: true,
-					feature: {{
-						dataView: {{readOnly: true}},
-						saveAsImage: {{}}
-					}}
-				}},
-				xAxis: {{
-					type: 'category',
-					axisLabel: {{
-						rotate: 30
-					}}
-				}},
-				yAxis: {{
-					type: 'value',
-					name: "SSR count",
-					nameGap: 50,
-					nameLocation: 'center',
-					nameTextStyle: {{
-						fontSize: 16,
-					}}
-				}},
-				series: {pvar}_source[Object.keys({pvar}_source)[0]]
-			}};
-
-			{pvar}.setOption({pvar}_option);
-			{pvar}_select.on('change', function() {{
-				{pvar}_option.series = {pvar}_source[this.value];
-				{pvar}_option.yAxis.name = this.value;
-				{pvar}.setOption({pvar}_option);
-			}});
-			{pvar}_height.on('change', function(){{
-				$('#{pid}').height(this.value);
-				window.dispatchEvent(new Event('resize'));
-			}});
-
-			window.addEventListener('resize', function(){{
-				{pvar}.resize();
-			}});
-		""".format(pvar=pvar, pid=pid, title=title, datasets=datasets)
-
-	def draw_line_plot(self, pid, title, xlab, datasets):
-		pvar = pid.replace('-', '_')
-		return """
-			var {pvar}_source = {datasets};
-
-			var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
-			{pvar}_height.attr('value', 400).attr('type', 'number');
-			$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
-
-			var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
-			for (key in {pvar}_source) {{
-				{pvar}_select.append($("<option>").attr('value', key).text(key));
-			}}
-			$('<span>').text('Data type:').prependTo($('#{pid}').parent());
-
-			var {pvar} = echarts.init(document.getElementById('{pid}'));
-
-			var {pvar}_option = {{
-				title: {{
-					text: "{title}"
-				}},
-				tooltip: {{
-					trigger: 'item'
-				}},
-				toolbox: {{
-					show: true,
-					feature: {{
-						dataView: {{readOnly: true}},
-						saveAsImage: {{}}
-					}}
-				}},
-				legend: {{}},
-				xAxis: {{
-					name: "{xlab}",
-					nameLocation: 'center'
-				}},
-				yAxis: {{
-					name: "SSR count",
-					nameLocation: 'center',
-					nameGap: 50,
-					nameLocation: 'center',
-					nameTextStyle: {{
-						fontSize: 16,
-					}}
-				}},
-				series: {pvar}_source[Object.keys({pvar}_source)[0]]
-			}};
-
-			{pvar}.setOption({pvar}_option);
-			{pvar}_select.on('change', function() {{
-				{pvar}_option.series = {pvar}_source[this.value];
-				{pvar}_option.yAxis.name = this.value;
-				{pvar}.setOption({pvar}_option);
-			}});
-			{pvar}_height.on('change', function(){{
-				$('#{pid}').height(this.value);
-				window.dispatchEvent(new Event('resize'));
-			}});
-
-			window.addEventListener('resize', function(){{
-				{pvar}.resize();
-			}});
-		""".format(pvar=pvar, pid=pid, title=title, datasets=datasets, xlab=xlab)
-
-	def get_stats_plots(self):
-		plots = {}
-
-		for i, f in enumerate(self.fastx_files):
-			datas = self.fastx_datas[i]
-
-			for k, datai in datas.items():
-				rtype = k.split('_')[0]
-
-				for s in datai:
-					if s == 'type_stats':
-						counts = []
-						lengths = []
-
-						for row in datai[s]:
-							counts.append({'value': row[1], 'name': row[0]})
-							lengths.append({'value': row[2], 'name': row[0]})
-
-						pid = "{}-count-pie-{}".format(rtype, f.id)
-						title = "{} count distribution".format(rtype)
-						name = "{} count".format(rtype)
-						plots[pid] = self.draw_pie_plot(pid, title, name, counts)
-
-						pid = "{}-length-pie-{}".format(rtype, f.id)
-						title = "{} length distribution".format(rtype)
-						name = "{} length".format(rtype)
-						plots[pid] = self.draw_pie_plot(pid, title, name, counts)
-
-					if s == 'annot_stats':
-						counts = []
-
-						for row in datai[s]:
-							counts.append({'value': row[1], 'name': row[0]})
-
-						if counts:
-							pid = "{}-annot-pie-{}".format(rtype, f.id)
-							title = "{} count in different gene regions".format(rtype)
-							name = "{} annotation".format(rtype)
-							plots[pid] = self.draw_pie_plot(pid, title, name, counts)
-
-					if s == 'motif_stats':
-						data_types = {
-							'SSR count': 2,
-							'SSR length': 3,
-							'SSR frequency': 6,
-							'SSR density': 7
-						}
-						
-						motif_pdata = {}
-
-						for dtype, dindex in data_types.items():
-							datasets = {}
-							for row in datai[s]:
-								if row[0] not in datasets:
-									datasets[row[0]] = []
-
-								datasets[row[0]].append((row[1], row[dindex]))
-
-							series = []
-							for t in datasets:
-								data = []
-								for x, y in sorted(datasets[t]):
-									data.append([x, y])
-
-								series.append({
-									'name': t,
-									'type': 'bar',
-									'stack': 'stack',
-									'data': data,
-								})
-
-							motif_pdata[dtype] = series
-
-						pid = "{}-motif-bar-{}".format(rtype, f.id)
-						title = "{} motif distribution".format(rtype)
-						plots[pid] = self.draw_bar_plot(pid, title, motif_pdata)
-
-					if s == 'repeat_stats':
-						data_types = {
-							'SSR count': 2,
-							'SSR length': 3,
-							'SSR frequency': 6,
-							'SSR density': 7
-						}
-						
-						repeat_pdata = {}
-						for dtype, dindex in data_types.items():
-							datasets = {}
-							for row in datai[s]:
-								if row[0] not in datasets:
-									datasets[row[0]] = []
-								datasets[row[0]].append((row[1], row[dindex]))
-
-							series = []
-							for t in datasets:
-								data = []
-								for x, y in sorted(datasets[t]):
-									data.append([x, y])
-
-								series.append({
-									'name': t,
-									'type': 'line',
-									'smooth': 1,
-									'data': data,
-								})
-
-							repeat_pdata[dtype] = series
-
-						pid = "{}-repeat-line-{}".format(rtype, f.id)
-						title = "{} repeat distribution".format(rtype)
-						xlab = "Repeat number"
-						plots[pid] = self.draw_line_plot(pid, title, xlab, repeat_pdata)
-
-					if s == 'length_stats':
-						data_types = {
-							'SSR count': 2,
-							'SSR length': 3,
-							'SSR frequency': 6,
-							'SSR density': 7
-						}
-						
-						repeat_pdata = {}
-						for dtype, dindex in data_types.items():
-							datasets = {}
-							for row in datai[s]:
-								if row[0] not in datasets:
-									datasets[row[0]] = []
-								datasets[row[0]].append((row[1], row[dindex]))
-
-							series = []
-							for t in datasets:
-								data = []
-
-								for x, y in sorted(datasets[t]):
-									data.append([x, y])
-
-								series.append({
-									'name': t,
-									'type': 'line',
-									'smooth': 1,
-									'data': data
-								})
-
-							repeat_pdata[dtype] = series
-
-						pid = "{}-length-line-{}".format(rtype, f.id)
-						title = "{} length distribution".format(rtype)
-						xlab = "Length"
-						plots[pid] = self.draw_line_plot(pid, title, xlab, repeat_pdata)
-
-		return plots
-
-	def draw_line_bar_mix_plot(self, pid, names, datasets):
-		pvar = pid.replace('-', '_')
-		return """
-		var {pvar}_source = {datasets};
-
-		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
-		{pvar}_height.attr('value', 400).attr('type', 'number');
-		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
-
-		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
-		for (key in {pvar}_source) {{
-			{pvar}_select.append($("<option>").attr('value', key).text(key));
-		}}
-		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
-
-		var {pvar} = echarts.init(document.getElementById('{pid}'));
-		var {pvar}_option = {{
-			tooltip: {{
-				trigger: 'item'
-			}},
-			toolbox: {{
-				show: true,
-				feature: {{
-					dataView: {{readOnly: true}},
-					saveAsImage: {{}},
-					magicType: {{
-						type: ['bar', 'line']
-					}},
-				}}
-			}},
-			xAxis: {{
-				type: 'category',
-				data: {names},
-				axisLabel: {{
-					rotate: 30
-				}}
-			}},
-			yAxis: {{
-				type: 'value',
-				name: Object.keys({pvar}_source)[0],
-				nameGap: 50,
-				nameLocation: 'center',
-				nameTextStyle: {{
-					color: '#000',
-					fontSize: 16,
-				}}
-			}},
-			series: [{{
-				data: {pvar}_source[Object.keys({pvar}_source)[0]],
-				type: 'bar'
-			}}]
-		}};
-		{pvar}.setOption({pvar}_option);
-		{pvar}_select.on('change', function() {{
-			{pvar}_option.yAxis.name = this.value;
-			{pvar}_option.series[0].data = {pvar}_source[this.value];
-			{pvar}.setOption({pvar}_option);
-		}});{pvar}_height.on('change', function(){{
-			$('#{pid}').height(this.value);
-			window.dispatchEvent(new Event('resize'));
-		}});
-
-		{pvar}_height.on('change', function(){{
-			$('#{pid}').height(this.value);
-			window.dispatchEvent(new Event('resize'));
-		}});
-
-		window.addEventListener('resize', function(){{
-			{pvar}.resize();
-		}});
-		""".format(pid=pid, pvar=pvar, names=names, datasets=datasets)
-
-	def draw_stack_bar_mix_plot(self, pid, names, datasets):
-		pvar = pid.replace('-', '_')
-		return """
-		var {pvar}_source = {datasets};
-
-		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
-		{pvar}_height.attr('value', 400).attr('type', 'number');
-		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
-
-		var {pvar}_circos = $('<select>', {{id: '{pvar}-circos'}}).prependTo($('#{pid}').parent());
-		{pvar}_circos.append($("<option>").attr('value', 'bar').text('bar'));
-		{pvar}_circos.append($("<option>").attr('value', 'circle').text('circle'));
-		$('<span>').addClass('ms-3').text('Plot type:').prependTo($('#{pid}').parent());
-
-		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
-		for (key in {pvar}_source) {{
-			{pvar}_select.append($("<option>").attr('value', key).text(key));
-		}}
-		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
-
-		var {pvar} = echarts.init(document.getElementById('{pid}'));
-		var {pvar}_option_circos = {{
-			angleAxis: {{
-				type: 'category',
-				data: {names}
-			}},
-			tooltip: {{
-				trigger: 'item'
-			}},
-			toolbox: {{
-				show: true,
-				feature: {{
-					dataView: {{readOnly: true}},
-					saveAsImage: {{}}
-				}}
-			}},
-			radiusAxis: {{}},
-			polar: {{}},
-			legend: {{}},
-			series: []
-		}};
-
-		var {pvar}_option_bar = {{
-			legend: {{}},
-			tooltip: {{
-				trigger: 'item'
-			}},
-			toolbox: {{
-				show: true,
-				feature: {{
-					dataView: {{readOnly: true}},
-					saveAsImage: {{}}
-				}}
-			}},
-			yAxis: {{
-				type: 'category',
-				data: {names}
-			}},
-			xAxis: {{
-				type: 'value',
-				name: Object.keys({pvar}_source)[0],
-				nameGap: 50,
-				nameLocation: 'center',
-				nameTextStyle: {{
-					color: '#000',
-					fontSize: 16,
-				}}
-			}},
-			series: {pvar}_source[Object.keys({pvar}_source)[0]]
-		}};
-
-		var {pvar}_option = {pvar}_option_bar;
-		{pvar}.setOption({pvar}_option);
-
-		{pvar}_circos.on('change', function(){{
-			var {pvar}_series = {pvar}_source[{pvar}_select.val()];
-			if (this.value === 'circle') {{
-				{pvar}_option = {pvar}_option_circos;
-
-				for (var i = 0; i < {pvar}_series.length; i++) {{
-					{pvar}_series[i].coordinateSystem = 'polar';
-					{pvar}_series[i].barCategoryGap = 0;
-				}}
-
-			}} else {{
-				{pvar}_option = {pvar}_option_bar;
-
-				for (var i = 0; i < {pvar}_series.length; i++) {{
-					{pvar}_series[i].coordinateSystem = 'cartesian2d';
-					delete {pvar}_series[i].barCategoryGap;
-				}}
-			}}
-			{pvar}_option.series = {pvar}_series;
-			{pvar}.clear();
-			{pvar}.setOption({pvar}_option);
-		}});
-
-		{pvar}_select.on('change', function() {{
-			var {pvar}_series = {pvar}_source[this.value];
-			if ({pvar}_circos.val() === 'circle') {{
-				{pvar}_option = {pvar}_option_circos;
-
-				for (var i = 0; i < {pvar}_series.length; i++) {{
-					{pvar}_series[i].coordinateSystem = 'polar';
-					{pvar}_series[i].barCategoryGap = 0;
-				}}
-
-			}} else {{
-				{pvar}_option = {pvar}_option_bar;
-
-				for (var i = 0; i < {pvar}_series.length; i++) {{
-					{pvar}_series[i].coordinateSystem = 'cartesian2d';
-					delete {pvar}_series[i].barCategoryGap;
-				}}
-			}}
-
-			//{pvar}_option.xAxis.name = this.value;
-			//{pvar}_option.series = {pvar}_source[this.value];
-			{pvar}_option.series = {pvar}_series;
-			{pvar}.clear();
-			{pvar}.setOption({pvar}_option);
-		}});
-
-		{pvar}_height.on('change', function(){{
-			$('#{pid}').height(this.value);
-			window.dispatchEvent(new Event('resize'));
-		}});
-
-		window.addEventListener('resize', function(){{
-			{pvar}.resize();
-		}});
-		""".format(pid=pid, pvar=pvar, names=names, datasets=datasets)
-
-	def draw_heatmap_plot(self, pid, xlabels, ylabels, datasets):
-		pvar = pid.replace('-', '_')
-		return """
-		var {pvar}_source = {datasets};
-
-		var {pvar}_height = $('<input>', {{id: '{pvar}-height'}}).prependTo($('#{pid}').parent());
-		{pvar}_height.attr('value', 400).attr('type', 'number');
-		$('<span>').addClass('ms-3').text('Plot height:').prependTo($('#{pid}').parent());
-
-		var {pvar}_select = $('<select>', {{id: '{pvar}-select'}}).prependTo($('#{pid}').parent());
-		for (key in {pvar}_source) {{
-			{pvar}_select.append($("<option>").attr('value', key).text(key));
-		}}
-		$('<span>').text('Data type:').prependTo($('#{pid}').parent());
-
-		var {pvar} = echarts.init(document.getElementById('{pid}'));
-		var {pvar}_option = {{
-			tooltip: {{
-				position: 'top'
-			}},
-			toolbox: {{
-				show: true,
-				feature: {{
-					dataView: {{readOnly: true}},
-					saveAsImage: {{}}
-				}}
-			}},
-			legend: {{}},
-			xAxis: {{
-				type: 'category',
-				data: {xlabels},
-				splitArea: {{
-					show: true
-				}},
-				axisLabel: {{
-					rotate: 30
-				}}
-			}},
-			yAxis: {{
-				type: 'category',
-				data: {ylabels},
-				splitArea: {{
-					show: true
-				}}
-			}},
-			visualMap: {{
-				calculable: true,
-				orient: 'horizontal',
-				left: 'center'
-			}},
-			series: {pvar}_source[Object.keys({pvar}_source)[0]]
-		}}
-		{pvar}.setOption({pvar}_option);
-		{pvar}_select.on('change', function() {{
-			{pvar}_option.series = {pvar}_source[this.value];
-			{pvar}.setOption({pvar}_option);
-		}});
-		{pvar}_height.on('change', function(){{
-			$('#{pid}').height(this.value);
-			window.dispatchEvent(new Event('resize'));
-		}});
-		window.addEventListener('resize', function(){{
-			{pvar}.resize();
-		}});
-		""".format(pid=pid, pvar=pvar, xlabels=xlabels, ylabels=ylabels, datasets=datasets)
-
-	def perform_comparative_analysis(self):
-		if len(self.fastx_files) < 2:
-			return {}, {}
-
-		ssr_summary = []
-		ssr_types = []
-		ssr_annot = []
-		ssr_motif = set()
-		annot_type = set()
-		motif_data = []
-		ssr_files = []
-
-		for i, f in enumerate(self.fastx_files):
-			datas = self.fastx_datas[i]
-			ssr_files.append(f.name)
-
-			for k, datai in datas.items():
-				if k != 'ssr_stats':
-					continue
-
-				ssr_summary.append([
-					f.id,
-					f.name,
-					datai['total_counts'],
-					datai['total_length'],
-					datai['average_length'],
-					datai['coverage'],
-					datai['frequency'],
-					datai['density']
-				])
-
-				for s in datai:
-					if s == 'type_stats':
-						rows = {row[0]: row for row in datai[s]}
-						item = [f.id, f.name]
-						for j in [1, 2, 5, 6]:
-							for m in ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']:
-								row = rows.get(m, None)
-
-								if row is None:
-									item.append(0)
-								else:
-									item.append(row[j])
-
-						ssr_types.append(item)
-
-					elif s == 'annot_stats':
-						annot_nums = {}
-						for row in datai[s]:
-							annot_type.add(row[0])
-							annot_nums[row[0]] = [row[1], row[2], row[5], row[6]]
-
-						ssr_annot.append(annot_nums)
-
-					elif s == 'motif_stats':
-						motif_nums = {}
-						for row in datai[s]:
-							ssr_motif.add(row[1])
-							motif_nums[row[1]] = [row[2], row[3], row[6], row[7]]
-
-						motif_data.append(motif_nums)
-
-		tables = {}
-		plots = {}
-
-		if ssr_summary:
-			tables['ssr-count-compare-table'] = ssr_summary
-			tables['ssr-type-compare-table'] = ssr_types
-		
-		summary_pdata = {
-			'SSR count': [],
-			'SSR length': [],
-			'SSR frequency': [],
-			'SSR density': []
-		}
-		for row in ssr_summary:
-			summary_pdata['SSR count'].append(row[2])
-			summary_pdata['SSR length'].append(row[3])
-			summary_pdata['SSR frequency'].append(row[6])
-			summary_pdata['SSR density'].append(row[7])
-
-		pid = 'ssr-summary-plot'
-
-		if summary_pdata:
-			plots[pid] = self.draw_line_bar_mix_plot(pid, ssr_files, summary_pdata)
-
-		type_pdata = {}
-		type_names = {
-			'SSR count': 2,
-			'SSR count percent': 2,
-			'SSR length': 8,
-			'SSR length percent': 8,
-			'SSR frequency': 14,
-			'SSR density': 20
-		}
-
-		for dtype, dindex in type_names.items():
-			type_pdata[dtype] = []
-			value_list = [[], [], [], [], [], []]
-
-			for row in ssr_types:
-				if 'percent' in dtype:
-					total = sum(row[dindex:dindex+6])
-
-					for j in range(6):
-						value_list[j].append(round(row[dindex+j]/total*100, 2))
-				else:
-					for j in range(6):
-						value_list[j].append(row[dindex+j])
-
-			ts = ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']
-			for l, t in enumerate(ts):
-				type_pdata[dtype].append({
-					'name': t,
-					'type': 'bar',
-					'stack': 'total',
-					'coordinateSystem': 'cartesian2d',
-					'data': value_list[l]
-				})
-
-		pid = 'ssr-type-compare-plot'
-
-		if ssr_types:
-			plots[pid] = self.draw_stack_bar_mix_plot(pid, ssr_files, type_pdata)
-
-		annot_pdata = {}
-		type_names = {
-			'SSR count': 0,
-			'SSR count percent': 0,
-			'SSR length': 1,
-			'SSR length percent': 1,
-			'SSR frequency': 2,
-			'SSR density': 3
-		}
-
-		annot_type = sorted(annot_type)
-		for dtype, dindex in type_names.items():
-			annot_pdata[dtype] = []
-			value_list = []
-			for at in range(len(annot_type)):
-				value_list.append([])
-
-			for nums in ssr_annot:
-				if 'percent' in dtype:
-					total = sum(num[dindex] for num in nums.values())
-
-				for i, at in enumerate(annot_type):
-					if at in nums:
-						sv = nums[at][dindex]
-					else:
-						sv = 0
-
-					if 'percent' in dtype:
-						value_list[i].append(round(sv/total*100, 2))
-					else:
-						value_list[i].append(sv)
-
-			for l, t in enumerate(annot_type):
-				annot_pdata[dtype].append({
-					'name': t,
-					'type': 'bar',
-					'stack': 'total',
-					'coordinateSystem': 'cartesian2d',
-					'data': value_list[l]
-				})
-
-		pid = 'ssr-annot-compare-plot'
-
-		if ssr_annot and ssr_annot[0]:
-			plots[pid] = self.draw_stack_bar_mix_plot(pid, ssr_files, annot_pdata)
-
-		type_names = {
-			'SSR count': 0,
-			'SSR length': 1,
-			'SSR frequency': 2,
-			'SSR density': 3
-		}
-		motif_pdata = {}
-
-		xlabels = sorted(ssr_motif, key=lambda x: (len(x), x))
-		ylabels = ssr_files
-		
-		for dtype, dindex in type_names.items():
-			motif_pdata[dtype] = []
-			value_list = [[], [], [], [], [], []]
-		
-			for y, nums in enumerate(motif_data):
-				for x, motif in enumerate(xlabels):
-					if motif in nums:
-						sv = nums[motif][dindex]
-					else:
-						sv = 0
-
-					value_list[len(motif)-1].append([x, y, sv])
-
-			ts = ['Mono', 'Di', 'Tri', 'Tetra', 'Penta', 'Hexa']
-			for l, t in enumerate(ts):
-				motif_pdata[dtype].append({
-					'name': t,
-					'type': 'heatmap',
-					'data': value_list[l]
-				})
-
-		pid = 'ssr-motif-compare-plot'
-
-		if motif_data:
-			plots[pid] = self.draw_heatmap_plot(pid, xlabels, ylabels, motif_pdata)
-
-		return tables, plots
-
-	def generate_summary_report(self):
-		f = QFile(':/template/stats.html')
-		f.open(QIODevice.ReadOnly | QFile.Text)
-		content = QTextStream(f).readAll()
-		f.close()
-
-		template = jinja2.Template(content)
-
-		styles = self.get_style_css()
-		scripts = self.get_script_js()
-		tables = self.get_stats_tables()
-		plots = self.get_stats_plots()
-
-		forms, charts = self.perform_comparative_analysis()
-		tables.update(forms)
-		plots.update(charts)
-
-		return template.render(
-			styles = styles,
-			scripts = scripts,
-			fastxs = self.fastx_files,
-			tables = tables,
-			plots = plots,
-			uname = self.uname
-		)
@@ -1,10 +1,20 @@
+import io
 import os
 import sys
 import gzip
+import zlib
 import struct
 import pyfastx
+import sqlite3
+import importlib.util
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
 
 from config import *
+from common import *
 from backend import *
 
 __all__ = ["check_fastx_format", "AttrDict", "get_fastx_info",
@@ -12,54 +22,158 @@ __all__ = ["check_fastx_format", "AttrDict", "get_fastx_info",
 			"product_size_format", "get_annotation_format",
 			'generate_tandem_marks', 'generate_primer_marks',
 			'get_feature_parents', 'get_file_size',
-			'get_stats_report'
+			'get_stats_report', 'get_export_compressions',
+			'open_export_file', 'get_export_formats'
 			]
 
-class AttrDict(dict):
-	def __getattr__(self, attr):
-		return self[attr]
+#uncompressed sizes keyed by path, size and mtime
+FILE_SIZE_CACHE = {}
 
 def get_file_size(fastx):
-	_size = os.path.getsize(fastx)
+	stat = os.stat(fastx)
 
-	if pyfastx.gzip_check(fastx):
-		#estimate gzip uncompressed size
-		#from https://github.com/turicas/rows
-		with open(fastx, 'rb') as fh:
-			fh.seek(-4, 2)
-			usize = struct.unpack("<I", fh.read())[0]
+	if not pyfastx.gzip_check(fastx):
+		return stat.st_size
 
-		if _size > usize:
-			i, v = 32, usize
+	key = (os.path.abspath(fastx), stat.st_size, stat.st_mtime_ns)
 
-			while v <= 2**32 and v < _size:
-				v = (1 << i) ^ usize
-				i += 1
+	if key not in FILE_SIZE_CACHE:
+		usize = get_index_file_size(fastx)
 
-			usize = v
+		if usize is None:
+			usize = get_bgzf_file_size(fastx)
 
-		_size = usize
+		if usize is None:
+			usize = estimate_gzip_file_size(fastx)
 
-	return _size
+		FILE_SIZE_CACHE[key] = usize
 
-def check_fastx_format(fastx):
-	if pyfastx.gzip_check(fastx):
-		fp = gzip.open(fastx, 'rt')
-	else:
-		fp = open(fastx)
+	return FILE_SIZE_CACHE[key]
+
+#the end of last record in pyfastx index is the uncompressed size
+def get_index_file_size(fastx):
+	index_file = get_index_file(fastx)
+
+	if not os.path.isfile(index_file):
+		return None
+
+	try:
+		conn = sqlite3.connect(index_file)
+
+		try:
+			tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+			if 'seq' in tables:
+				usize = conn.execute("SELECT MAX(boff+blen) FROM seq").fetchone()[0]
+			elif 'read' in tables:
+				usize = conn.execute("SELECT MAX(qoff+rlen)+1 FROM read").fetchone()[0]
+			else:
+				usize = None
+		finally:
+			conn.close()
+
+	except sqlite3.Error:
+		usize = None
+
+	return usize
+
+#sum the ISIZE of all blocks by walking BGZF block headers
+def get_bgzf_file_size(fastx):
+	usize = 0
+
+	with open(fastx, 'rb') as fh:
+		while True:
+			offset = fh.tell()
+			header = fh.read(18)
+
+			if not header:
+				return usize
+
+			if len(header) < 18 or header[:4] != b'\x1f\x8b\x08\x04':
+				return None
+
+			#BGZF has a single BC extra subfield with the block size
+			xlen, si1, si2, slen, bsize = struct.unpack('<H2BHH', header[10:18])
+
+			if xlen != 6 or (si1, si2) != (66, 67) or slen != 2:
+				return None
+
+			fh.seek(offset + bsize - 3)
+			tail = fh.read(4)
+
+			if len(tail) < 4:
+				return None
+
+			usize += struct.unpack('<I', tail)[0]
+
+#decompress the beginning of gzip and extrapolate by compression ratio,
+#the size is exact when the file is no larger than the sample
+def estimate_gzip_file_size(fastx, sample=8388608):
+	csize = os.path.getsize(fastx)
+	consumed = 0
+	usize = 0
+
+	with open(fastx, 'rb') as fh:
+		decomp = zlib.decompressobj(31)
+
+		while consumed < sample:
+			data = fh.read(65536)
+
+			if not data:
+				break
+
+			consumed += len(data)
 
-	for line in fp:
-		line = line.strip()
+			#concatenated gzip members
+			while data:
+				try:
+					usize += len(decomp.decompress(data))
+				except zlib.error:
+					consumed = csize
+					break
 
-		if not line:
-			continue
+				if not decomp.eof:
+					break
 
-		if line[0] == '>':
-			return 'fasta'
-		elif line[0] == '@':
-			return 'fastq'
-		else:
-			return None
+				data = decomp.unused_data
+				decomp = zlib.decompressobj(31)
+
+	if consumed >= csize:
+		return usize
+
+	return round(usize/consumed*csize)
+
+def get_export_compressions(export_format='CSV'):
+	#arrow files only support codecs of pyarrow, which has no gzip
+	if export_format == 'Arrow':
+		return ['None', 'zstd']
+
+	compressions = ['None', 'gzip']
+
+	if zstandard is not None or export_format == 'Parquet':
+		compressions.append('zstd')
+
+	return compressions
+
+def get_export_formats():
+	formats = ['CSV', 'TSV']
+
+	#check pyarrow without importing it
+	if importlib.util.find_spec('pyarrow') is not None:
+		formats.extend(['Parquet', 'Arrow'])
+
+	return formats
+
+def open_export_file(out_file, compress=None):
+	if compress == 'gzip':
+		return gzip.open(out_file, 'wt', compresslevel=6, newline='')
+
+	elif compress == 'zstd':
+		writer = zstandard.ZstdCompressor().stream_writer(open(out_file, 'wb'), closefd=True)
+		return io.TextIOWrapper(writer, newline='')
+
+	else:
+		return open(out_file, 'w', newline='')
 
 #https://en.wikipedia.org/wiki/IUPAC_numerical_multiplier
 #https://www.qmul.ac.uk/sbcs/iupac/misc/numb.html
@@ -146,35 +260,6 @@ def primer_tag_format(tag):
 	except:
 		raise Exception("The {} tag is not a primer3 tag".format(tag))
 
-#gff or gtf file validation
-def get_annotation_format(annot_file):
-	if pyfastx.gzip_check(annot_file):
-		handler = gzip.open(annot_file, 'rt')
-
-	else:
-		handler = open(annot_file)
-
-	with handler as fh:
-		for line in fh:
-			if line[0] == '#':
-				continue
-
-			cols = line.strip().split('\t')
-
-			if len(cols) != 9:
-				raise Exception("the annotation file is not GFF or GTF formatted file")
-
-			#attr = cols[8].split(';')[0]
-
-			if 'gene_id "' in cols[8] or 'transcript_id "' in cols[8]:
-				return 'gtf'
-
-			elif '=' in cols[8].split(';')[0]:
-				return 'gff'
-
-			else:
-				raise Exception("the annotation file is not GFF or GTF formatted file")
-
 def get_fastx_info(index):
 	fastx = DB.get_object("SELECT * FROM fastx WHERE id=?", (index,))
 
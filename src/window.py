@@ -15,10 +15,24 @@ from dialog import *
 from seqview import *
 from backend import *
 from workers import *
+from process import *
 from widgets import *
 from alignment import *
 
-__all__ = ['KraitMainWindow']
+__all__ = ['KraitMainWindow', 'KraitApplication']
+
+class KraitApplication(QApplication):
+	osx_open_with = Signal(str)
+
+	def __init__(self, argv):
+		super().__init__(argv)
+
+	def event(self, event):
+		if sys.platform == 'darwin':
+			if isinstance(event, QFileOpenEvent):
+				self.osx_open_with.emit(event.file())
+
+		return super().event(event)
 
 class KraitMainWindow(QMainWindow):
 	def __init__(self):
@@ -126,6 +140,7 @@ class KraitMainWindow(QMainWindow):
 				self.wait_task_finish()
 
 		self.write_settings()
+		POOL.shutdown()
 
 	def create_actions(self):
 		#menu actions
@@ -184,6 +199,11 @@ class KraitMainWindow(QMainWindow):
 			triggered = self.export_current_table
 		)
 
+		self.export_align_action = QAction("&Export iSSR alignments...", self,
+			statusTip = "Export CIGAR strings of iSSR alignments in the current file",
+			triggered = self.export_issr_alignments
+		)
+
 		self.export_all_action = QAction("&Export all tables...", self,
 			statusTip = "Export all result tables for selected files to a folder",
 			triggered = self.export_all_tables
@@ -194,6 +214,11 @@ class KraitMainWindow(QMainWindow):
 			triggered = self.export_stats_report
 		)
 
+		self.export_trace_action = QAction("&Export timing trace...", self,
+			statusTip = "Export recorded stage timings as chrome trace json",
+			triggered = self.export_timing_trace
+		)
+
 		self.exit_action = QAction("&Exit", self,
 			shortcut = "Alt+Q",
 			statusTip = "Exit",
@@ -326,9 +351,11 @@ class KraitMainWindow(QMainWindow):
 		self.file_menu.addSeparator()
 		self.file_menu.addAction(self.export_select_action)
 		self.file_menu.addAction(self.export_table_action)
+		self.file_menu.addAction(self.export_align_action)
 		self.file_menu.addAction(self.export_all_action)
 		self.file_menu.addSeparator()
 		self.file_menu.addAction(self.export_stats_action)
+		self.file_menu.addAction(self.export_trace_action)
 		self.file_menu.addSeparator()
 		self.file_menu.addAction(self.exit_action)
 
@@ -347,7 +374,7 @@ class KraitMainWindow(QMainWindow):
 		self.tool_menu = self.menuBar().addMenu("&Tool")
 		#self.run_menu.addAction(self.search_all_action)
 		#self.run_menu.addAction(self.search_sel_action)
-		#self.tool_menu.addAction(self.cancel_action)
+		self.tool_menu.addAction(self.cancel_action)
 		self.tool_menu.addAction(self.motif_action)
 
 		#self.menuBar().addSeparator()
@@ -440,6 +467,11 @@ class KraitMainWindow(QMainWindow):
 			settings.setValue("pos", self.pos())
 			settings.endGroup()
 
+	def record_startup_time(self, elapsed):
+		settings = QSettings()
+		settings.setValue("General/startup", round(elapsed, 3))
+		self.status_bar.showMessage("Welcome to Krait2, started in {:.2f}s".format(elapsed))
+
 	def read_settings(self):
 		settings = QSettings()
 		settings.beginGroup("Window")
@@ -469,7 +501,12 @@ class KraitMainWindow(QMainWindow):
 
 	@Slot()
 	def cancel_running_tasks(self):
-		pass
+		if QThreadPool.globalInstance().activeThreadCount() == 0:
+			return
+
+		if hasattr(self.current_worker, 'cancel'):
+			self.current_worker.cancel()
+			self.show_status_message("Stopping running tasks ...")
 
 	@Slot()
 	def show_motif_standard(self):
@@ -899,6 +936,9 @@ class KraitMainWindow(QMainWindow):
 
 	def export_current_table(self):
 		file_filters = "TSV (*.tsv);;CSV (*.csv);;GFF (*.gff);;FASTA (*.fasta)"
+
+		if 'Parquet' in get_export_formats():
+			file_filters += ";;Parquet (*.parquet);;Arrow (*.arrow)"
 		out_file, _ = QFileDialog.getSaveFileName(self, filter=file_filters)
 
 		if not out_file:
@@ -916,8 +956,21 @@ class KraitMainWindow(QMainWindow):
 
 		self.run_work_thread(KraitExportCurrentTableWorker, self, out_file)
 
+	def export_issr_alignments(self):
+		if not DB.get_count("issr_{}".format(self.current_file)):
+			QMessageBox.warning(self, "Warning", "No iSSRs were found in the current file, please search for iSSRs first")
+			return
+
+		file_filters = "TSV (*.tsv);;CSV (*.csv)"
+		out_file, _ = QFileDialog.getSaveFileName(self, filter=file_filters)
+
+		if not out_file:
+			return
+
+		self.run_work_thread(KraitAlignmentExportWorker, self.current_file, out_file)
+
 	def export_all_tables(self):
-		tab, fmt = KraitExportTablesDialog.get_select(self)
+		tab, fmt, cmp = KraitExportTablesDialog.get_select(self)
 
 		if tab is None:
 			return
@@ -927,7 +980,7 @@ class KraitMainWindow(QMainWindow):
 		if not out_dir:
 			return
 
-		self.run_work_thread(KraitExportAllTablesWorker, self, tab, fmt, out_dir)
+		self.run_work_thread(KraitExportAllTablesWorker, self, tab, fmt, out_dir, cmp)
 
 	def show_report_in_browser(self, reprot_file, i):
 		if os.path.isfile(reprot_file):
@@ -952,6 +1005,24 @@ class KraitMainWindow(QMainWindow):
 		#self.current_worker.signals.status.connect(self.fastx_tree.update_model)
 		QThreadPool.globalInstance().start(self.current_worker)
 
+	def export_timing_trace(self):
+		if not DB.get_one("SELECT 1 FROM run_metrics LIMIT 1"):
+			QMessageBox.warning(self, "Warning", "No timings were recorded, please turn on timing in preference and run again")
+			return
+
+		trace_file, _ = QFileDialog.getSaveFileName(self, filter="JSON (*.json)")
+
+		if not trace_file:
+			return
+
+		if not self.check_work_thread():
+			return
+
+		self.current_worker = KraitExportTraceWorker(self, trace_file)
+		self.current_worker.signals.messages.connect(self.show_status_message)
+		self.current_worker.signals.failure.connect(self.show_error_message)
+		QThreadPool.globalInstance().start(self.current_worker)
+
 	def wait_task_finish(self):
 		pool = QThreadPool.globalInstance()
 		pool.waitForDone()
@@ -1100,7 +1171,7 @@ class KraitMainWindow(QMainWindow):
 		dialog.show()
 
 	def open_about(self):
-		QMessageBox.about(self, "About", KRAIT_ABOUT)
+		QMessageBox.about(self, "About", get_krait_about())
 
 	def open_documentation(self):
 		QDesktopServices.openUrl(QUrl("https://krait2.readthedocs.io"))
@@ -1,18 +1,26 @@
+import io
 import os
 import csv
+import json
 import time
+import queue
+import hashlib
+import tempfile
+import itertools
 import pytrf
 import pyfastx
-import primer3
 import traceback
 import multiprocessing
+import concurrent.futures
 
 from PySide6.QtGui import *
 from PySide6.QtCore import *
 
 from motif import *
 from stats import *
+from report import *
 from utils import *
+from common import *
 from config import *
 from backend import *
 from process import *
@@ -29,9 +37,17 @@ __all__ = [
 	'KraitPrimerDesignWorker', 'KraitMappingWorker',
 	'KraitStatisticsWorker', 'KraitSaveWorker',
 	'KraitExportStatisticsWorker', 'KraitExportSelectedWorker',
-	'KraitExportCurrentTableWorker', 'KraitExportAllTablesWorker'
+	'KraitExportCurrentTableWorker', 'KraitExportAllTablesWorker',
+	'KraitExportTraceWorker', 'KraitAlignmentExportWorker'
 ]
 
+#characters must be escaped in gff3 attribute values
+GFF_ESCAPES = str.maketrans({'%': '%25', ';': '%3B', '=': '%3D', '&': '%26', ',': '%2C',
+	'\t': '%09', '\n': '%0A', '\r': '%0D'})
+
+#spaces are also escaped in gff3 seqid
+GFF_SEQID_ESCAPES = {**GFF_ESCAPES, ord(' '): '%20'}
+
 #signals can only be emit from QObject
 class KraitWorkerSignals(QObject):
 	finished = Signal()
@@ -43,6 +59,7 @@ class KraitWorkerSignals(QObject):
 	prompt = Signal(str)
 
 class KraitBaseWorker(QRunnable):
+	table_name = None
 	processer = lambda *x: None
 
 	def __init__(self):
@@ -50,17 +67,118 @@ class KraitBaseWorker(QRunnable):
 		self.setAutoDelete(True)
 		self.fastx = None
 		self.processes = 0
-		self.queue = multiprocessing.Queue()
+		self.tasks = []
+		self.cancelled = False
+		self.queue = queue.Queue()
 		self.signals = KraitWorkerSignals()
 		self.settings = QSettings()
 		self.params = self.get_params()
+		self.record_metrics = self.get_metrics()
+		self.metrics_run = None
+		self.insert_times = {}
+		self.record_profile = self.get_profile()
+		self.profile_dir = None
 
 	def exit(self):
-		self.queue.close()
+		self.queue.put(None)
+
+	def get_workers(self):
+		default, convert = KRAIT_SEARCH_PARAMETERS['RUN/workers']
+		return self.settings.value('RUN/workers', default, convert)
+
+	def get_metrics(self):
+		default, convert = KRAIT_SEARCH_PARAMETERS['RUN/metrics']
+		return self.settings.value('RUN/metrics', default, convert)
+
+	def get_profile(self):
+		default, convert = KRAIT_SEARCH_PARAMETERS['RUN/profile']
+		return self.settings.value('RUN/profile', default, convert)
+
+	def get_profile_file(self, proc):
+		#one folder per run and one file per task
+		if self.profile_dir is None:
+			self.profile_dir = os.path.join(get_cache_dir('profile'), "{}_{}".format(
+				self.table_name or 'task', time.strftime('%Y%m%d-%H%M%S')))
+			os.makedirs(self.profile_dir, exist_ok=True)
+
+		return os.path.join(self.profile_dir, "{}_{}_{}.prof".format(
+			self.table_name or 'task', proc.fastx.get('id', 0), len(self.tasks)+1))
+
+	def merge_profiles(self):
+		import pstats
+
+		files = [os.path.join(self.profile_dir, f) for f in sorted(os.listdir(self.profile_dir))
+			if f.endswith('.prof') and f != 'merged.prof']
+
+		if not files:
+			return
+
+		summary = io.StringIO()
+		summary.write("{} profiles from worker processes {}\n\n".format(
+			len(files), ', '.join(str(pid) for pid in POOL.get_pids())))
+
+		stats = pstats.Stats(*files, stream=summary)
+		stats.dump_stats(os.path.join(self.profile_dir, 'merged.prof'))
+		stats.strip_dirs()
+		stats.sort_stats('tottime').print_stats(40)
+		stats.sort_stats('cumulative').print_stats(40)
+
+		summary_file = os.path.join(self.profile_dir, 'summary.txt')
+		with open(summary_file, 'w') as fw:
+			fw.write(summary.getvalue())
+
+		self.signals.messages.emit("Profiles were merged into {}".format(summary_file))
+
+	def submit_task(self, proc, priority=0):
+		if self.record_metrics:
+			if self.metrics_run is None:
+				self.metrics_run = DB.new_metrics_run()
+
+			proc.metrics = {}
+
+		if self.record_profile:
+			proc.profile = self.get_profile_file(proc)
+
+		self.tasks.append(POOL.submit(proc, self.queue, priority))
+
+	def call_records(self, data):
+		#time spent on saving records in main process
+		start = time.time()
+		counter = time.perf_counter()
+		self.call_response(data)
+		self.insert_times[data['task']] = (start, time.perf_counter() - counter)
+
+	def call_metric(self, data):
+		rows = []
+		start = data['start']
+
+		#stages of a sequence are laid out one after another
+		for stage, seconds in data['times'].items():
+			rows.append((None, self.metrics_run, data['stage'], data['id'], data['chrom'],
+				data['pid'], start, stage, seconds, data['rows'], data['rss']))
+			start += seconds
+
+		insert = self.insert_times.pop(data['task'], None)
+
+		if insert:
+			rows.append((None, self.metrics_run, data['stage'], data['id'], data['chrom'],
+				os.getpid(), insert[0], 'insert', insert[1], data['rows'], get_memory_usage()))
+
+		DB.add_run_metrics(rows)
+
+	def cancel(self):
+		#no new jobs are submitted, running ones stop at next checkpoint
+		self.cancelled = True
+
+		for task in self.tasks:
+			POOL.cancel(task)
+
+	def call_cancel(self, data):
+		pass
 
 	def start_process(self):
-		proc = self.processer(self.params, self.queue, self.fastx)
-		proc.start()
+		proc = self.processer(self.params, self.fastx)
+		self.submit_task(proc)
 
 	def get_params(self):
 		return
@@ -75,6 +193,9 @@ class KraitBaseWorker(QRunnable):
 	def call_response(self, data):
 		pass
 
+	def after_submit(self):
+		pass
+
 	@Slot()
 	def run(self):
 		self.before_run()
@@ -84,20 +205,32 @@ class KraitBaseWorker(QRunnable):
 			for i in range(self.concurrent):
 				self.submit_process()
 
+			self.after_submit()
+
 			while True:
-				try:
-					data = self.queue.get()
-					self.call_response(data)
+				data = self.queue.get()
 
-				except ValueError:
+				if data is None:
 					break
 
+				if data['type'] == 'cancelled':
+					self.call_cancel(data)
+				elif data['type'] == 'metric':
+					self.call_metric(data)
+				elif self.metrics_run and 'records' in data:
+					self.call_records(data)
+				else:
+					self.call_response(data)
+
 		except:
 			error = traceback.format_exc()
 			self.signals.failure.emit(error)
 			print(error)
 
 		finally:
+			if self.profile_dir:
+				self.merge_profiles()
+
 			self.signals.progress.emit(100)
 			self.signals.finished.emit()
 			self.signals.messages.emit('Done')
@@ -109,9 +242,20 @@ class KraitSearchWorker(KraitBaseWorker):
 		super().__init__()
 		
 		self.total_size = 0
+		self.chunk_size = None
 		self.fastx_query = None
+		self.fastx_jobs = {}
+		#sub-jobs of each file that have not succeeded yet
+		self.fastx_pending = {}
+		self.fastx_files = {}
+		self.fastx_failed = set()
 		self.progresses = {}
-		self.concurrent = self.settings.value('Run/concurrent', 1, int)
+		self.start_time = time.time()
+		self.eta_time = 0
+		self.commit_time = time.time()
+		self.skipped = []
+		self.concurrent = self.get_workers()
+		POOL.resize(self.concurrent)
 		self.total_fastx = DB.get_count('fastx')
 
 	def get_params(self):
@@ -119,18 +263,106 @@ class KraitSearchWorker(KraitBaseWorker):
 
 	def query_fastx(self):
 		self.total_size = DB.get_one("SELECT SUM(bytes) FROM fastx")
-		self.fastx_query = DB.query("SELECT * FROM fastx")
+		self.fastx_query = DB.query("SELECT * FROM fastx ORDER BY bytes DESC")
+
+		#split inputs larger than a quarter of each worker's share
+		if self.concurrent > 1:
+			self.chunk_size = max(self.total_size//(self.concurrent*4), 4194304)
 
 	def update_progress(self, data):
-		self.progresses[data['id']] = data['progress']
-		p = sum(self.progresses.values())*100
-		self.signals.progress.emit(p)
+		self.progresses[data['task']] = data['progress']
+		p = sum(self.progresses.values())
+		self.signals.progress.emit(p*100)
+
+		now = time.time()
+		if 0 < p < 1 and now - self.eta_time >= 1:
+			self.eta_time = now
+			remain = (now - self.start_time)*(1 - p)/p
+			self.signals.messages.emit("{:.0%} completed, about {} remaining".format(
+				p, time.strftime('%H:%M:%S', time.gmtime(remain))
+			))
+
+	def get_fingerprint_params(self, fastx):
+		return self.params
+
+	def get_fingerprint(self, fastx):
+		#the pyfastx index is not hashed, its name is already stamped with
+		#path, size and mtime of the input, and a full index pass rewrites
+		#its content without changing any result
+		stat = os.stat(fastx['fpath'])
+		data = json.dumps([fastx['fpath'], stat.st_size, stat.st_mtime_ns,
+			self.table_name, self.get_fingerprint_params(fastx)], sort_keys=True)
+		return hashlib.sha1(data.encode()).hexdigest()
+
+	def save_fingerprint(self, fid, complete=0):
+		digest = self.get_fingerprint(self.fastx_files[fid])
+		DB.set_fingerprint(fid, self.table_name, digest, complete)
+
+		if complete:
+			DB.clear_checkpoints(fid, self.table_name)
+
+	def skip_fastx(self, fastx):
+		#results are still valid when input and parameters are unchanged,
+		#an unfinished run continues after the last completed sequence
+		table = "{}_{}".format(self.table_name, fastx['id'])
+		row = DB.get_fingerprint(fastx['id'], self.table_name)
+
+		if not row or not DB.table_exists(table):
+			return False
+
+		if row[0] != self.get_fingerprint(fastx):
+			return False
+
+		if row[1]:
+			self.skipped.append(fastx['id'])
+			self.update_success(fastx['id'])
+			return True
+
+		fastx['skip'] = DB.get_checkpoints(fastx['id'], self.table_name)
+		return False
+
+	def checkpoint(self, fid, chrom):
+		DB.add_checkpoint(fid, self.table_name, chrom)
+
+		#commit completed sequences of project file regularly
+		if DB.db_file == ':memory:':
+			return
+
+		now = time.time()
+		if now - self.commit_time >= 5:
+			self.commit_time = now
+			DB.commit()
+			DB.begin()
 
 	def start_process(self, fastx):
-		DB.drop_table(self.table_name, fastx['id'])
-		DB.create_table(self.table_name, fastx['id'])
-		proc = self.processer(self.params, self.queue, fastx)
-		proc.start()
+		if fastx.get('skip'):
+			sql = "DELETE FROM {}_{} WHERE chrom NOT IN (SELECT chrom FROM checkpoint WHERE fid=? AND task=?)"
+			DB.query(sql.format(self.table_name, fastx['id']), (fastx['id'], self.table_name))
+			self.signals.messages.emit("Resuming search on {} after {} completed sequences".format(
+				fastx['name'], len(fastx['skip'])))
+
+		else:
+			DB.drop_table(self.table_name, fastx['id'])
+			DB.create_table(self.table_name, fastx['id'])
+			DB.clear_checkpoints(fastx['id'], self.table_name)
+
+		self.save_fingerprint(fastx['id'])
+		fastx['chunk_size'] = self.chunk_size
+		fastx['threads'] = max((os.cpu_count() or 1)//self.concurrent, 1)
+		proc = self.processer(self.params, fastx)
+		self.submit_task(proc, fastx['bytes'])
+
+	def start_chunks(self, fid, chunks):
+		if self.cancelled:
+			return
+
+		for start, end, size in chunks:
+			fastx = dict(self.fastx_files[fid], chunk=(start, end))
+			proc = self.processer(self.params, fastx)
+			self.submit_task(proc, size)
+			self.fastx_jobs[fid] += 1
+			self.fastx_pending[fid] += 1
+			self.processes += 1
 
 	def get_fastx(self):
 		row = self.fastx_query.fetchone()
@@ -158,8 +390,13 @@ class KraitSearchWorker(KraitBaseWorker):
 	def update_info(self, info):
 		self.signals.messages.emit(info)
 
+	def call_cancel(self, data):
+		#partial results are kept, the unfinished fingerprint marks them
+		self.fastx_failed.add(data['id'])
+		self.update_error(data['id'], "Cancelled by user")
+
 	def submit_process(self):
-		if self.fastx_query is None:
+		if self.fastx_query is None or self.cancelled:
 			return
 
 		if self.processes >= self.concurrent:
@@ -167,8 +404,14 @@ class KraitSearchWorker(KraitBaseWorker):
 
 		fastx = self.get_fastx()
 
+		while fastx and self.skip_fastx(fastx):
+			fastx = self.get_fastx()
+
 		if fastx:
 			fastx['weight'] = fastx['bytes']/self.total_size
+			self.fastx_files[fastx['id']] = fastx
+			self.fastx_jobs[fastx['id']] = 1
+			self.fastx_pending[fastx['id']] = 1
 			self.start_process(fastx)
 			self.processes += 1
 			self.update_status(fastx['id'], 2)
@@ -177,15 +420,45 @@ class KraitSearchWorker(KraitBaseWorker):
 		self.update_status()
 		self.query_fastx()
 
+		#standard motif table built here is inherited by workers forked
+		#afterwards, a worker started before builds its own one lazily
+		level = self.params.get('standard_level') if self.params else None
+
+		if level and multiprocessing.get_start_method() == 'fork':
+			get_standard_table(level)
+
+	def after_submit(self):
+		if self.processes == 0:
+			self.exit()
+
+			if self.skipped:
+				self.signals.messages.emit("Results of {} unchanged files are up to date".format(len(self.skipped)))
+				self.signals.show_tab.emit(self.table_name, self.skipped[-1])
+
 	def call_response(self, data):
 		if data['type'] == 'fastx':
 			DB.update_fastx(data['records'])
+			self.fastx_files[data['id']]['format'] = data['records'][0]
+			self.fastx_files[data['id']]['size'] = data['records'][1]
+
+		elif data['type'] == 'chunks':
+			self.start_chunks(data['id'], data['chunks'])
 
 		elif data['type'] == 'success':
-			self.update_success(data['id'])
+			self.fastx_pending[data['id']] -= 1
 
 		elif data['type'] == 'finish':
+			self.fastx_jobs[data['id']] -= 1
 			self.processes -= 1
+
+			#messages of sub-jobs of a split file may interleave, the file
+			#succeeds after all its sub-jobs finished and succeeded
+			done = self.fastx_jobs[data['id']] == 0 and self.fastx_pending[data['id']] == 0
+
+			if done and data['id'] not in self.fastx_failed:
+				self.save_fingerprint(data['id'], 1)
+				self.update_success(data['id'])
+
 			self.submit_process()
 
 			if self.processes == 0:
@@ -193,6 +466,7 @@ class KraitSearchWorker(KraitBaseWorker):
 				self.signals.show_tab.emit(self.table_name, data['id'])
 
 		elif data['type'] == 'error':
+			self.fastx_failed.add(data['id'])
 			self.update_error(data['id'], data['message'])
 
 		elif data['type'] == 'info':
@@ -200,7 +474,10 @@ class KraitSearchWorker(KraitBaseWorker):
 
 		else:
 			table = "{}_{}".format(data['type'], data['id'])
-			DB.insert_rows(DB.get_sql(table), data['records'])
+			DB.insert_records(table, data['records'])
+
+			if 'chrom' in data:
+				self.checkpoint(data['id'], data['chrom'])
 
 			if data['progress']:
 				self.update_progress(data)
@@ -220,11 +497,18 @@ class KraitCSSRSearchWorker(KraitSearchWorker):
 	processer = KraitCSSRSearchProcess
 
 	def start_process(self, fastx):
+		DB.drop_table(self.table_name, fastx['id'])
 		DB.create_table(self.table_name, fastx['id'])
+		self.save_fingerprint(fastx['id'])
 		sql = "SELECT * FROM ssr_{}".format(fastx['id'])
 		self.params['ssrs'] = DB.get_rows(sql)
-		proc = self.processer(self.params, self.queue, fastx)
-		proc.start()
+		proc = self.processer(self.params, fastx)
+		self.submit_task(proc)
+
+	def get_fingerprint_params(self, fastx):
+		#cssrs are valid as long as the ssrs they are built from
+		ssr = DB.get_fingerprint(fastx['id'], 'ssr')
+		return {'dmax': self.params['dmax'], 'ssr': ssr[0] if ssr else None}
 
 	def get_params(self):
 		return {
@@ -302,8 +586,8 @@ class KraitPrimerDesignWorker(KraitBaseWorker):
 		return params
 
 	def start_process(self, trs):
-		proc = self.processer(trs, self.index, self.category, self.params, self.queue, self.fastx)
-		proc.start()
+		proc = self.processer(trs, self.index, self.category, self.params, self.fastx)
+		self.submit_task(proc)
 
 	def before_run(self):
 		sql = "SELECT * FROM fastx WHERE id=? LIMIT 1"
@@ -312,6 +596,9 @@ class KraitPrimerDesignWorker(KraitBaseWorker):
 		DB.create_table(self.table_name, self.index)
 
 	def submit_process(self):
+		if self.cancelled:
+			return
+
 		try:
 			trs = next(self.repeats)
 		except StopIteration:
@@ -333,7 +620,7 @@ class KraitPrimerDesignWorker(KraitBaseWorker):
 			self.submit_process()
 
 			if self.processes == 0:
-				self.queue.close()
+				self.exit()
 
 			self.signals.show_tab.emit(self.table_name, data['id'])
 
@@ -347,6 +634,131 @@ class KraitPrimerDesignWorker(KraitBaseWorker):
 		p = self.progress/self.total_count*100
 		self.signals.progress.emit(p)
 
+class KraitAlignmentExportWorker(KraitBaseWorker):
+	table_name = 'issr'
+	processer = KraitAlignmentProcess
+	batch_size = 1000
+
+	def __init__(self, index, out_file):
+		super().__init__()
+		self.index = index
+		self.out_file = out_file
+		self.concurrent = self.get_workers()
+		POOL.resize(self.concurrent)
+		self.table = "issr_{}".format(index)
+		self.total_count = 0
+		self.progress = 0
+		self.last_id = 0
+		self.batches = 0
+		self.flushed = 0
+		self.task_batches = {}
+		self.pending = {}
+		self.failed = False
+		self.fw = None
+
+	def before_run(self):
+		sql = "SELECT * FROM fastx WHERE id=? LIMIT 1"
+		self.fastx = DB.get_dict(sql, (self.index,))
+		self.total_count = DB.get_count(self.table)
+
+		self.fw = open(self.out_file, 'w', newline='')
+		self.writer = csv.writer(self.fw, delimiter=',' if self.out_file.endswith('.csv') else '\t')
+		self.writer.writerow(['id', 'chrom', 'start', 'end', 'motif', 'cigar'])
+
+	def get_repeats(self):
+		#read loci page by page instead of loading the whole table
+		sql = "SELECT id,chrom,start,end,motif,sstart,send FROM {} WHERE id>? ORDER BY id LIMIT ?"
+		rows = DB.get_rows(sql.format(self.table), (self.last_id, self.batch_size))
+
+		if rows:
+			self.last_id = rows[-1][0]
+
+		return rows
+
+	def submit_process(self):
+		if self.cancelled:
+			return
+
+		repeats = self.get_repeats()
+
+		if not repeats:
+			return
+
+		proc = self.processer(repeats, self.fastx)
+		self.submit_task(proc)
+		self.task_batches[self.tasks[-1]] = self.batches
+		self.batches += 1
+		self.processes += 1
+
+	def after_submit(self):
+		if self.processes == 0:
+			self.exit()
+
+	def exit(self):
+		self.close_file()
+		super().exit()
+
+	def close_file(self):
+		if self.fw:
+			self.fw.close()
+			self.fw = None
+
+			#an incomplete alignment file is removed
+			if self.failed:
+				os.remove(self.out_file)
+				self.signals.messages.emit("Failed to export iSSR alignments, {} was removed".format(self.out_file))
+			elif self.cancelled:
+				os.remove(self.out_file)
+				self.signals.messages.emit("Export of iSSR alignments was cancelled")
+			else:
+				self.signals.messages.emit("Successfully exported to {}".format(self.out_file))
+
+	@Slot()
+	def run(self):
+		try:
+			super().run()
+
+		finally:
+			#the file is still open when an exception stopped the export
+			if self.fw:
+				self.failed = True
+				self.cancel()
+				self.close_file()
+
+	def write_batches(self):
+		#batches finish out of order but are written in the order of loci
+		while self.flushed in self.pending:
+			self.writer.writerows(self.pending.pop(self.flushed))
+			self.flushed += 1
+
+	def call_response(self, data):
+		if data['type'] == 'alignment':
+			self.pending[self.task_batches[data['task']]] = data['records']
+			self.write_batches()
+			self.progress += data['progress']
+			self.signals.progress.emit(int(self.progress/self.total_count*100))
+
+		elif data['type'] == 'info':
+			self.signals.messages.emit(data['message'])
+
+		elif data['type'] == 'error':
+			self.signals.failure.emit(data['message'])
+
+		elif data['type'] == 'finish':
+			batch = self.task_batches.pop(data['task'])
+
+			#a batch without alignments failed or was cancelled,
+			#the remaining batches are stopped
+			if batch not in self.pending and batch >= self.flushed and not self.cancelled:
+				self.failed = True
+				self.cancel()
+
+			self.processes -= 1
+			self.submit_process()
+
+			if self.processes == 0:
+				self.exit()
+
 class KraitMappingWorker(KraitSearchWorker):
 	table_name = 'map'
 	processer = KraitMappingProcess
@@ -364,8 +776,8 @@ class KraitMappingWorker(KraitSearchWorker):
 		DB.create_table('map', fastx['id'])
 		DB.create_table('annot', fastx['id'])
 		
-		proc = self.processer(repeats, self.queue, fastx)
-		proc.start()
+		proc = self.processer(repeats, fastx)
+		self.submit_task(proc)
 
 	def get_repeats(self, index):
 		self.signals.messages.emit("Preparing repeats for annotation ...")
@@ -385,7 +797,7 @@ class KraitMappingWorker(KraitSearchWorker):
 		return repeats
 
 	def submit_process(self):
-		if self.fastx_query is None:
+		if self.fastx_query is None or self.cancelled:
 			return
 
 		if self.processes >= self.concurrent:
@@ -446,8 +858,8 @@ class KraitStatisticsWorker(KraitSearchWorker):
 	def start_process(self, repeats, annots, fastx):
 		DB.drop_table(self.table_name, fastx['id'])
 		DB.create_table(self.table_name, fastx['id'])
-		self.proc = self.processer(repeats, annots, self.params, self.queue, fastx)
-		self.proc.start()
+		proc = self.processer(repeats, annots, self.params, fastx)
+		self.submit_task(proc)
 
 	def get_repeats(self):
 		fastx = self.get_fastx()
@@ -474,7 +886,7 @@ class KraitStatisticsWorker(KraitSearchWorker):
 		return fastx, repeats, annots
 
 	def submit_process(self):
-		if self.fastx_query is None:
+		if self.fastx_query is None or self.cancelled:
 			return
 
 		if self.processes >= self.concurrent:
@@ -500,7 +912,7 @@ class KraitStatisticsWorker(KraitSearchWorker):
 			self.submit_process()
 
 			if self.processes == 0:
-				self.queue.close()
+				self.exit()
 
 			self.signals.show_tab.emit(self.table_name, data['id'])
 
@@ -520,60 +932,157 @@ class KraitExportWorker(QRunnable):
 		self.export_dest = export_dest
 		self.signals = KraitWorkerSignals()
 
-	def format_to_gff(self, feature, title, data):
-		fid = "ID={}{}".format(feature.upper(), data[0])
-		attrs = [fid]
+	def format_to_seq(self, seq, line_len=80):
+		return '\n'.join(seq[i:i+line_len] for i in range(0, len(seq), line_len))
 
-		for i, d in enumerate(data):
-			if i > 3:
-				attrs.append("{}={}".format(title[i], d))
+	def get_gff_format(self, table):
+		feature = table.split('_')[0].upper()
+		title = DB.get_field(table)
 
-		row = [data[1], '.', feature, data[2], data[3], '.', '.', '.', ';'.join(attrs)]
-		return row
+		#one format string per table, row values are filled by position
+		attrs = ''.join(";{}={{{}}}".format(title[i], i) for i in range(4, len(title)))
+		return "{1}\t.\t" + feature + "\t{2}\t{3}\t.\t.\t.\tID=" + feature + "{0}" + attrs
 
-	def format_to_seq(self, seq, line_len=80):
-		bases = []
-		for i, b in enumerate(seq, 1):
-			bases.append(b)
+	def get_gff_values(self, row):
+		#seqid and attribute values are escaped, id and coordinates are kept
+		values = list(row)
+		values[1] = str(row[1]).translate(GFF_SEQID_ESCAPES)
+
+		for i in range(4, len(row)):
+			values[i] = str(row[i]).translate(GFF_ESCAPES)
 
-			if i % line_len == 0:
-				bases.append('\n')
+		return values
+
+	def get_gff_annotations(self, table, rows):
+		rtype, index = table.split('_')
+		types = {'ssr': 1, 'cssr': 2, 'gtr': 3, 'issr': 4}
+		features = ['Intergenic', 'CDS', 'Exon', '3UTR', 'UTR', '5UTR', 'Intron']
 
-		return ''.join(bases)
+		map_table = "map_{}".format(index)
+		annot_table = "annot_{}".format(index)
+
+		if rtype not in types or not DB.table_exists(map_table):
+			return {}
+
+		sql = "SELECT locus,feature,parents FROM {} WHERE type=? AND locus IN ({})".format(
+			map_table, ','.join(str(row[0]) for row in rows)
+		)
+		maps = DB.get_rows(sql, (types[rtype],))
+
+		if not maps:
+			return {}
+
+		parents = {p for m in maps for p in m[2].split(',')}
+		sql = "SELECT id,fid FROM {} WHERE id IN ({})".format(annot_table, ','.join(parents))
+		fids = {str(r[0]): r[1].translate(GFF_ESCAPES) for r in DB.query(sql) if r[1]}
+
+		annots = {}
+		for locus, feature, ps in maps:
+			attr = ";region={}".format(features[feature])
+			ids = [fids[p] for p in ps.split(',') if p in fids]
+
+			if ids:
+				attr += ";annotation={}".format(','.join(ids))
+
+			annots[locus] = attr
+
+		return annots
+
+	def export_to_gff(self, table, batches, total):
+		line_format = self.get_gff_format(table)
+		processed = 0
+		progress = 0
+
+		with open(self.export_dest, 'w', buffering=1048576) as fw:
+			fw.write("##gff-version 3\n")
+
+			for rows in batches:
+				annots = self.get_gff_annotations(table, rows)
+				lines = []
 
-	def export_to_table(self, writer, table, title, rows):
-			if self.export_dest.endswith('.gff'):
 				for row in rows:
-					row = self.format_to_gff(table.split('_')[0].upper(), title, row)
-					writer.writerow(row)
+					lines.append(line_format.format(*self.get_gff_values(row)))
+					lines.append(annots.get(row[0], ''))
+					lines.append('\n')
+
+				fw.write(''.join(lines))
+
+				processed += len(rows)
+				p = int(processed/total*100)
+				if p > progress:
+					self.signals.progress.emit(p)
+					progress = p
+
+	def iter_batches(self, rows, size=1000):
+		batch = []
+
+		for row in rows:
+			batch.append(row)
+
+			if len(batch) == size:
+				yield batch
+				batch = []
+
+		if batch:
+			yield batch
+
+	def get_sequence_file(self):
+		sql = "SELECT fpath,format FROM fastx WHERE id=? LIMIT 1"
+		file = DB.get_object(sql, (self.parent.current_file,))
+		return get_fastx_handle(file.fpath, file.format)
+
+	def fetch_flanks(self, fx, rows, flank):
+		#bucket loci by chrom as selected rows may be sorted by any column,
+		#each sequence is loaded once and flanks are kept in row order
+		buckets = {}
+		for i, row in enumerate(rows):
+			buckets.setdefault(row[1], []).append(i)
+
+		seqs = [None] * len(rows)
+
+		for chrom, indexes in buckets.items():
+			if isinstance(fx, pyfastx.Fastq):
+				seq = fx[chrom].seq
+				fetch = lambda s, e: seq[s-1:e]
+				size = len(seq)
 
 			else:
-				for row in rows:
-					writer.writerow(row)
+				fetch = lambda s, e: fx.fetch(chrom, (s, e))
+				size = len(fx[chrom])
 
-	def export_to_fasta(self, table, sender, total):
-		chrom = None
-		seq = None
+			for i in indexes:
+				start = rows[i][2] - flank
+				if start < 1:
+					start = 1
 
-		with open(self.export_dest, 'w') as fw:
-			for rows in sender:
-				for row in rows:
-					if chrom != row[1]:
-						chrom = row[1]
-						seq = fx[row[1]].seq
+				end = rows[i][3] + flank
+				if end > size:
+					end = size
+
+				seqs[i] = fetch(start, end)
+
+		return zip(rows, seqs)
 
-					start = row[2] - flank
-					if start < 1:
-						start = 1
+	def export_to_fasta(self, table, batches, total):
+		settings = QSettings()
+		default, convert = KRAIT_SEARCH_PARAMETERS['STR/flank']
+		flank = settings.value('STR/flank', default, convert)
 
-					end = row[3] + flank
-					rep_seq = seq[start-1:end]
-					rep_seq = self.format_to_seq(rep_seq)
-					rep_rec = ">{}{} {}:{}-{}|flank_len={}\n{}\n".format(
-						table.split('_')[0].upper(), row[0], row[1], row[2], row[3], flank, rep_seq.strip()
-					)
+		fx = self.get_sequence_file()
+		feature = table.split('_')[0].upper()
+		processed = 0
+		progress = 0
 
-					fw.write(rep_rec)
+		with open(self.export_dest, 'w', buffering=1048576) as fw:
+			for rows in batches:
+				records = []
+
+				for row, seq in self.fetch_flanks(fx, rows, flank):
+					records.append(">{}{} {}:{}-{}|flank_len={}\n{}\n".format(
+						feature, row[0], row[1], row[2], row[3], flank, self.format_to_seq(seq)
+					))
+
+				fw.write(''.join(records))
 
 				processed += len(rows)
 				p = int(processed/total*100)
@@ -581,6 +1090,20 @@ class KraitExportWorker(QRunnable):
 					self.signals.progress.emit(p)
 					progress = p
 
+	def export_to_columnar(self, table, total, out_format):
+		processed = 0
+		progress = 0
+
+		def update_progress(count):
+			nonlocal processed, progress
+			processed += count
+			p = int(processed/total*100)
+
+			if p > progress:
+				self.signals.progress.emit(p)
+				progress = p
+
+		DB.export_to_columnar(table, self.export_dest, out_format, callback=update_progress)
 
 	def before_run(self):
 		pass
@@ -625,16 +1148,46 @@ class KraitSaveWorker(KraitExportWorker):
 
 		self.signals.messages.emit("Successfully saved to {}".format(self.export_dest))
 
+class KraitExportTraceWorker(KraitExportWorker):
+	def do(self):
+		self.signals.messages.emit("Exporting timing trace to {}".format(self.export_dest))
+
+		#chrome trace event format, viewable in chrome://tracing or perfetto
+		events = []
+		sql = "SELECT run,task,fid,chrom,pid,start,stage,seconds,rows,rss FROM run_metrics"
+		for row in DB.query(sql):
+			events.append({
+				'name': row[6],
+				'cat': row[1],
+				'ph': 'X',
+				'ts': round(row[5]*1000000),
+				'dur': round(row[7]*1000000),
+				'pid': row[4],
+				'tid': row[2],
+				'args': {
+					'run': row[0],
+					'chrom': row[3],
+					'rows': row[8],
+					'rss': row[9]
+				}
+			})
+
+		with open(self.export_dest, 'w') as fw:
+			json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fw)
+
+		self.signals.messages.emit("Successfully exported {} timing events to {}".format(len(events), self.export_dest))
+
 class KraitExportStatisticsWorker(KraitExportWorker):
 	def do(self):
 		self.signals.messages.emit("Exporting report to {}".format(self.export_dest))
 		progress = 0
 
 		stats = KraitExportStatistics()
-		html = stats.generate_summary_report()
+		report = stats.stream_summary_report()
+		report.enable_buffering(100)
 
 		with open(self.export_dest, 'w', encoding='utf-8') as fw:
-			fw.write(html)
+			report.dump(fw)
 
 		self.signals.messages.emit("Successfully export to {}".format(self.export_dest))
 		self.signals.show_tab.emit(self.export_dest, 0)
@@ -647,52 +1200,14 @@ class KraitExportSelectedWorker(KraitExportWorker):
 		table, total, selected = self.parent.get_selected_rows()
 		table = self.parent.get_current_table()
 
-		fw = open(self.export_dest, 'w', newline='')
-
 		if self.export_dest.endswith('.fasta'):
-			writer = fw
-			cfile = self.parent.current_file
-			if not cfile:
+			if not self.parent.current_file:
 				return
 
-			settings = QSettings()
-			flank = settings.value('STR/flank', KRAIT_SEARCH_PARAMETERS['STR/flank'], int)
-
-			sql = "SELECT fpath,format FROM fastx WHERE id=? LIMIT 1"
-			file = DB.get_object(sql, (cfile,))
-
-			if file.format == 'fastq':
-				fx = pyfastx.Fastq(file.fpath)
-			else:
-				fx = pyfastx.Fasta(file.fpath, uppercase=True)
-
-			chrom = None
-			seq = None
+			self.export_to_fasta(table, selected, total)
 
-			for rows in selected:
-				for row in rows:
-					if chrom != row[1]:
-						chrom = row[1]
-						seq = fx[row[1]].seq
-
-					start = row[2] - flank
-					if start < 1:
-						start = 1
-
-					end = row[3] + flank
-					rep_seq = seq[start-1:end]
-					rep_seq = self.format_to_seq(rep_seq)
-					rep_rec = ">{}{} {}:{}-{}|flank_len={}\n{}\n".format(
-						table.split('_')[0].upper(), row[0], row[1], row[2], row[3], flank, rep_seq.strip()
-					)
-
-					writer.write(rep_rec)
-
-				processed += len(rows)
-				p = int(processed/total*100)
-				if p > progress:
-					self.signals.progress.emit(p)
-					progress = p
+		elif self.export_dest.endswith('.gff'):
+			self.export_to_gff(table, selected, total)
 
 		else:
 			if self.export_dest.endswith('.csv'):
@@ -702,17 +1217,11 @@ class KraitExportSelectedWorker(KraitExportWorker):
 
 			title = DB.get_field(table)
 
+			fw = open(self.export_dest, 'w', newline='')
 			writer = csv.writer(fw, delimiter=separator)
 
 			for rows in selected:
-				if self.export_dest.endswith('.gff'):
-					for row in rows:
-						row = self.format_to_gff(table.split('_')[0].upper(), title, row)
-						writer.writerow(row)
-
-				else:
-					for row in rows:
-						writer.writerow(row)
+				writer.writerows(rows)
 
 				processed += len(rows)
 				p = int(processed/total*100)
@@ -720,7 +1229,8 @@ class KraitExportSelectedWorker(KraitExportWorker):
 					self.signals.progress.emit(p)
 					progress = p
 
-		fw.close()
+			fw.close()
+
 		self.signals.messages.emit("Successfully exported {} selected rows to {}".format(total, self.export_dest))
 
 class KraitExportCurrentTableWorker(KraitExportWorker):
@@ -730,51 +1240,19 @@ class KraitExportCurrentTableWorker(KraitExportWorker):
 		table = self.parent.get_current_table()
 		total = DB.get_one("SELECT COUNT(1) FROM {}".format(table))
 		rows = DB.query("SELECT * FROM {}".format(table))
-		fw = open(self.export_dest, 'w', newline='')
 
 		if self.export_dest.endswith('.fasta'):
-			writer = fw
-			cfile = self.parent.current_file
-			if not cfile:
+			if not self.parent.current_file:
 				return
 
-			settings = QSettings()
-			flank = settings.value('STR/flank', KRAIT_SEARCH_PARAMETERS['STR/flank'], int)
+			self.export_to_fasta(table, self.iter_batches(rows), total)
 
-			sql = "SELECT fpath,format FROM fastx WHERE id=? LIMIT 1"
-			file = DB.get_object(sql, (cfile,))
+		elif self.export_dest.endswith('.gff'):
+			self.export_to_gff(table, self.iter_batches(rows), total)
 
-			if file.format == 'fastq':
-				fx = pyfastx.Fastq(file.fpath)
-			else:
-				fx = pyfastx.Fasta(file.fpath, uppercase=True)
-
-			chrom = None
-			seq = None
-
-			for row in rows:
-				if chrom != row[1]:
-					chrom = row[1]
-					seq = fx[row[1]].seq
-
-				start = row[2] - flank
-				if start < 1:
-					start = 1
-
-				end = row[3] + flank
-				rep_seq = seq[start-1:end]
-				rep_seq = self.format_to_seq(rep_seq)
-				rep_rec = ">{}{} {}:{}-{}|flank_len={}\n{}\n".format(
-					table.split('_')[0].upper(), row[0], row[1], row[2], row[3], flank, rep_seq.strip()
-				)
-
-				writer.write(rep_rec)
-
-				processed += 1
-				p = int(processed/total*100)
-				if p > progress:
-					self.signals.progress.emit(p)
-					progress = p
+		elif self.export_dest.endswith(('.parquet', '.arrow')):
+			out_format = os.path.splitext(self.export_dest)[1][1:]
+			self.export_to_columnar(table, total, out_format)
 
 		else:
 			if self.export_dest.endswith('.csv'):
@@ -784,59 +1262,63 @@ class KraitExportCurrentTableWorker(KraitExportWorker):
 
 			title = DB.get_field(table)
 
+			fw = open(self.export_dest, 'w', newline='')
 			writer = csv.writer(fw, delimiter=separator)
 
-			
-			if self.export_dest.endswith('.gff'):
-				for row in rows:
-					row = self.format_to_gff(table.split('_')[0].upper(), title, row)
-					writer.writerow(row)
-
-					processed += 1
-					p = int(processed/total*100)
-					if p > progress:
-						self.signals.progress.emit(p)
-						progress = p
+			for row in rows:
+				writer.writerow(row)
 
-			else:
-				for row in rows:
-					writer.writerow(row)
+				processed += 1
+				p = int(processed/total*100)
+				if p > progress:
+					self.signals.progress.emit(p)
+					progress = p
 
-					processed += 1
-					p = int(processed/total*100)
-					if p > progress:
-						self.signals.progress.emit(p)
-						progress = p
+			fw.close()
 
-		fw.close()
 		self.signals.messages.emit("Successfully exported to {}".format(self.export_dest))
 
 class KraitExportAllTablesWorker(KraitExportWorker):
-	def __init__(self, parent, export_tables, export_format, export_dest):
+	def __init__(self, parent, export_tables, export_format, export_dest, export_compress=None):
 		super().__init__(parent, export_dest)
 		self.export_tables = export_tables
 		self.export_format = export_format.lower()
+		self.export_compress = export_compress
+		self.snapshot = None
 
-	def do(self):
-		tables = DB.get_tables()
-		total = len(tables)
-		processed = 0
-		progress = 0
+	@property
+	def columnar(self):
+		return self.export_format in ('parquet', 'arrow')
 
+	def get_out_file(self, name):
+		suffixes = {'gzip': '.gz', 'zstd': '.zst'}
+		out_file = os.path.join(self.export_dest, name)
+
+		#columnar formats are compressed internally
+		if self.columnar:
+			return out_file
+
+		return out_file + suffixes.get(self.export_compress, '')
+
+	def get_jobs(self):
 		if self.export_tables == 0:
 			sql = "SELECT * FROM fastx WHERE id={}".format(self.parent.current_file)
 		else:
 			sql = "SELECT * FROM fastx"
 
 		files = {str(row[0]): row[1] for row in DB.query(sql)}
+		names = ['fastx', 'ssr', 'cssr', 'issr', 'gtr', 'primer']
 
-		for table in tables:
-			processed += 1
+		#mapping tables are only useful for columnar analysis tools
+		if self.columnar:
+			names.append('map')
 
+		jobs = []
+		for table in DB.get_tables():
 			if table == 'fastx':
-				out_file = os.path.join(self.export_dest, "input_fastx.{}".format(self.export_format))
+				out_file = self.get_out_file("input_fastx.{}".format(self.export_format))
 
-			else:
+			elif '_' in table:
 				tname, fid = table.split('_')
 
 				if fid not in files:
@@ -844,17 +1326,75 @@ class KraitExportAllTablesWorker(KraitExportWorker):
 
 				fname = files[fid]
 
-				if tname not in ['fastx', 'ssr', 'cssr', 'issr', 'gtr', 'primer']:
+				if tname not in names:
 					continue
 
-				out_file = os.path.join(self.export_dest, "{}_{}_{}.{}".format(fid, fname, tname, self.export_format))
+				out_file = self.get_out_file("{}_{}_{}.{}".format(fid, fname, tname, self.export_format))
 
-			DB.export_to_file(table, out_file, self.export_format)
-			p = int(processed/total*100)
+			else:
+				continue
 
-			if p > progress:
-				self.signals.progress.emit(p)
-				progress = p
+			jobs.append((table, out_file))
+
+		return jobs
+
+	def export_table(self, table, out_file):
+		#each thread reads table from its own read-only connection
+		conn = DB.reader(self.snapshot)
+
+		try:
+			if self.columnar:
+				DB.export_to_columnar(table, out_file, self.export_format, conn, self.export_compress)
+			else:
+				fw = open_export_file(out_file, self.export_compress)
+				DB.export_to_file(table, fw, self.export_format, conn)
+
+		finally:
+			if conn is not None:
+				conn.close()
+
+		return table
+
+	def do(self):
+		jobs = self.get_jobs()
+		total = len(jobs)
+		processed = 0
+
+		if not total:
+			return
+
+		workers = min(total, os.cpu_count() or 1)
+
+		#uncommitted rows are only visible to the main connection, and an
+		#in-memory project is read from a snapshot file, so the threads
+		#leave the main connection to the interface
+		if not DB.autocommit:
+			DB.commit()
+			DB.begin()
+
+		conn = DB.reader()
+
+		try:
+			if conn is None:
+				fd, self.snapshot = tempfile.mkstemp(suffix='.kpf')
+				os.close(fd)
+				DB.snapshot(self.snapshot)
+			else:
+				conn.close()
+
+			with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+				futures = [executor.submit(self.export_table, *job) for job in jobs]
+
+				for future in concurrent.futures.as_completed(futures):
+					table = future.result()
+					processed += 1
+
+					self.signals.messages.emit("Exported table {} ({}/{})".format(table, processed, total))
+					self.signals.progress.emit(int(processed/total*100))
+
+		finally:
+			if self.snapshot:
+				os.remove(self.snapshot)
 
 		self.signals.messages.emit("Successfully exported all tables to {}".format(self.export_dest))
 
@@ -1183,6 +1723,8 @@ class PrimerDesignThread(WorkerThread):
 			return "SELECT * FROM {}_{} WHERE id IN ({})".format(self.table, self.findex, ','.join(['?']*num))
 
 	def process(self):
+		import primer3
+
 		#get fasta file path
 		fasta_file = DB.get_one("SELECT fasta FROM fasta_0 WHERE id=?", self.findex)
 		fasta = pyfastx.Fasta(fasta_file, uppercase=True)